@@ -0,0 +1,536 @@
+"""
+データアクセス層のベンチマーク
+
+インメモリ Firestore に投稿を投入し、FirebaseClient（フロントエンド）と
+FirestoreClient（Functions）の各メソッドのレイテンシとスループットを計測します。
+Firebase プロジェクトは不要です。
+
+使い方（application ディレクトリで実行）:
+    python benchmarks/bench_data_layer.py --posts 10000
+    python benchmarks/bench_data_layer.py --posts 10000 100000 1000000 --iterations 20
+    python benchmarks/bench_data_layer.py --posts 100000 --filter get_recent
+
+計測値はクライアントの処理（クエリの組み立て・Post への変換・キャッシュ・
+暗号化）とインメモリ Firestore の処理を合わせたものです。ネットワークの往復は
+含まないため、同じ条件での変更前後の比較（リグレッションの検出）に使います。
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+APPLICATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(APPLICATION_DIR, "functions"))
+sys.path.insert(0, os.path.join(APPLICATION_DIR, "frontend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cryptography.fernet import Fernet  # noqa: E402
+
+from memory_firestore import MemoryFirestore  # noqa: E402
+
+JST = timezone(timedelta(hours=9))
+OWNERS = ["main_user", "1234567890", "2345678901"]
+SLOT_HOURS = {0: 9, 1: 12, 2: 15, 3: 21}
+# scheduledAt・status を持たない旧形式の投稿の割合
+LEGACY_RATIO = 0.1
+# 状態ごとの割合（投稿済みが大半を占める運用を想定）
+STATUS_WEIGHTS = {
+    "posted": 0.70,
+    "pending": 0.20,
+    "deferred": 0.05,
+    "failed": 0.04,
+    "processing": 0.01,
+}
+# posts の件数に対するアーカイブに移された投稿の割合と、移された期間（日前）
+ARCHIVE_RATIO = 0.1
+ARCHIVE_DAYS = (120, 300)
+
+
+@dataclass
+class Case:
+    """1つの計測対象"""
+
+    name: str
+    run: Callable[[], Any]
+    setup: Optional[Callable[[], None]] = None
+
+
+def seed_posts(db: MemoryFirestore, count: int, days: int, seed: int) -> None:
+    """今日を中心に前後 days 日へ分散した投稿を投入"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    today = now.astimezone(JST).date()
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+
+    posts: Dict[str, Dict[str, Any]] = {}
+    for i in range(count):
+        day = today + timedelta(days=rng.randint(-days, days))
+        time_slot = rng.choice([0, 1, 2, 3, None])
+        hour = SLOT_HOURS.get(time_slot, rng.randint(0, 23))
+        scheduled_at = datetime(day.year, day.month, day.day, hour, tzinfo=JST)
+        status = rng.choices(statuses, weights)[0]
+        if scheduled_at > now and status != "pending":
+            status = "pending"
+
+        created_at = scheduled_at - timedelta(days=1, minutes=rng.randint(0, 600))
+        data: Dict[str, Any] = {
+            "content": f"ベンチマーク投稿 {i} " + "あ" * rng.randint(10, 120),
+            "postDate": day.strftime("%Y/%m/%d"),
+            "timeSlot": time_slot,
+            "scheduledAt": scheduled_at.astimezone(timezone.utc),
+            "ownerId": rng.choice(OWNERS),
+            "status": status,
+            "isPosted": status == "posted",
+            "createdAt": created_at.astimezone(timezone.utc),
+            "updatedAt": created_at.astimezone(timezone.utc),
+            "attemptCount": 0,
+        }
+        if status == "posted":
+            data["postedAt"] = data["scheduledAt"] + timedelta(seconds=rng.randint(0, 300))
+            data["xPostId"] = str(10**18 + i)
+        elif status == "deferred":
+            data["nextAttemptAt"] = now + timedelta(minutes=rng.randint(-60, 60))
+            data["attemptCount"] = rng.randint(1, 4)
+        elif status == "processing":
+            data["leaseOwner"] = "bench-worker"
+            data["leaseExpiresAt"] = now + timedelta(minutes=rng.randint(-30, 10))
+        elif status == "failed":
+            data["errorMessage"] = "Forbidden"
+
+        if status in ("pending", "posted") and rng.random() < LEGACY_RATIO:
+            del data["scheduledAt"], data["status"]
+        posts[f"post{i:08d}"] = data
+
+    db.load("posts", posts)
+
+
+def seed_archives(db: MemoryFirestore, count: int, seed: int) -> List[str]:
+    """
+    保存期間を過ぎてアカウント・月ごとのアーカイブに移された投稿を投入
+
+    Returns:
+        アーカイブに移された投稿ID
+    """
+    rng = random.Random(seed + 1)
+    today = datetime.now(JST).date()
+    archives: Dict[str, Dict[str, Any]] = {}
+    for i in range(max(1, int(count * ARCHIVE_RATIO))):
+        day = today - timedelta(days=rng.randint(*ARCHIVE_DAYS))
+        time_slot = rng.choice([0, 1, 2, 3, None])
+        hour = SLOT_HOURS.get(time_slot, rng.randint(0, 23))
+        scheduled_at = datetime(day.year, day.month, day.day, hour, tzinfo=JST)
+        owner = rng.choice(OWNERS)
+        month = day.strftime("%Y-%m")
+        archive = archives.setdefault(
+            f"{owner}_{month}",
+            {"ownerId": owner, "month": month, "count": 0, "posts": {}},
+        )
+        archive["count"] += 1
+        archive["posts"][f"arch{i:08d}"] = {
+            "content": f"アーカイブ済みの投稿 {i} " + "い" * rng.randint(10, 120),
+            "postDate": day.strftime("%Y/%m/%d"),
+            "timeSlot": time_slot,
+            "scheduledAt": scheduled_at.astimezone(timezone.utc),
+            "ownerId": owner,
+            "status": "posted",
+            "isPosted": True,
+            "createdAt": (scheduled_at - timedelta(days=1)).astimezone(timezone.utc),
+            "postedAt": scheduled_at.astimezone(timezone.utc),
+            "xPostId": str(2 * 10**18 + i),
+            "attemptCount": 0,
+        }
+
+    db.load("postArchives", archives)
+    return [post_id for archive in archives.values() for post_id in archive["posts"]]
+
+
+def seed_post_hashes(db: MemoryFirestore, stale: int = 100) -> None:
+    """
+    投稿済みの投稿内容の索引を投入
+
+    重複判定の期間内に投稿済みの投稿と、期間を過ぎた（削除対象の）ハッシュを
+    アカウントごとに stale 件ずつ含める
+    """
+    from shared.config import Config
+    from shared.post_hashes import content_hash
+
+    since = datetime.now(timezone.utc) - timedelta(hours=Config.DUPLICATE_WINDOW_HOURS)
+    indexes: Dict[str, Dict[str, Any]] = {
+        owner: {"ownerId": owner, "hashes": {}} for owner in OWNERS
+    }
+    for post_id, data in db._documents("posts").items():
+        posted_at = data.get("postedAt")
+        if data.get("isPosted") and posted_at is not None and posted_at >= since:
+            indexes[data["ownerId"]]["hashes"][content_hash(data["content"])] = {
+                "postId": post_id,
+                "postedAt": posted_at,
+            }
+
+    db.load("postHashes", indexes)
+    add_stale_hashes(db, stale)
+
+
+def add_stale_hashes(db: MemoryFirestore, count: int) -> None:
+    """重複判定の期間を過ぎたハッシュを各アカウントの索引に追加"""
+    from shared.config import Config
+
+    posted_at = datetime.now(timezone.utc) - timedelta(
+        hours=Config.DUPLICATE_WINDOW_HOURS + 1
+    )
+    for owner in OWNERS:
+        db.collection("postHashes").document(owner).set(
+            {
+                "hashes": {
+                    f"stale-{owner}-{i}": {"postId": f"old{i}", "postedAt": posted_at}
+                    for i in range(count)
+                }
+            },
+            merge=True,
+        )
+
+
+def seed_users(db: MemoryFirestore, cipher) -> None:
+    """各アカウントの暗号化トークンを投入"""
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=2)
+    db.load(
+        "users",
+        {
+            owner: {
+                "accessToken": cipher.encrypt(f"access-{owner}".encode()).decode(),
+                "refreshToken": cipher.encrypt(f"refresh-{owner}".encode()).decode(),
+                "expiresAt": expires_at,
+                "xUserId": owner if owner != "main_user" else "9999999999",
+            }
+            for owner in OWNERS
+        },
+    )
+
+
+def build_frontend_client(db: MemoryFirestore, encryption_key: str):
+    """インメモリ Firestore を使う FirebaseClient を作成（Firebase の初期化は行わない）"""
+    from db.firebase_client import FirebaseClient
+    from db.query_cache import QueryCache
+    from db.token_cache import TokenCache, build_cipher
+    from utils.config import Config
+
+    client = object.__new__(FirebaseClient)
+    client._db = db
+    client._cipher = build_cipher(encryption_key)
+    client._cache = QueryCache(
+        maxsize=Config.QUERY_CACHE_MAXSIZE, ttl=Config.QUERY_CACHE_TTL_SECONDS
+    )
+    client._token_cache = TokenCache(ttl=Config.TOKEN_CACHE_TTL_SECONDS)
+    return client
+
+
+def build_functions_client(db: MemoryFirestore, encryption_key: str):
+    """インメモリ Firestore を使う FirestoreClient を作成（Firebase の初期化は行わない）"""
+    from shared.config import Config
+    from shared.firestore_client import FirestoreClient
+    from shared.token_cache import TokenCache, build_cipher
+
+    client = object.__new__(FirestoreClient)
+    client._db = db
+    client._cipher = build_cipher(encryption_key)
+    client._token_cache = TokenCache(ttl=Config.TOKEN_CACHE_TTL_SECONDS)
+    return client
+
+
+def pending_post_ids(db: MemoryFirestore) -> Iterator[str]:
+    """書き込み系の計測に使う未投稿の投稿ID（1回ずつ使い切る）"""
+    ids = [
+        post_id
+        for post_id, data in db._documents("posts").items()
+        if data.get("status", "pending") == "pending" and not data["isPosted"]
+    ]
+    random.Random(0).shuffle(ids)
+    return iter(ids)
+
+
+def posted_content(db: MemoryFirestore, owner_id: str) -> str:
+    """重複判定の計測に使う、アカウントが直近に投稿済みの投稿内容"""
+    posted = [
+        data
+        for data in db._documents("posts").values()
+        if data["ownerId"] == owner_id and data.get("postedAt") is not None
+    ]
+    return max(posted, key=lambda data: data["postedAt"])["content"]
+
+
+def frontend_cases(
+    client, db: MemoryFirestore, ids: Iterator[str], archived_ids: List[str]
+) -> List[Case]:
+    """FirebaseClient の計測対象（読み取りは毎回キャッシュを破棄して計測）"""
+    from db.post_archive import posts_from_archive
+
+    today = datetime.now(JST).strftime("%Y/%m/%d")
+    created: List[str] = []
+    cold = client.clear_cache
+
+    archives = list(db._documents("postArchives").values())
+    # 削除の計測に使うアーカイブ内の投稿（画面に表示された投稿として渡す）
+    archived_posts = iter(
+        sorted(
+            (post for data in archives for post in posts_from_archive(data)),
+            key=lambda post: post.id,
+        )
+    )
+    archived_date = min(
+        entry["postDate"] for data in archives for entry in data["posts"].values()
+    )
+    duplicate = posted_content(db, "main_user")
+
+    def create_post():
+        # 同じ内容は重複として作成されないため、投稿ごとに内容を変える
+        post_id = client.create_post(
+            f"ベンチマークで作成した投稿 {len(created)}",
+            scheduled_at=datetime.now(timezone.utc) + timedelta(days=1),
+            owner_id="main_user",
+        )
+        created.append(post_id)
+        return post_id
+
+    def delete_post():
+        return client.delete_post(created.pop() if created else next(ids))
+
+    def delete_archived_post():
+        post = next(archived_posts, None)
+        return client.delete_post(post.id, post) if post else None
+
+    return [
+        Case(
+            "frontend.get_user_tokens (cold)",
+            lambda: client.get_user_tokens("main_user"),
+            setup=client._token_cache.invalidate,
+        ),
+        Case("frontend.get_user_tokens (cached)", lambda: client.get_user_tokens("main_user")),
+        Case("frontend.resolve_owner_id", lambda: client.resolve_owner_id("1234567890")),
+        Case("frontend.get_posts_by_date", lambda: client.get_posts_by_date(today), cold),
+        Case(
+            "frontend.get_posts_by_date (cached)",
+            lambda: client.get_posts_by_date(today),
+        ),
+        Case(
+            "frontend.get_posts_by_date (page 50)",
+            lambda: client.get_posts_by_date(today, limit=50),
+            cold,
+        ),
+        Case(
+            "frontend.get_posts_by_date (archived)",
+            lambda: client.get_posts_by_date(archived_date),
+            cold,
+        ),
+        Case(
+            "frontend.get_scheduled_posts",
+            lambda: client.get_scheduled_posts(today, 1),
+            cold,
+        ),
+        Case("frontend.get_recent_posts", lambda: client.get_recent_posts(10), cold),
+        Case(
+            "frontend.get_recent_posts (all)",
+            lambda: client.get_recent_posts(10, posted_only=False),
+            cold,
+        ),
+        Case(
+            "frontend.get_recent_posts (archived page)",
+            lambda: client.get_recent_posts(10, start_after=archived_ids[0]),
+            cold,
+        ),
+        Case(
+            "frontend.find_duplicate_post (posted)",
+            lambda: client.find_duplicate_post(duplicate, "main_user"),
+        ),
+        Case(
+            "frontend.find_duplicate_post (new)",
+            lambda: client.find_duplicate_post("まだ投稿していない内容", "main_user"),
+        ),
+        Case("frontend.get_post_quota", lambda: client.get_post_quota("main_user"), cold),
+        Case("frontend.create_post", create_post),
+        Case(
+            "frontend.update_post_status",
+            lambda: client.update_post_status(next(ids), True, "1", owner_id="main_user"),
+        ),
+        Case("frontend.delete_post", delete_post),
+        Case("frontend.delete_post (archived)", delete_archived_post),
+        Case(
+            "frontend.save_user_token",
+            lambda: client.save_user_token("access", "refresh", user_id="bench_user"),
+        ),
+    ]
+
+
+def functions_cases(client, db: MemoryFirestore, ids: Iterator[str]) -> List[Case]:
+    """FirestoreClient の計測対象（アーカイブへの移動は投稿済みの投稿を減らすため最後に計測）"""
+    from shared.config import Config
+
+    now = datetime.now(timezone.utc)
+    today = now.astimezone(JST)
+    slots = Config.get_slots_between(today - timedelta(days=1), today)
+
+    def write_statuses(count: int = 100):
+        with client.status_writer() as writer:
+            for _ in range(count):
+                writer.update_post_status(
+                    next(ids),
+                    True,
+                    "1",
+                    counter_deltas=[("main_user", today.date(), 1, 0)],
+                )
+        return count
+
+    return [
+        Case(
+            "functions.get_user_tokens (cold)",
+            lambda: client.get_user_tokens("main_user"),
+            setup=client.invalidate_token_cache,
+        ),
+        Case("functions.get_user_tokens (cached)", lambda: client.get_user_tokens("main_user")),
+        Case(
+            "functions.get_scheduled_posts",
+            lambda: client.get_scheduled_posts(today.strftime("%Y/%m/%d"), 1),
+        ),
+        Case(
+            "functions.get_legacy_posts_for_slots",
+            lambda: client.get_legacy_posts_for_slots(slots),
+        ),
+        Case("functions.get_due_posts", lambda: client.get_due_posts(now)),
+        Case("functions.get_due_retry_posts", lambda: client.get_due_retry_posts(now)),
+        Case("functions.get_expired_lease_posts", lambda: client.get_expired_lease_posts(now)),
+        Case(
+            "functions.count_posted_last_24_hours",
+            lambda: client.count_posted_last_24_hours("main_user"),
+        ),
+        Case("functions.get_post_quota", lambda: client.get_post_quota("main_user")),
+        Case(
+            "functions.get_recent_post_hashes",
+            lambda: client.get_recent_post_hashes("main_user"),
+        ),
+        Case(
+            "functions.prune_post_hashes",
+            lambda: client.prune_post_hashes()[0],
+            setup=lambda: add_stale_hashes(db, 100),
+        ),
+        Case("functions.claim_post", lambda: client.claim_post(next(ids), "bench-worker")),
+        Case(
+            "functions.update_post_status",
+            lambda: client.update_post_status(
+                next(ids), True, "1", counter_deltas=[("main_user", today.date(), 1, 0)]
+            ),
+        ),
+        Case("functions.status_writer (100 posts)", write_statuses),
+        Case("functions.get_scheduler_checkpoint", client.get_scheduler_checkpoint),
+        Case(
+            "functions.save_scheduler_checkpoint",
+            lambda: client.save_scheduler_checkpoint(now),
+        ),
+        Case(
+            "functions.archive_posted_posts (20 posts)",
+            lambda: client.archive_posted_posts(now, limit=20)[0],
+        ),
+    ]
+
+
+def result_size(result: Any) -> str:
+    """結果の件数（空の結果やエラーで握りつぶされた結果に気付けるように表示）"""
+    if isinstance(result, (list, dict)):
+        return str(len(result))
+    if result is None or isinstance(result, bool):
+        return str(result)
+    return "1"
+
+
+def run_case(case: Case, iterations: int, warmup: int) -> Dict[str, Any]:
+    """1つの計測対象を warmup 回実行した後、iterations 回計測"""
+    for _ in range(warmup):
+        if case.setup:
+            case.setup()
+        case.run()
+
+    durations = []
+    result = None
+    for _ in range(iterations):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        result = case.run()
+        durations.append(time.perf_counter() - start)
+
+    durations.sort()
+    total = sum(durations)
+    return {
+        "name": case.name,
+        "p50": statistics.median(durations) * 1000,
+        "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+        "max": durations[-1] * 1000,
+        "ops": iterations / total if total else float("inf"),
+        "result": result_size(result),
+    }
+
+
+def print_results(posts: int, seed_seconds: float, results: List[Dict[str, Any]]) -> None:
+    print(f"\n## 投稿 {posts:,} 件（投入 {seed_seconds:.1f} 秒）\n")
+    print(
+        f"{'method':<44} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10} "
+        f"{'ops/s':>10} {'result':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:<44} {r['p50']:>10.3f} {r['p95']:>10.3f} {r['max']:>10.3f} "
+            f"{r['ops']:>10.1f} {r['result']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="データアクセス層のベンチマーク")
+    parser.add_argument(
+        "--posts",
+        type=int,
+        nargs="+",
+        default=[10_000],
+        help="投入する投稿数（複数指定でそれぞれ計測、例: 10000 100000 1000000）",
+    )
+    parser.add_argument("--days", type=int, default=30, help="投稿を分散させる前後の日数")
+    parser.add_argument("--iterations", type=int, default=50, help="各メソッドの計測回数")
+    parser.add_argument("--warmup", type=int, default=3, help="計測前の実行回数")
+    parser.add_argument("--filter", default="", help="メソッド名に含まれる文字列で絞り込み")
+    parser.add_argument("--seed", type=int, default=42, help="データ生成の乱数シード")
+    args = parser.parse_args(argv)
+
+    # 各メソッドのログ出力は計測対象から外す（エラーは表示）
+    logging.disable(logging.WARNING)
+
+    encryption_key = Fernet.generate_key().decode()
+    for posts in args.posts:
+        db = MemoryFirestore()
+        start = time.perf_counter()
+        seed_posts(db, posts, args.days, args.seed)
+        archived_ids = seed_archives(db, posts, args.seed)
+        seed_post_hashes(db)
+        seed_users(db, Fernet(encryption_key.encode()))
+        seed_seconds = time.perf_counter() - start
+
+        frontend = build_frontend_client(db, encryption_key)
+        functions = build_functions_client(db, encryption_key)
+        ids = pending_post_ids(db)
+        cases = frontend_cases(frontend, db, ids, archived_ids) + functions_cases(
+            functions, db, ids
+        )
+
+        results = [
+            run_case(case, args.iterations, args.warmup)
+            for case in cases
+            if args.filter in case.name
+        ]
+        print_results(posts, seed_seconds, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+投稿処理のベンチマーク
+
+インメモリ Firestore に1スロット分の予約投稿を投入し、ローカルの X API スタブサーバー
+（fake_x_api.py）に向けて process_scheduled_posts を実行して、スループットと
+post_tweet のレイテンシ（p50/p95/p99）を計測します。Firebase プロジェクトと
+X API のクレデンシャルは不要で、無料プランの投稿数の上限も受けません。
+
+使い方（application ディレクトリで実行、Functions の依存関係が必要）:
+    python benchmarks/bench_poster.py --posts 1000 5000
+    python benchmarks/bench_poster.py --posts 2000 --workers 16 --latency-ms 150
+    python benchmarks/bench_poster.py --posts 2000 --error-rate 0.01 --error-burst 20
+    python benchmarks/bench_poster.py --posts 2000 --timeout-rate 0.005 --read-timeout 2
+    python benchmarks/bench_poster.py --posts 2000 --rate-limit 500 --expired-owners 1
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS_DIR), "functions"))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from cryptography.fernet import Fernet  # noqa: E402
+
+from bench_data_layer import build_functions_client  # noqa: E402
+from fake_x_api import FakeXServer, add_config_arguments, config_from_args  # noqa: E402
+from memory_firestore import MemoryFirestore  # noqa: E402
+
+JST = timezone(timedelta(hours=9))
+TIME_SLOT = 0
+
+# post_tweet 1回ごとの所要時間（秒、実行ごとに空にする）
+LATENCIES: List[float] = []
+
+
+def seed_owners(db: MemoryFirestore, cipher, owners: int, expired: int) -> List[str]:
+    """
+    アカウントの暗号化トークンを投入
+
+    expired 件のアカウントは有効期限切れの "expired-" トークンを持ち、
+    実行の最初にスタブサーバーの /2/oauth2/token でリフレッシュする
+    """
+    now = datetime.now(timezone.utc)
+    owner_ids = [f"owner{i:03d}" for i in range(owners)]
+    users = {}
+    for i, owner_id in enumerate(owner_ids):
+        is_expired = i < expired
+        prefix = "expired-" if is_expired else ""
+        users[owner_id] = {
+            "accessToken": cipher.encrypt(
+                f"{prefix}access-{owner_id}".encode()
+            ).decode(),
+            "refreshToken": cipher.encrypt(f"refresh-{owner_id}".encode()).decode(),
+            "expiresAt": now
+            + (timedelta(hours=-1) if is_expired else timedelta(hours=2)),
+        }
+    db.load("users", users)
+    return owner_ids
+
+
+def seed_slot_posts(
+    db: MemoryFirestore, count: int, owner_ids: List[str], date_str: str
+) -> None:
+    """対象スロットの未投稿の予約投稿を、アカウントに均等に割り当てて投入"""
+    created_at = datetime.now(timezone.utc) - timedelta(days=1)
+    db.load(
+        "posts",
+        {
+            f"post{i:08d}": {
+                "content": f"スタブサーバーへの投稿 {i}",
+                "postDate": date_str,
+                "timeSlot": TIME_SLOT,
+                "ownerId": owner_ids[i % len(owner_ids)],
+                "status": "pending",
+                "isPosted": False,
+                "createdAt": created_at,
+                "attemptCount": 0,
+            }
+            for i in range(count)
+        },
+    )
+
+
+def percentile(sorted_values: List[float], ratio: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+
+def instrument_post_tweet() -> None:
+    """XAPIClient.post_tweet の所要時間（例外を含む）を LATENCIES に記録する"""
+    from shared.x_api_client import XAPIClient
+
+    post_tweet = XAPIClient.post_tweet
+
+    def timed_post_tweet(self, text, reply_settings=None):
+        start = time.perf_counter()
+        try:
+            return post_tweet(self, text, reply_settings)
+        finally:
+            LATENCIES.append(time.perf_counter() - start)
+
+    XAPIClient.post_tweet = timed_post_tweet
+
+
+def run(args: argparse.Namespace, posts: int, encryption_key: str) -> Dict[str, Any]:
+    """1回分の投稿処理を実行して計測値を返す"""
+    import function_app
+    from shared.circuit_breaker import reset_all
+    from shared.config import Config
+    from shared.firestore_client import FirestoreClient
+    from shared.http_transport import close_http_session
+
+    db = MemoryFirestore()
+    date_str = datetime.now(JST).strftime("%Y/%m/%d")
+    owner_ids = seed_owners(
+        db, Fernet(encryption_key.encode()), args.owners, args.expired_owners
+    )
+    seed_slot_posts(db, posts, owner_ids, date_str)
+
+    # get_firestore_client() がインメモリ Firestore のクライアントを返すようにする
+    FirestoreClient._instance = build_functions_client(db, encryption_key)
+
+    # 投稿数の上限で延期されないよう、上限を投稿数に合わせる
+    Config.DAILY_POST_LIMIT = posts
+    Config.MONTHLY_POST_LIMIT = posts
+    Config.OWNER_MAX_WORKERS = args.owners
+    Config.HTTP_READ_TIMEOUT = args.read_timeout
+    Config.HTTP_POOL_MAXSIZE = max(Config.HTTP_POOL_MAXSIZE, args.workers * args.owners)
+    close_http_session()
+    # 前回の実行の応答時間・サーキットブレーカーの状態を持ち越さない
+    reset_all()
+
+    LATENCIES.clear()
+    with FakeXServer(config_from_args(args, args.seed)) as server:
+        Config.X_API_BASE_URL = server.base_url
+        start = time.perf_counter()
+        result = function_app.process_scheduled_posts(
+            target_slot=TIME_SLOT, target_date=date_str, max_workers=args.workers
+        )
+        elapsed = time.perf_counter() - start
+        server_stats = server.stats
+
+    latencies = sorted(LATENCIES)
+    return {
+        "posts": posts,
+        "elapsed": elapsed,
+        "throughput": result["success_count"] / elapsed if elapsed else 0.0,
+        "success": result["success_count"],
+        "errors": result["error_count"],
+        "deferred": result.get("deferred_count", 0),
+        "skipped": result.get("skipped_count", 0),
+        "requests": len(latencies),
+        "p50": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "max": latencies[-1] * 1000 if latencies else 0.0,
+        "server": server_stats,
+    }
+
+
+def print_result(r: Dict[str, Any]) -> None:
+    print(f"\n## 投稿 {r['posts']:,} 件\n")
+    print(
+        f"所要時間 {r['elapsed']:.2f} 秒 / {r['throughput']:.1f} 投稿/秒 "
+        f"(成功 {r['success']}, エラー {r['errors']}, 延期 {r['deferred']}, "
+        f"スキップ {r['skipped']})"
+    )
+    print(
+        f"post_tweet {r['requests']} 回: p50 {r['p50']:.1f} ms, p95 {r['p95']:.1f} ms, "
+        f"p99 {r['p99']:.1f} ms, max {r['max']:.1f} ms"
+    )
+    print(
+        "スタブサーバーの応答: "
+        + ", ".join(f"{k}: {v}" for k, v in r["server"].items())
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="投稿処理のベンチマーク（X API スタブ使用）"
+    )
+    parser.add_argument(
+        "--posts",
+        type=int,
+        nargs="+",
+        default=[1000],
+        help="1スロットに投入する投稿数（複数指定でそれぞれ計測）",
+    )
+    parser.add_argument(
+        "--owners", type=int, default=1, help="投稿を割り当てるアカウント数"
+    )
+    parser.add_argument(
+        "--expired-owners",
+        type=int,
+        default=0,
+        help="有効期限切れのトークンを持つ（実行時にリフレッシュする）アカウント数",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="アカウントごとの並列投稿数"
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=30.0,
+        help="POST /2/tweets の読み取りタイムアウト（秒）",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="スタブサーバーの乱数シード"
+    )
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # 障害を再現すると投稿ごとにエラーが記録されるため、ログ出力は計測対象から外す
+    logging.disable(logging.ERROR)
+    instrument_post_tweet()
+
+    # トークンリフレッシュ用のクレデンシャル（スタブサーバーは値を検証しない）
+    os.environ.setdefault("X_CLIENT_ID", "bench-client")
+    os.environ.setdefault("X_CLIENT_SECRET", "bench-secret")
+
+    encryption_key = Fernet.generate_key().decode()
+    for posts in args.posts:
+        print_result(run(args, posts, encryption_key))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+"""
+ローカルの X API スタブサーバー
+
+投稿処理の負荷・障害試験用に、X API v2 の次のエンドポイントを同じ形式で返します。
+
+- POST /2/tweets: ツイート投稿（レート制限ヘッダー・重複内容の 403 を含む）
+- GET /2/users/me: アクセストークンの検証
+- POST /2/oauth2/token: リフレッシュトークンによるアクセストークンの更新
+
+レイテンシ（対数正規分布）、429（x-rate-limit-reset 付き）、5xx の連続発生、
+応答の停止（クライアントのタイムアウト）を設定で再現できます。
+"expired-" で始まるアクセストークンには 401 を返すため、リフレッシュの経路も試せます。
+
+使い方（application ディレクトリで実行）:
+    python benchmarks/fake_x_api.py --port 8399 --latency-ms 120 --error-rate 0.01
+    X_API_BASE_URL=http://127.0.0.1:8399/2 func start
+
+bench_poster.py からはプロセス内で FakeXServer を起動して使います。
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+
+@dataclass
+class FakeXConfig:
+    """スタブサーバーの応答の設定"""
+
+    # 応答までの時間の中央値（ミリ秒）と対数正規分布のばらつき（0 で一定）
+    latency_ms: float = 80.0
+    latency_sigma: float = 0.5
+    # アクセストークンごとの /2/tweets のレート制限（0 で無制限）と期間（秒）
+    rate_limit: int = 0
+    rate_window_seconds: float = 15 * 60
+    # 5xx の連続発生を始める確率と、1回の発生で続けて返す件数
+    error_rate: float = 0.0
+    error_burst: int = 5
+    # 応答を止める（タイムアウトさせる）確率と止める秒数
+    timeout_rate: float = 0.0
+    hang_seconds: float = 60.0
+    # 発行するアクセストークンの有効秒数
+    token_ttl_seconds: int = 7200
+    seed: Optional[int] = None
+
+
+class FakeXState:
+    """レート制限の残り・5xx の発生状況・投稿済みの内容などのサーバーの状態"""
+
+    def __init__(self, config: FakeXConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self._burst_remaining = 0
+        self._texts: Dict[str, set] = {}
+        self._ids = itertools.count(10**18)
+        self._tokens = itertools.count(1)
+        self.stats: Counter = Counter()
+
+    def latency(self) -> float:
+        """今回の応答までの秒数"""
+        with self._lock:
+            hang = self._rng.random() < self.config.timeout_rate
+            noise = self._rng.gauss(0, self.config.latency_sigma)
+        if hang:
+            return self.config.hang_seconds
+        return self.config.latency_ms / 1000 * math.exp(noise)
+
+    def server_error(self) -> bool:
+        """5xx を返すかどうか（発生すると error_burst 件続けて返す）"""
+        with self._lock:
+            if (
+                self._burst_remaining <= 0
+                and self._rng.random() < self.config.error_rate
+            ):
+                self._burst_remaining = self.config.error_burst
+            if self._burst_remaining > 0:
+                self._burst_remaining -= 1
+                return True
+            return False
+
+    def consume_rate_limit(self, token: str) -> Dict[str, str]:
+        """
+        アクセストークンのレート制限を1回分使う
+
+        Returns:
+            レート制限ヘッダー（残りがない場合は x-rate-limit-remaining が 0 で、
+            "exceeded" キーを含む）
+        """
+        limit = self.config.rate_limit
+        if limit <= 0:
+            return {}
+        now = time.time()
+        with self._lock:
+            window_start, used = self._windows.get(token, (now, 0))
+            if now - window_start >= self.config.rate_window_seconds:
+                window_start, used = now, 0
+            exceeded = used >= limit
+            if not exceeded:
+                used += 1
+            self._windows[token] = (window_start, used)
+        headers = {
+            "x-rate-limit-limit": str(limit),
+            "x-rate-limit-remaining": str(max(0, limit - used)),
+            "x-rate-limit-reset": str(
+                int(window_start + self.config.rate_window_seconds)
+            ),
+        }
+        if exceeded:
+            headers["exceeded"] = "1"
+        return headers
+
+    def register_text(self, token: str, text: str) -> bool:
+        """投稿内容を記録（同じトークンで投稿済みの内容の場合は False）"""
+        with self._lock:
+            texts = self._texts.setdefault(token, set())
+            if text in texts:
+                return False
+            texts.add(text)
+            return True
+
+    def next_tweet_id(self) -> str:
+        with self._lock:
+            return str(next(self._ids))
+
+    def issue_tokens(self) -> Dict[str, Any]:
+        with self._lock:
+            n = next(self._tokens)
+        return {
+            "token_type": "bearer",
+            "expires_in": self.config.token_ttl_seconds,
+            "access_token": f"access-issued-{n}",
+            "refresh_token": f"refresh-issued-{n}",
+            "scope": "tweet.write users.read tweet.read offline.access",
+        }
+
+    def record(self, endpoint: str, status: int) -> None:
+        with self._lock:
+            self.stats[f"{endpoint} {status}"] += 1
+
+
+class FakeXHandler(BaseHTTPRequestHandler):
+    """X API v2 と同じ形式で応答するハンドラー"""
+
+    # 接続を再利用できるよう Content-Length 付きの HTTP/1.1 で応答
+    protocol_version = "HTTP/1.1"
+    # ヘッダーと本文を別々に書き込むため、遅延 ACK による待ちを避ける
+    disable_nagle_algorithm = True
+    server: "FakeXHTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """リクエストごとのアクセスログは出力しない"""
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _bearer_token(self) -> Optional[str]:
+        authorization = self.headers.get("Authorization") or ""
+        if authorization.startswith("Bearer "):
+            return authorization[len("Bearer ") :]
+        return None
+
+    def _send_json(
+        self,
+        endpoint: str,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        state = self.server.state
+        time.sleep(state.latency())
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # クライアントがタイムアウトで切断済み
+            status = 0
+        state.record(endpoint, status)
+
+    def _send_problem(
+        self,
+        endpoint: str,
+        status: int,
+        title: str,
+        detail: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._send_json(
+            endpoint,
+            status,
+            {"title": title, "detail": detail, "type": "about:blank", "status": status},
+            headers,
+        )
+
+    def _unauthorized(self, endpoint: str) -> None:
+        self._send_problem(endpoint, 401, "Unauthorized", "Unauthorized")
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/2/users/me":
+            self._send_problem(self.path, 404, "Not Found Error", "Not Found")
+            return
+        token = self._bearer_token()
+        if not token or token.startswith("expired-"):
+            self._unauthorized("users/me")
+            return
+        self._send_json(
+            "users/me",
+            200,
+            {"data": {"id": "9999999999", "name": "Fake User", "username": "fake"}},
+        )
+
+    def do_POST(self) -> None:
+        body = self._read_body()
+        path = self.path.split("?")[0]
+        if path == "/2/tweets":
+            self._post_tweet(body)
+        elif path == "/2/oauth2/token":
+            self._refresh_token(body)
+        else:
+            self._send_problem(path, 404, "Not Found Error", "Not Found")
+
+    def _post_tweet(self, body: bytes) -> None:
+        state = self.server.state
+        token = self._bearer_token()
+        if not token or token.startswith("expired-"):
+            self._unauthorized("tweets")
+            return
+
+        rate_headers = state.consume_rate_limit(token)
+        if rate_headers.pop("exceeded", None):
+            self._send_problem(
+                "tweets", 429, "Too Many Requests", "Too Many Requests", rate_headers
+            )
+            return
+
+        if state.server_error():
+            self._send_problem(
+                "tweets",
+                503,
+                "Service Unavailable",
+                "Service Unavailable",
+                rate_headers,
+            )
+            return
+
+        try:
+            text = (json.loads(body or b"{}").get("text") or "").strip()
+        except ValueError:
+            text = ""
+        if not text:
+            self._send_problem(
+                "tweets",
+                400,
+                "Invalid Request",
+                "One or more parameters to your request was invalid.",
+            )
+            return
+
+        if not state.register_text(token, text):
+            self._send_problem(
+                "tweets",
+                403,
+                "Forbidden",
+                "You are not allowed to create a Tweet with duplicate content.",
+                rate_headers,
+            )
+            return
+
+        self._send_json(
+            "tweets",
+            201,
+            {"data": {"id": state.next_tweet_id(), "text": text}},
+            rate_headers,
+        )
+
+    def _refresh_token(self, body: bytes) -> None:
+        form = parse_qs(body.decode())
+        if not (self.headers.get("Authorization") or "").startswith("Basic "):
+            self._send_json(
+                "oauth2/token",
+                401,
+                {
+                    "error": "unauthorized_client",
+                    "error_description": "Missing credentials",
+                },
+            )
+            return
+        if form.get("grant_type") != ["refresh_token"] or not form.get("refresh_token"):
+            self._send_json(
+                "oauth2/token",
+                400,
+                {
+                    "error": "invalid_request",
+                    "error_description": "Value passed for the token was invalid.",
+                },
+            )
+            return
+        self._send_json("oauth2/token", 200, self.server.state.issue_tokens())
+
+
+class FakeXHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], state: FakeXState):
+        super().__init__(address, FakeXHandler)
+        self.state = state
+
+
+class FakeXServer:
+    """バックグラウンドのスレッドで動かすスタブサーバー"""
+
+    def __init__(
+        self,
+        config: Optional[FakeXConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            config: 応答の設定（None の場合は既定値）
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート（0 の場合は空いているポート）
+        """
+        self.state = FakeXState(config or FakeXConfig())
+        self._server = FakeXHTTPServer((host, port), self.state)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Config.X_API_BASE_URL に指定するURL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/2"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """エンドポイント・ステータスごとの応答数"""
+        return dict(sorted(self.state.stats.items()))
+
+    def start(self) -> "FakeXServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """現在のスレッドで応答を続ける（コマンドラインから起動した場合）"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeXServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """FakeXConfig の設定をコマンドライン引数に追加"""
+    defaults = FakeXConfig()
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=defaults.latency_ms,
+        help="応答時間の中央値（ミリ秒）",
+    )
+    parser.add_argument(
+        "--latency-sigma",
+        type=float,
+        default=defaults.latency_sigma,
+        help="応答時間の対数正規分布のばらつき（0 で一定）",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=defaults.rate_limit,
+        help="トークンごとの /2/tweets のレート制限（0 で無制限）",
+    )
+    parser.add_argument(
+        "--rate-window",
+        type=float,
+        default=defaults.rate_window_seconds,
+        help="レート制限の期間（秒）",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=defaults.error_rate,
+        help="5xx の連続発生を始める確率",
+    )
+    parser.add_argument(
+        "--error-burst",
+        type=int,
+        default=defaults.error_burst,
+        help="1回の発生で続けて返す 5xx の件数",
+    )
+    parser.add_argument(
+        "--timeout-rate",
+        type=float,
+        default=defaults.timeout_rate,
+        help="応答を止める確率",
+    )
+    parser.add_argument(
+        "--hang-seconds",
+        type=float,
+        default=defaults.hang_seconds,
+        help="応答を止める秒数",
+    )
+
+
+def config_from_args(
+    args: argparse.Namespace, seed: Optional[int] = None
+) -> FakeXConfig:
+    return FakeXConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        rate_limit=args.rate_limit,
+        rate_window_seconds=args.rate_window,
+        error_rate=args.error_rate,
+        error_burst=args.error_burst,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        seed=seed,
+    )
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="ローカルの X API スタブサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8399)
+    parser.add_argument("--seed", type=int, default=None, help="乱数シード")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeXServer(config_from_args(args, args.seed), args.host, args.port)
+    print(f"X API スタブサーバー: {server.base_url}（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,604 @@
+"""
+インメモリ Firestore
+
+FirebaseClient（フロントエンド）と FirestoreClient（Functions）が使う範囲の
+Firestore API をプロセス内の辞書で実装します。Firebase プロジェクトなしで
+データアクセス層を動かし、ベンチマークや動作確認に使うためのものです。
+
+対応している操作:
+    collection / document / add / get / set(merge) / update / delete
+    where(FieldFilter: ==, !=, <, <=, >, >=, in, not-in)、order_by、limit、
+    start_after、select、stream、count 集計、batch、transaction
+    （firestore.transactional と組み合わせて使用）
+
+firestore.SERVER_TIMESTAMP・DELETE_FIELD・Increment を書き込み時に適用します。
+等価条件（== / in）のフィールドは初回のクエリ時にインデックスを作成し、
+以降の書き込みで更新するため、大量のドキュメントでも候補だけを走査します。
+on_snapshot と AsyncClient には対応していません。
+"""
+
+import copy
+import heapq
+import itertools
+import random
+import string
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+
+DESCENDING = "DESCENDING"
+MAX_BATCH_WRITES = 500
+
+_MISSING = object()
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+
+def _auto_id() -> str:
+    return "".join(random.choices(_AUTO_ID_CHARS, k=20))
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Any:
+    """ドット区切りのフィールドパスの値を取得（ない場合は _MISSING）"""
+    value: Any = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply_value(target: Dict[str, Any], key: str, value: Any, now: datetime) -> None:
+    """1フィールドに値・センチネル・Increment を適用"""
+    if value is transforms.DELETE_FIELD:
+        target.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        target[key] = now
+    elif isinstance(value, transforms.Increment):
+        current = target.get(key)
+        if not isinstance(current, (int, float)) or isinstance(current, bool):
+            current = 0
+        target[key] = current + value.value
+    elif isinstance(value, dict):
+        target[key] = _resolve(value, now)
+    else:
+        target[key] = copy.deepcopy(value)
+
+
+def _resolve(data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """set(merge=False) 用に、入れ子の辞書も含めてセンチネルを解決"""
+    resolved: Dict[str, Any] = {}
+    for key, value in data.items():
+        _apply_value(resolved, key, value, now)
+    return resolved
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any], now: datetime) -> None:
+    """set(merge=True) の入れ子のマップをフィールド単位でマージ"""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            child = target.get(key)
+            if not isinstance(child, dict):
+                child = target[key] = {}
+            _merge(child, value, now)
+        else:
+            _apply_value(target, key, value, now)
+
+
+def _update(target: Dict[str, Any], data: Dict[str, Any], now: datetime) -> None:
+    """update() のフィールドパス（ドット区切り）ごとに値を置き換え"""
+    for field_path, value in data.items():
+        *parents, leaf = field_path.split(".")
+        node = target
+        for part in parents:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        _apply_value(node, leaf, value, now)
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    """FieldFilter の条件を評価（型が異なる比較は一致しない）"""
+    if actual is _MISSING:
+        return False
+    if not isinstance(op, str):
+        # None / NaN の等価条件は IS_NULL / IS_NAN の単項演算子になる
+        return actual is None if expected is None else actual != actual
+    try:
+        if op == "==":
+            return actual == expected
+        if op == "!=":
+            return actual is not None and actual != expected
+        if op == "in":
+            return actual in expected
+        if op == "not-in":
+            return actual is not None and actual not in expected
+        if op == "<":
+            return actual < expected
+        if op == "<=":
+            return actual <= expected
+        if op == ">":
+            return actual > expected
+        if op == ">=":
+            return actual >= expected
+    except TypeError:
+        return False
+    raise ValueError(f"未対応の演算子です: {op}")
+
+
+class _Descending:
+    """降順のソートキー"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __gt__(self, other: "_Descending") -> bool:
+        return other.value > self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+class DocumentSnapshot:
+    """ドキュメントのスナップショット"""
+
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class DocumentReference:
+    """ドキュメントへの参照"""
+
+    def __init__(self, client: "MemoryFirestore", collection: str, document_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection}/{self.id}"
+
+    def get(self, field_paths=None, transaction=None) -> DocumentSnapshot:
+        return self._client._snapshot(self)
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._client._commit([("set", self, document_data, merge)])
+
+    def create(self, document_data: Dict[str, Any]) -> None:
+        self._client._commit([("create", self, document_data, False)])
+
+    def update(self, field_updates: Dict[str, Any]) -> None:
+        self._client._commit([("update", self, field_updates, False)])
+
+    def delete(self) -> None:
+        self._client._commit([("delete", self, None, False)])
+
+
+class AggregationResult:
+    """集計結果"""
+
+    def __init__(self, alias: str, value: int):
+        self.alias = alias
+        self.value = value
+
+
+class AggregationQuery:
+    """count 集計クエリ"""
+
+    def __init__(self, query: "Query", alias: str):
+        self._query = query
+        self._alias = alias
+
+    def get(self, transaction=None) -> List[List[AggregationResult]]:
+        with self._query._client._lock:
+            count = sum(1 for _ in self._query._matches())
+        return [[AggregationResult(self._alias, count)]]
+
+
+class Query:
+    """変更のたびに新しいインスタンスを返すクエリ"""
+
+    def __init__(
+        self,
+        client: "MemoryFirestore",
+        collection: str,
+        filters: Tuple = (),
+        orders: Tuple = (),
+        limit: Optional[int] = None,
+        cursor: Optional[DocumentSnapshot] = None,
+        projection: Optional[Tuple[str, ...]] = None,
+    ):
+        self._client = client
+        self._collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes) -> "Query":
+        params = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "cursor": self._cursor,
+            "projection": self._projection,
+        }
+        params.update(changes)
+        return Query(self._client, self._collection, **params)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> "Query":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "Query":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields) -> "Query":
+        if not isinstance(document_fields, DocumentSnapshot):
+            raise TypeError("start_after にはドキュメントのスナップショットを指定してください")
+        return self._copy(cursor=document_fields)
+
+    def select(self, field_paths) -> "Query":
+        return self._copy(projection=tuple(field_paths))
+
+    def count(self, alias: Optional[str] = None) -> AggregationQuery:
+        return AggregationQuery(self, alias or "field_1")
+
+    def _sort_key(self, document_id: str, data: Dict[str, Any]) -> Tuple:
+        key = []
+        for field_path, direction in self._orders:
+            value = document_id if field_path == "__name__" else _get_field(data, field_path)
+            key.append(_Descending(value) if direction == DESCENDING else value)
+        if not any(field_path == "__name__" for field_path, _ in self._orders):
+            key.append(document_id)
+        return tuple(key)
+
+    def _matches(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """条件に一致する (ドキュメントID, データ) を返す（並び順なし）"""
+        documents = self._client._documents(self._collection)
+        candidates = self._client._candidates(self._collection, self._filters)
+        ids = candidates if candidates is not None else documents.keys()
+
+        required = [field_path for field_path, _ in self._orders if field_path != "__name__"]
+        for document_id in ids:
+            data = documents.get(document_id)
+            if data is None:
+                continue
+            if all(
+                _compare(op, _get_field(data, field_path), value)
+                for field_path, op, value in self._filters
+            ) and all(_get_field(data, field_path) is not _MISSING for field_path in required):
+                yield document_id, data
+
+    def _results(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._client._lock:
+            matches = self._matches()
+            if self._cursor is not None:
+                cursor_key = self._sort_key(self._cursor.id, self._cursor._data or {})
+                matches = (
+                    (document_id, data)
+                    for document_id, data in matches
+                    if self._sort_key(document_id, data) > cursor_key
+                )
+
+            def sort_key(item):
+                return self._sort_key(*item)
+
+            if self._limit is not None:
+                results = heapq.nsmallest(self._limit, matches, key=sort_key)
+            else:
+                results = sorted(matches, key=sort_key)
+
+            if self._projection is not None:
+                return [
+                    (document_id, self._project(data)) for document_id, data in results
+                ]
+            return [(document_id, copy.deepcopy(data)) for document_id, data in results]
+
+    def _project(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        projected: Dict[str, Any] = {}
+        for field_path in self._projection:
+            value = _get_field(data, field_path)
+            if value is not _MISSING:
+                _update(projected, {field_path: copy.deepcopy(value)}, datetime.now(timezone.utc))
+        return projected
+
+    def stream(self, transaction=None) -> Iterator[DocumentSnapshot]:
+        for document_id, data in self._results():
+            reference = DocumentReference(self._client, self._collection, document_id)
+            yield DocumentSnapshot(reference, data)
+
+    def get(self, transaction=None) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+    def on_snapshot(self, callback):
+        raise NotImplementedError("インメモリ Firestore は on_snapshot に対応していません")
+
+
+class CollectionReference(Query):
+    """コレクションへの参照"""
+
+    def __init__(self, client: "MemoryFirestore", collection: str):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, document_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, document_id or _auto_id())
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return datetime.now(timezone.utc), reference
+
+    def list_documents(self) -> List[DocumentReference]:
+        with self._client._lock:
+            ids = list(self._client._documents(self._collection))
+        return [DocumentReference(self._client, self._collection, i) for i in ids]
+
+
+class WriteBatch:
+    """コミット時にまとめて適用する書き込み"""
+
+    def __init__(self, client: "MemoryFirestore"):
+        self._client = client
+        self._writes: List[Tuple] = []
+
+    def _add(self, write: Tuple) -> None:
+        if len(self._writes) >= MAX_BATCH_WRITES:
+            raise exceptions.InvalidArgument(
+                f"1回のバッチの書き込みは {MAX_BATCH_WRITES} 件までです"
+            )
+        self._writes.append(write)
+
+    def set(self, reference: DocumentReference, document_data, merge: bool = False):
+        self._add(("set", reference, document_data, merge))
+
+    def create(self, reference: DocumentReference, document_data):
+        self._add(("create", reference, document_data, False))
+
+    def update(self, reference: DocumentReference, field_updates):
+        self._add(("update", reference, field_updates, False))
+
+    def delete(self, reference: DocumentReference):
+        self._add(("delete", reference, None, False))
+
+    def commit(self) -> list:
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+        return []
+
+    def __enter__(self) -> "WriteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+
+
+class Transaction(WriteBatch):
+    """
+    firestore.transactional から呼び出せるトランザクション
+
+    書き込みはコミット時にまとめて適用する。読み取りと書き込みの間は
+    クライアントのロックで他のトランザクションのコミットと直列化する
+    """
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, client: "MemoryFirestore"):
+        super().__init__(client)
+        self._id: Optional[bytes] = None
+        self._ids = itertools.count(1)
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        if self._id is not None:
+            self._client._lock.release()
+        self._id = None
+
+    def _begin(self, retry_id=None) -> None:
+        self._client._lock.acquire()
+        self._id = str(next(self._ids)).encode()
+
+    def _commit(self) -> list:
+        try:
+            return self.commit()
+        finally:
+            self._clean_up()
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, DocumentReference):
+            return ref_or_query.get()
+        return ref_or_query.stream()
+
+
+class MemoryFirestore:
+    """firestore.client() の代わりに使うインメモリのクライアント"""
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # コレクション -> フィールド -> 値 -> ドキュメントID
+        self._indexes: Dict[str, Dict[str, Dict[Any, Set[str]]]] = {}
+        # トランザクション内でのコミットを許すため再入可能なロック
+        self._lock = threading.RLock()
+
+    def collection(self, collection_path: str) -> CollectionReference:
+        return CollectionReference(self, collection_path)
+
+    def document(self, document_path: str) -> DocumentReference:
+        collection, document_id = document_path.rsplit("/", 1)
+        return DocumentReference(self, collection, document_id)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self, **kwargs) -> Transaction:
+        return Transaction(self)
+
+    def collections(self) -> List[CollectionReference]:
+        return [CollectionReference(self, name) for name in self._collections]
+
+    def count(self, collection: str) -> int:
+        """コレクションのドキュメント数"""
+        return len(self._collections.get(collection, {}))
+
+    def _documents(self, collection: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.setdefault(collection, {})
+
+    def _snapshot(self, reference: DocumentReference) -> DocumentSnapshot:
+        with self._lock:
+            data = self._documents(reference._collection).get(reference.id)
+            return DocumentSnapshot(reference, copy.deepcopy(data))
+
+    # --- 等価条件のインデックス ---
+
+    @staticmethod
+    def _index_key(value: Any) -> Any:
+        try:
+            hash(value)
+        except TypeError:
+            return _MISSING
+        # True と 1 は区別し、1 と 1.0 は同じ値として扱う
+        if isinstance(value, bool):
+            return ("bool", value)
+        if isinstance(value, (int, float)):
+            return ("number", value)
+        return (type(value).__name__, value)
+
+    def _field_index(self, collection: str, field_path: str) -> Dict[Any, Set[str]]:
+        indexes = self._indexes.setdefault(collection, {})
+        index = indexes.get(field_path)
+        if index is None:
+            index = indexes[field_path] = {}
+            for document_id, data in self._documents(collection).items():
+                self._index_add(index, field_path, document_id, data)
+        return index
+
+    def _index_add(self, index, field_path: str, document_id: str, data) -> None:
+        key = self._index_key(_get_field(data, field_path))
+        if key is not _MISSING:
+            index.setdefault(key, set()).add(document_id)
+
+    def _index_remove(self, index, field_path: str, document_id: str, data) -> None:
+        key = self._index_key(_get_field(data, field_path))
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(document_id)
+            if not ids:
+                del index[key]
+
+    def _candidates(self, collection: str, filters: Tuple) -> Optional[Set[str]]:
+        """等価条件（== / in）から候補のドキュメントIDを絞り込む（条件がない場合は None）"""
+        best: Optional[Set[str]] = None
+        for field_path, op, value in filters:
+            if op == "==":
+                values = [value]
+            elif op == "in":
+                values = list(value)
+            else:
+                continue
+            keys = [self._index_key(v) for v in values]
+            if any(key is _MISSING for key in keys):
+                continue
+            index = self._field_index(collection, field_path)
+            ids: Set[str] = set()
+            for key in keys:
+                ids |= index.get(key, set())
+            if best is None or len(ids) < len(best):
+                best = ids
+        return best
+
+    # --- 書き込み ---
+
+    def _commit(self, writes: List[Tuple]) -> None:
+        """書き込みをまとめて適用（いずれかが失敗した場合は何も適用しない）"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            staged: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+
+            def current(reference: DocumentReference):
+                key = (reference._collection, reference.id)
+                if key in staged:
+                    return staged[key]
+                return copy.deepcopy(self._documents(reference._collection).get(reference.id))
+
+            for kind, reference, data, merge in writes:
+                document = current(reference)
+                if kind == "create":
+                    if document is not None:
+                        raise exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+                    document = _resolve(data, now)
+                elif kind == "set":
+                    if merge and document is not None:
+                        _merge(document, data, now)
+                    elif merge:
+                        document = {}
+                        _merge(document, data, now)
+                    else:
+                        document = _resolve(data, now)
+                elif kind == "update":
+                    if document is None:
+                        raise exceptions.NotFound(f"No document to update: {reference.path}")
+                    _update(document, data, now)
+                else:
+                    document = None
+                staged[(reference._collection, reference.id)] = document
+
+            for (collection, document_id), document in staged.items():
+                documents = self._documents(collection)
+                previous = documents.get(document_id)
+                for field_path, index in self._indexes.get(collection, {}).items():
+                    if previous is not None:
+                        self._index_remove(index, field_path, document_id, previous)
+                    if document is not None:
+                        self._index_add(index, field_path, document_id, document)
+                if document is None:
+                    documents.pop(document_id, None)
+                else:
+                    documents[document_id] = document
+
+    def load(self, collection: str, documents: Dict[str, Dict[str, Any]]) -> None:
+        """
+        ドキュメントをまとめて投入（ベンチマークのデータ作成用）
+
+        センチネルは解決せず、データをそのまま保存する
+        """
+        with self._lock:
+            target = self._documents(collection)
+            target.update(documents)
+            self._indexes.pop(collection, None)
@@ -6,13 +6,77 @@ X API v2 を使用してツイートの投稿とレート制限管理を行い
 
 import json
 import logging
+import threading
+import time
 from typing import Dict, Any, Optional
 
 import requests
 from requests.exceptions import RequestException, Timeout, ConnectionError
 
+from utils.circuit_breaker import get_circuit_breaker, get_latency_tracker
+from utils.http_transport import get_http_session, get_timeout
+from utils.tweet_text import MAX_TWEET_LENGTH, weighted_length
+
 logger = logging.getLogger(__name__)
 
+# レート制限ヘッダー（エンドポイント単位と、ユーザー単位の24時間上限）
+RATE_LIMIT_HEADERS = {
+    "endpoint": (
+        "x-rate-limit-limit",
+        "x-rate-limit-remaining",
+        "x-rate-limit-reset",
+    ),
+    "user_24hour": (
+        "x-user-limit-24hour-limit",
+        "x-user-limit-24hour-remaining",
+        "x-user-limit-24hour-reset",
+    ),
+}
+
+
+def parse_rate_limit_headers(headers) -> Dict[str, Dict[str, int]]:
+    """
+    レスポンスヘッダーからレート制限情報を抽出
+
+    Args:
+        headers: レスポンスヘッダー（大文字小文字を区別しないマッピング）
+
+    Returns:
+        {"endpoint": {...}, "user_24hour": {...}} 形式の辞書
+        各値は limit, remaining, reset（UNIX時刻）を持つ。ヘッダーがない種別は含まない
+    """
+    rate_limits = {}
+    for scope, (limit_key, remaining_key, reset_key) in RATE_LIMIT_HEADERS.items():
+        if remaining_key not in headers:
+            continue
+        try:
+            rate_limits[scope] = {
+                "limit": int(headers.get(limit_key, 0)),
+                "remaining": int(headers[remaining_key]),
+                "reset": int(headers.get(reset_key, 0)),
+            }
+        except (TypeError, ValueError):
+            continue
+    return rate_limits
+
+
+def get_rate_limit_reset(rate_limits: Dict[str, Dict[str, int]]) -> Optional[int]:
+    """
+    使い切っているレート制限の解除時刻を取得
+
+    Args:
+        rate_limits: parse_rate_limit_headers() の戻り値
+
+    Returns:
+        最も遅い解除時刻（UNIX時刻）。使い切っている制限がない場合は None
+    """
+    resets = [
+        info["reset"]
+        for info in rate_limits.values()
+        if info["remaining"] <= 0 and info["reset"]
+    ]
+    return max(resets) if resets else None
+
 
 class XAPIError(Exception):
     """X API エラーの基底クラス"""
@@ -34,12 +98,24 @@ class AuthenticationError(XAPIError):
     pass
 
 
+class UnauthorizedError(AuthenticationError):
+    """認証エラー（401: アクセストークンが無効または期限切れ）"""
+
+    pass
+
+
 class BadRequestError(XAPIError):
     """リクエストエラー"""
 
     pass
 
 
+class DuplicateContentError(BadRequestError):
+    """重複投稿エラー（403: 直近に同じ内容を投稿済み。認証エラーではない）"""
+
+    pass
+
+
 class ServerError(XAPIError):
     """サーバーエラー"""
 
@@ -52,6 +128,14 @@ class NetworkError(XAPIError):
     pass
 
 
+class CircuitOpenError(ServerError):
+    """サーキットブレーカーが open のため送信しなかったエラー（障害が続いている）"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class XAPIClient:
     """X API v2 投稿クライアント"""
 
@@ -65,67 +149,86 @@ class XAPIClient:
 
         self.access_token = access_token
         self.base_url = "https://api.twitter.com/2"
-        self.session = requests.Session()
-
-        # 共通ヘッダーを設定
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-                "User-Agent": "X-Scheduler-Pro/1.0",
-            }
-        )
-
-    def post_tweet(
-        self, text: str, reply_settings: Optional[str] = None
+        # エンドポイントごとの最新のレート制限情報
+        self.rate_limits: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._rate_limit_lock = threading.Lock()
+        # 障害の検出と応答時間はプロセス内の同じ送信先のクライアントで共有
+        # （応答時間は同じ送信先への冪等な GET の読み取りタイムアウトに使う）
+        self.circuit = get_circuit_breaker(self.base_url)
+        self.latency = get_latency_tracker(self.base_url)
+
+        # プロセス共有の接続プールを利用（セッションは他クライアントと共有）
+        self.session = get_http_session()
+
+        # 共通ヘッダー（共有セッションのためリクエストごとに指定）
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+            "User-Agent": "X-Scheduler-Pro/1.0",
+        }
+
+    @staticmethod
+    def _build_tweet_data(
+        text: str, reply_settings: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        ツイートを投稿
-
-        Args:
-            text: ツイート内容（最大280文字）
-            reply_settings: 返信設定 ("everyone", "mentionedUsers", "following")
-
-        Returns:
-            投稿結果の辞書
+        ツイート内容を検証して POST /tweets のリクエストボディを作成
 
         Raises:
-            BadRequestError: リクエスト形式エラー
-            AuthenticationError: 認証エラー
-            RateLimitError: レート制限エラー
-            ServerError: サーバーエラー
-            NetworkError: ネットワークエラー
+            BadRequestError: ツイート内容が空、または長すぎる
         """
         if not text or not text.strip():
             raise BadRequestError("ツイート内容が空です")
 
-        if len(text) > 280:
-            raise BadRequestError(f"ツイート内容が長すぎます（{len(text)}/280文字）")
+        length = weighted_length(text.strip())
+        if length > MAX_TWEET_LENGTH:
+            raise BadRequestError(
+                f"ツイート内容が長すぎます（{length}/{MAX_TWEET_LENGTH}、全角は2・URLは23として計算）"
+            )
 
         # リクエストボディを作成
         data = {"text": text.strip()}
 
         if reply_settings:
             data["reply_settings"] = reply_settings
+        return data
+
+    def _check_circuit(self) -> None:
+        """サーキットブレーカーが open の場合は送信せずに CircuitOpenError"""
+        retry_after = self.circuit.before_request()
+        if retry_after is not None:
+            raise CircuitOpenError(
+                f"X API の障害が続いているため送信を停止しています（{retry_after:.0f}秒後に再開）",
+                retry_after,
+            )
 
-        try:
-            logger.info(f"ツイート投稿開始: {text[:50]}...")
+    def _record_outcome(self, error: Optional[BaseException]) -> None:
+        """送信結果をサーキットブレーカーに記録"""
+        if isinstance(error, (ServerError, NetworkError)):
+            if self.circuit.record_failure():
+                # 障害の前の応答時間によるタイムアウトで回復後の送信を打ち切らない
+                self.latency.reset()
+        elif error is None or isinstance(error, XAPIError):
+            # 4xx・429 もサーバーが応答しているため正常とみなす
+            self.circuit.record_success()
+        else:
+            self.circuit.release_probe()
 
-            response = self.session.post(
-                f"{self.base_url}/tweets", json=data, timeout=30
-            )
+    def get_rate_limit(self, endpoint: str = "tweets") -> Dict[str, Dict[str, int]]:
+        """
+        エンドポイントの最新のレート制限情報を取得
 
-            return self._handle_response(response, "ツイート投稿")
+        Args:
+            endpoint: エンドポイント名（例: "tweets"）
 
-        except Timeout:
-            raise NetworkError("リクエストがタイムアウトしました")
-        except ConnectionError:
-            raise NetworkError("ネットワーク接続エラーが発生しました")
-        except RequestException as e:
-            raise NetworkError(f"ネットワークエラー: {str(e)}")
+        Returns:
+            parse_rate_limit_headers() 形式の辞書（未取得の場合は空）
+        """
+        with self._rate_limit_lock:
+            return dict(self.rate_limits.get(endpoint, {}))
 
     def _handle_response(
-        self, response: requests.Response, operation: str
+        self, response: requests.Response, operation: str, endpoint: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         APIレスポンスを処理
@@ -133,17 +236,26 @@ class XAPIClient:
         Args:
             response: requests.Response オブジェクト
             operation: 操作名（ログ用）
+            endpoint: レート制限情報を記録するエンドポイント名
 
         Returns:
             レスポンスデータ
 
         Raises:
             BadRequestError: 400エラー
-            AuthenticationError: 401エラー
+            UnauthorizedError: 401エラー
+            DuplicateContentError: 403エラー（重複した内容）
+            AuthenticationError: 403エラー（その他）
             RateLimitError: 429エラー
             ServerError: 500エラー
             XAPIError: その他のエラー
         """
+        # レート制限ヘッダーを記録
+        rate_limits = parse_rate_limit_headers(response.headers)
+        if endpoint and rate_limits:
+            with self._rate_limit_lock:
+                self.rate_limits[endpoint] = rate_limits
+
         # ステータスコードによる処理分岐
         if response.status_code == 200 or response.status_code == 201:
             # 成功
@@ -165,11 +277,15 @@ class XAPIClient:
             # Unauthorized
             error_info = self._extract_error_info(response)
             logger.error(f"{operation}失敗 - Unauthorized: {error_info}")
-            raise AuthenticationError(error_info)
+            raise UnauthorizedError(error_info)
 
         elif response.status_code == 403:
             # Forbidden
             error_info = self._extract_error_info(response)
+            if "duplicate" in error_info.lower():
+                # 同じ内容の投稿の拒否も 403 で返る
+                logger.error(f"{operation}失敗 - Duplicate Content: {error_info}")
+                raise DuplicateContentError(f"同じ内容が投稿済みです: {error_info}")
             logger.error(f"{operation}失敗 - Forbidden: {error_info}")
             raise AuthenticationError(f"アクセス権限がありません: {error_info}")
 
@@ -183,7 +299,10 @@ class XAPIClient:
             # Too Many Requests
             error_info = self._extract_error_info(response)
             logger.error(f"{operation}失敗 - Rate Limited: {error_info}")
-            raise RateLimitError(error_info, None)
+            reset_time = get_rate_limit_reset(rate_limits) or rate_limits.get(
+                "endpoint", {}
+            ).get("reset")
+            raise RateLimitError(error_info, reset_time)
 
         elif 500 <= response.status_code < 600:
             # Server Error
@@ -234,10 +353,75 @@ class XAPIClient:
         except (json.JSONDecodeError, TypeError):
             return f"HTTP {response.status_code}: {response.reason}"
 
+    def post_tweet(
+        self, text: str, reply_settings: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        ツイートを投稿
+
+        Args:
+            text: ツイート内容（X の数え方で最大280、tweet_text.weighted_length）
+            reply_settings: 返信設定 ("everyone", "mentionedUsers", "following")
+
+        Returns:
+            投稿結果の辞書
+
+        Raises:
+            BadRequestError: リクエスト形式エラー
+            AuthenticationError: 認証エラー
+            RateLimitError: レート制限エラー
+            ServerError: サーバーエラー
+            CircuitOpenError: 障害が続いているため送信しなかった
+            NetworkError: ネットワークエラー
+        """
+        data = self._build_tweet_data(text, reply_settings)
+
+        self._check_circuit()
+        try:
+            result = self._send_tweet(data)
+        except BaseException as e:
+            self._record_outcome(e)
+            raise
+        self._record_outcome(None)
+        return result
+
+    def _send_tweet(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST /tweets を送信
+
+        POST は冪等ではなく、読み取りタイムアウト後にサーバー側で投稿済みになっている
+        ことがあるため、応答時間から決めるタイムアウトは使わず HTTP_READ_TIMEOUT で待つ
+        （応答時間は GET の読み取りタイムアウトのために記録する）
+        """
+        connect_timeout, read_timeout = get_timeout()
+        start = time.monotonic()
+        try:
+            logger.info(f"ツイート投稿開始: {data['text'][:50]}...")
+
+            response = self.session.post(
+                f"{self.base_url}/tweets",
+                json=data,
+                headers=self.headers,
+                timeout=(connect_timeout, read_timeout),
+            )
+            self.latency.record(time.monotonic() - start)
+
+            return self._handle_response(response, "ツイート投稿", "tweets")
+
+        except Timeout:
+            raise NetworkError("リクエストがタイムアウトしました")
+        except ConnectionError:
+            raise NetworkError("ネットワーク接続エラーが発生しました")
+        except RequestException as e:
+            raise NetworkError(f"ネットワークエラー: {str(e)}")
+
     def close(self):
-        """セッションをクローズ"""
-        if hasattr(self, "session"):
-            self.session.close()
+        """
+        クライアントを解放
+
+        セッションはプロセス全体で共有しているためクローズせず、
+        接続はプールに残して後続のリクエストで再利用する
+        """
 
     def __enter__(self):
         """コンテキストマネージャーの開始"""
@@ -246,3 +430,4 @@ class XAPIClient:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """コンテキストマネージャーの終了"""
         self.close()
+
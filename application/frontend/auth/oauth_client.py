@@ -6,13 +6,16 @@ X API への認証を行います。
 """
 
 import base64
+import time
 import requests
 from typing import Optional, Dict, Any, Tuple
 from urllib.parse import urlencode, parse_qs, urlparse
 from datetime import datetime, timedelta
 
 from .pkce_utils import PKCEUtils
+from utils.circuit_breaker import get_latency_tracker
 from utils.config import Config
+from utils.http_transport import get_http_session, get_timeout
 
 
 class AuthenticationError(Exception):
@@ -112,8 +115,8 @@ class XOAuthClient:
         }
 
         try:
-            response = requests.post(
-                Config.X_TOKEN_URL, data=data, headers=headers, timeout=30
+            response = get_http_session().post(
+                Config.X_TOKEN_URL, data=data, headers=headers, timeout=get_timeout()
             )
 
             if response.status_code == 200:
@@ -155,8 +158,16 @@ class XOAuthClient:
             "Content-Type": "application/json",
         }
 
+        # 冪等な GET のため、読み取りタイムアウトは直近の応答時間から決める
+        latency = get_latency_tracker(Config.X_USER_INFO_URL)
+        start = time.monotonic()
         try:
-            response = requests.get(Config.X_USER_INFO_URL, headers=headers, timeout=30)
+            response = get_http_session().get(
+                Config.X_USER_INFO_URL,
+                headers=headers,
+                timeout=get_timeout(latency.read_timeout()),
+            )
+            latency.record(time.monotonic() - start)
 
             if response.status_code == 200:
                 return response.json()
@@ -201,8 +212,8 @@ class XOAuthClient:
         }
 
         try:
-            response = requests.post(
-                Config.X_TOKEN_URL, data=data, headers=headers, timeout=30
+            response = get_http_session().post(
+                Config.X_TOKEN_URL, data=data, headers=headers, timeout=get_timeout()
             )
 
             if response.status_code == 200:
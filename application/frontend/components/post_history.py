@@ -5,7 +5,7 @@ Firestoreから投稿履歴を取得して表示する機能
 """
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Dict, List
 
 import streamlit as st
 
@@ -25,6 +25,14 @@ def show_post_history():
     with tab3:
         show_post_search(firebase_client)
 
+    # 開発時は読み取りキャッシュの効果を表示
+    if get_config().is_development():
+        stats = firebase_client.cache_stats()
+        st.caption(
+            f"🗄️ 読み取りキャッシュ: ヒット {stats['hits']} / ミス {stats['misses']} "
+            f"（ヒット率 {stats['hit_rate']:.0%}、{stats['size']}/{stats['maxsize']}件）"
+        )
+
 
 def get_firebase_client():
     """ファイアベースクライアントを取得"""
@@ -56,29 +64,110 @@ def get_config():
     return Config
 
 
-def show_recent_posts(firebase_client):
-    """最近の投稿を表示"""
-    st.subheader("📝 最近の投稿（10件）")
+def get_posts_for_date(firebase_client, date_str: str) -> List:
+    """
+    特定日の投稿を取得
+
+    リアルタイムリスナーで同期済みの日付（今日以降）はプロセス内のインデックスから、
+    それ以外は Firestore から取得する
+    """
+    Config = get_config()
+    if Config.POST_INDEX_ENABLED:
+        try:
+            from db.post_index import get_post_index
+
+            posts = get_post_index().get_posts_by_date(date_str)
+            if posts is not None:
+                return posts
+        except Exception as e:
+            print(f"投稿インデックス取得エラー: {e}")
+    return firebase_client.get_posts_by_date(date_str)
+
+
+def show_recent_posts(firebase_client, page_size: int = 10):
+    """最近の投稿をページ単位で表示（古い投稿は次のページで取得）"""
+    st.subheader(f"📝 最近の投稿（{page_size}件ずつ）")
 
     # タブコンテキストを設定
     st.session_state.current_tab_context = "recent"
 
+    # 表示中のページの開始カーソル（各ページの直前の投稿ID）のスタック
+    if "recent_page_cursors" not in st.session_state:
+        reset_recent_pages()
+
     col1, col2 = st.columns([1, 1])
     with col1:
         show_posted_only = st.checkbox("投稿済みのみ", value=True)
     with col2:
         if st.button("🔄 更新", key="refresh_recent"):
+            # Functions による更新も反映するためキャッシュを破棄
+            firebase_client.clear_cache()
+            reset_recent_pages()
             st.rerun()
 
-    recent_posts = firebase_client.get_recent_posts(10, show_posted_only)
+    # 絞り込み条件が変わったら最初のページに戻す
+    if st.session_state.get("recent_posted_only") != show_posted_only:
+        st.session_state.recent_posted_only = show_posted_only
+        reset_recent_pages()
+
+    cursors = st.session_state.recent_page_cursors
+    page_post_ids = st.session_state.recent_page_post_ids
+    recent_posts = firebase_client.get_recent_posts(
+        page_size, show_posted_only, start_after=cursors[-1]
+    )
 
-    if not recent_posts:
+    if not recent_posts and len(cursors) == 1:
         st.info("投稿履歴がありません")
         return
 
     for post in recent_posts:
         display_post_card(post)
 
+    # ページ送り
+    col_prev, col_page, col_next = st.columns([1, 1, 1])
+    with col_prev:
+        if len(cursors) > 1 and st.button("← 新しい投稿", key="recent_prev_page"):
+            cursors.pop()
+            page_post_ids.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"ページ {len(cursors)}")
+    with col_next:
+        # ページが埋まっている場合のみ続きがある可能性がある
+        if len(recent_posts) == page_size and st.button(
+            "古い投稿 →", key="recent_next_page"
+        ):
+            cursors.append(recent_posts[-1].id)
+            page_post_ids.append([post.id for post in recent_posts])
+            st.rerun()
+
+
+def reset_recent_pages():
+    """最近の投稿のページ送りを最初のページに戻す"""
+    st.session_state.recent_page_cursors = [None]
+    # recent_page_post_ids[i] は recent_page_cursors[i + 1] で終わるページの投稿ID
+    st.session_state.recent_page_post_ids = []
+
+
+def replace_deleted_cursor(post_id: str):
+    """
+    削除した投稿がページのカーソルであれば、そのページに残った最後の投稿IDに置き換える
+
+    カーソルのドキュメントが無くなるとページの続きを特定できないため、
+    ページに投稿が残っていない場合は直前のページのカーソルを使う
+    """
+    cursors = st.session_state.get("recent_page_cursors")
+    page_post_ids = st.session_state.get("recent_page_post_ids")
+    if not cursors or page_post_ids is None:
+        return
+
+    for index, ids in enumerate(page_post_ids):
+        if post_id not in ids:
+            continue
+        ids.remove(post_id)
+        if cursors[index + 1] == post_id:
+            cursors[index + 1] = ids[-1] if ids else cursors[index]
+
 
 def show_today_posts(firebase_client):
     """今日の投稿を表示"""
@@ -87,7 +176,7 @@ def show_today_posts(firebase_client):
     # タブコンテキストを設定
     st.session_state.current_tab_context = "today"
 
-    today = datetime.now().strftime("%Y/%m/%d")
+    today = datetime.now(get_config().SCHEDULE_TIMEZONE).strftime("%Y/%m/%d")
     col1, col2 = st.columns([2, 1])
 
     with col1:
@@ -95,28 +184,32 @@ def show_today_posts(firebase_client):
 
     with col2:
         if st.button("🔄 更新", key="refresh_today"):
+            # Functions による更新も反映するためキャッシュを破棄
+            firebase_client.clear_cache()
             st.rerun()
 
-    # 今日の投稿を取得
-    all_posts = firebase_client.get_posts_by_date(today)
-    posted_posts = firebase_client.get_posts_by_date(today, is_posted=True)
-    pending_posts = firebase_client.get_posts_by_date(today, is_posted=False)
+    Config = get_config()
 
-    # 統計情報
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("📊 合計投稿", len(all_posts))
-    with col2:
-        st.metric("✅ 投稿済み", len(posted_posts))
-    with col3:
-        st.metric("⏳ 予約中", len(pending_posts))
+    # リアルタイムリスナーが有効な場合は、Firestore を読まずに定期的に再描画
+    run_every = Config.POST_INDEX_REFRESH_SECONDS if Config.POST_INDEX_ENABLED else None
 
-    # 投稿一覧
-    if all_posts:
-        for post in all_posts:
-            display_post_card(post)
-    else:
-        st.info("今日の投稿はありません")
+    @st.fragment(run_every=run_every)
+    def show_today_list():
+        # 今日の投稿を1回で取得し、統計はメモリ上で集計
+        all_posts = get_posts_for_date(firebase_client, today)
+        summary = firebase_client.summarize_posts(all_posts)
+
+        # 統計情報
+        show_summary_metrics(summary)
+
+        # 投稿一覧
+        if all_posts:
+            for post in all_posts:
+                display_post_card(post)
+        else:
+            st.info("今日の投稿はありません")
+
+    show_today_list()
 
 
 def show_post_search(firebase_client):
@@ -126,11 +219,10 @@ def show_post_search(firebase_client):
     # タブコンテキストを設定
     st.session_state.current_tab_context = "search"
 
+    today = datetime.now(get_config().SCHEDULE_TIMEZONE).date()
     col1, col2 = st.columns(2)
     with col1:
-        search_date = st.date_input(
-            "検索日付", value=datetime.now().date(), max_value=datetime.now().date()
-        )
+        search_date = st.date_input("検索日付", value=today, max_value=today)
 
     with col2:
         status_filter = st.selectbox("投稿状態", ["すべて", "投稿済み", "未投稿"])
@@ -138,12 +230,16 @@ def show_post_search(firebase_client):
     if st.button("🔍 検索"):
         date_str = search_date.strftime("%Y/%m/%d")
 
+        # 対象日の投稿を1回で取得し、状態はメモリ上で絞り込む
+        all_posts = get_posts_for_date(firebase_client, date_str)
         if status_filter == "すべて":
-            posts = firebase_client.get_posts_by_date(date_str)
+            posts = all_posts
         elif status_filter == "投稿済み":
-            posts = firebase_client.get_posts_by_date(date_str, is_posted=True)
+            posts = [p for p in all_posts if p.is_posted]
         else:  # 未投稿
-            posts = firebase_client.get_posts_by_date(date_str, is_posted=False)
+            posts = [p for p in all_posts if not p.is_posted]
+
+        show_summary_metrics(firebase_client.summarize_posts(all_posts))
 
         if posts:
             st.success(f"📊 {len(posts)}件の投稿が見つかりました")
@@ -153,12 +249,42 @@ def show_post_search(firebase_client):
             st.info("該当する投稿がありません")
 
 
-def display_post_card(post: Dict[str, Any]):
-    """投稿カードを表示"""
+def show_summary_metrics(summary: Dict[str, Any]):
+    """投稿件数の集計（合計・投稿済み・予約中・スロット別）を表示"""
+    Config = get_config()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📊 合計投稿", summary["total"])
+    with col2:
+        st.metric("✅ 投稿済み", summary["posted"])
+    with col3:
+        st.metric("⏳ 予約中", summary["pending"])
+
+    # 時間スロット別の件数（任意時刻・即時投稿はまとめて表示）
+    by_slot = summary["by_slot"]
+    slot_counts = [
+        f"{Config.get_time_slot_label(slot)}: {by_slot[slot]}件"
+        for slot in sorted(slot for slot in by_slot if slot is not None)
+    ]
+    other_count = by_slot.get(None, 0)
+    if other_count:
+        slot_counts.append(f"その他: {other_count}件")
+    if slot_counts:
+        st.caption(" / ".join(slot_counts))
+
+
+def format_timestamp(value) -> str:
+    """UTC のタイムスタンプを JST の表示用文字列に変換"""
+    return value.astimezone(get_config().SCHEDULE_TIMEZONE).strftime("%Y/%m/%d %H:%M:%S")
+
+
+def display_post_card(post):
+    """投稿カード（Post レコード）を表示"""
     Config = get_config()
 
     # ステータスに応じたスタイル
-    if post.get("isPosted"):
+    if post.is_posted:
         status_emoji = "✅"
     else:
         status_emoji = "⏳"
@@ -167,22 +293,26 @@ def display_post_card(post: Dict[str, Any]):
     col1, col2, col3 = st.columns([1, 2, 1])
 
     with col1:
-        st.write(f"**{status_emoji} {post.get('postDate', '不明')}**")
+        st.write(f"**{status_emoji} {post.post_date or '不明'}**")
 
     with col2:
-        if post.get("timeSlot") is not None:
-            time_label = Config.get_time_slot_label(post["timeSlot"])
+        if post.time_slot is not None:
+            time_label = Config.get_time_slot_label(post.time_slot)
             st.write(f"⏰ {time_label}")
+        elif post.scheduled_at:
+            # 任意の時刻で予約された投稿（JSTで表示）
+            scheduled_at = post.scheduled_at.astimezone(Config.SCHEDULE_TIMEZONE)
+            st.write(f"⏰ {scheduled_at.strftime('%H:%M')}")
         else:
             st.write("📱 即時投稿")
 
     with col3:
         # 削除ボタン（タブごとに一意のキーを生成）
         tab_context = st.session_state.get("current_tab_context", "main")
-        delete_key = f"delete_{tab_context}_{post['id']}"
+        delete_key = f"delete_{tab_context}_{post.id}"
 
         # 削除確認状態を管理
-        confirm_key = f"confirm_delete_{tab_context}_{post['id']}"
+        confirm_key = f"confirm_delete_{tab_context}_{post.id}"
 
         # 削除確認が求められているかチェック
         if st.session_state.get(confirm_key, False):
@@ -191,7 +321,8 @@ def display_post_card(post: Dict[str, Any]):
             with col_yes:
                 if st.button("✅ はい", key=f"yes_{confirm_key}"):
                     # 削除実行
-                    if execute_delete(post["id"]):
+                    if execute_delete(post):
+                        replace_deleted_cursor(post.id)
                         st.success("投稿を削除しました")
                     else:
                         st.error("削除に失敗しました")
@@ -208,7 +339,7 @@ def display_post_card(post: Dict[str, Any]):
                 st.rerun()
 
     # 投稿内容（改行保持）
-    content = post.get("content", "")
+    content = post.content
     if len(content) > 200:
         content = content[:200] + "..."
 
@@ -217,30 +348,23 @@ def display_post_card(post: Dict[str, Any]):
     st.text(content)
 
     # 詳細情報
-    if post.get("isPosted"):
-        if post.get("xPostId"):
-            st.write(f"🔗 ツイートID: `{post['xPostId']}`")
-        if post.get("postedAt"):
-            # Firestoreのタイムスタンプを処理
-            posted_time = post["postedAt"]
-            if hasattr(posted_time, "seconds"):
-                posted_time = datetime.fromtimestamp(posted_time.seconds)
-            st.write(f"📅 投稿時刻: {posted_time}")
+    if post.is_posted:
+        if post.x_post_id:
+            st.write(f"🔗 ツイートID: `{post.x_post_id}`")
+        if post.posted_at:
+            st.write(f"📅 投稿時刻: {format_timestamp(post.posted_at)}")
     else:
-        if post.get("errorMessage"):
-            st.error(f"❌ エラー: {post['errorMessage']}")
+        if post.error_message:
+            st.error(f"❌ エラー: {post.error_message}")
 
     # 作成時刻
-    if post.get("createdAt"):
-        created_time = post["createdAt"]
-        if hasattr(created_time, "seconds"):
-            created_time = datetime.fromtimestamp(created_time.seconds)
-        st.caption(f"作成日時: {created_time}")
+    if post.created_at:
+        st.caption(f"作成日時: {format_timestamp(post.created_at)}")
 
     st.divider()
 
 
-def execute_delete(post_id: str) -> bool:
-    """投稿削除を実行"""
+def execute_delete(post) -> bool:
+    """投稿削除を実行（アーカイブに移された投稿はアーカイブから取り除く）"""
     firebase_client = get_firebase_client()
-    return firebase_client.delete_post(post_id)
+    return firebase_client.delete_post(post.id, post)
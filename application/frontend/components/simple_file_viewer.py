@@ -13,6 +13,7 @@ from typing import Optional
 
 from utils.file_utils import get_file_manager
 from utils.markdown_utils import get_markdown_processor
+from utils.tweet_text import MAX_TWEET_LENGTH, weighted_length
 
 
 def show_simple_file_viewer() -> Optional[str]:
@@ -142,6 +143,8 @@ def show_post_interface(content: str, filename: str):
     """投稿インターフェースの表示"""
     from datetime import datetime, timedelta
 
+    from utils.config import Config
+
     st.header("📤 投稿作成")
 
     # 投稿用のテキストボックス（session_stateでテキストを管理）
@@ -164,17 +167,18 @@ def show_post_interface(content: str, filename: str):
         "投稿テキスト",
         value=st.session_state[text_key],
         height=200,
-        help="編集可能です。文字数制限: 280文字",
+        help="編集可能です。文字数制限: 280（全角は2、URLは23として計算）",
         placeholder="ここに投稿内容を入力してください...",
         key=text_key,
     )
 
     # 文字数表示
-    char_count = len(post_text)
-    if char_count > 280:
-        st.error(f"⚠️ 文字数制限超過: {char_count}/280文字")
+    # X の数え方（全角は2、URL は23）で数え、送信前に上限超過を検出する
+    char_count = weighted_length(post_text.strip())
+    if char_count > MAX_TWEET_LENGTH:
+        st.error(f"⚠️ 文字数制限超過: {char_count}/{MAX_TWEET_LENGTH}")
     else:
-        st.success(f"✅ 文字数OK: {char_count}/280文字")
+        st.success(f"✅ 文字数OK: {char_count}/{MAX_TWEET_LENGTH}")
 
     st.markdown("---")
 
@@ -184,11 +188,12 @@ def show_post_interface(content: str, filename: str):
     if post_type == "予約投稿":
         st.subheader("📅 予約設定")
 
-        # 日付指定
+        # 日付指定（サーバーのローカル時刻ではなく JST の日付）
+        today = datetime.now(Config.SCHEDULE_TIMEZONE).date()
         scheduled_date = st.date_input(
             "投稿日",
-            value=datetime.now().date() + timedelta(days=1),
-            min_value=datetime.now().date(),
+            value=today + timedelta(days=1),
+            min_value=today,
         )
 
         # 投稿時刻選択（ボタン形式）
@@ -207,6 +212,10 @@ def show_post_interface(content: str, filename: str):
         # 2列でボタンを配置
         col1, col2 = st.columns(2)
 
+        # プリセット時刻に一致しない選択は「時刻指定」とみなす
+        preset_times = [time_option["time"] for time_option in time_options]
+        is_custom = selected_time is not None and selected_time not in preset_times
+
         for i, time_option in enumerate(time_options):
             col = col1 if i % 2 == 0 else col2
 
@@ -223,12 +232,36 @@ def show_post_interface(content: str, filename: str):
                     st.session_state.selected_post_time = time_option["time"]
                     st.rerun()
 
+        # プリセット以外の任意の時刻（JST）
+        if st.button(
+            "🕰️ 時刻を指定",
+            key="time_btn_custom",
+            use_container_width=True,
+            type="primary" if is_custom else "secondary",
+        ):
+            st.session_state.selected_post_time = (
+                selected_time
+                if is_custom
+                else datetime.now(Config.SCHEDULE_TIMEZONE).strftime("%H:%M")
+            )
+            st.rerun()
+
+        if is_custom:
+            custom_time = st.time_input(
+                "投稿時刻（JST）",
+                value=datetime.strptime(selected_time, "%H:%M").time(),
+                step=timedelta(minutes=5),
+                key="custom_post_time",
+            )
+            selected_time = custom_time.strftime("%H:%M")
+            st.session_state.selected_post_time = selected_time
+
     st.markdown("---")
 
     # 投稿ボタン
     button_text = "📤 投稿する" if post_type == "即時投稿" else "⏰ 予約投稿する"
     button_disabled = (
-        char_count > 280
+        char_count > MAX_TWEET_LENGTH
         or char_count == 0
         or (post_type == "予約投稿" and not selected_time)
     )
@@ -253,6 +286,47 @@ def show_post_interface(content: str, filename: str):
             st.rerun()
 
 
+def check_post_quota(firebase_client, owner_id, scheduled_at=None):
+    """
+    投稿数の上限を確認
+
+    即時投稿は今日・今月の投稿済み件数、予約投稿は予約日・その月の
+    投稿済み件数と予約中件数の合計で判定する
+
+    Returns:
+        上限に達している場合はエラーメッセージ、投稿できる場合は None
+    """
+    from db.post_counters import quota_day, quota_reset_at
+    from utils.config import Config
+
+    if scheduled_at is None:
+        quota = firebase_client.get_post_quota(owner_id)
+        daily_used = quota["daily_posted"]
+        monthly_used = quota["monthly_posted"]
+        day_label = "今日"
+        # 即時投稿は上限が戻る日時（JST）を案内する
+        reset_at = quota_reset_at(quota).astimezone(Config.SCHEDULE_TIMEZONE)
+        reset_hint = f"（{reset_at.strftime('%Y/%m/%d %H:%M')} 以降に投稿できます）"
+    else:
+        quota = firebase_client.get_post_quota(owner_id, quota_day(scheduled_at))
+        daily_used = quota["daily_posted"] + quota["daily_scheduled"]
+        monthly_used = quota["monthly_posted"] + quota["monthly_scheduled"]
+        day_label = "予約日"
+        reset_hint = ""
+
+    if daily_used >= quota["daily_limit"]:
+        return (
+            f"{day_label}の投稿数が1日の上限（{quota['daily_limit']}件）に達しています"
+            + reset_hint
+        )
+    if monthly_used >= quota["monthly_limit"]:
+        return (
+            f"投稿数が1か月の上限（{quota['monthly_limit']}件）に達しています"
+            + reset_hint
+        )
+    return None
+
+
 def execute_post_action(
     post_type: str, text: str, filename: str, scheduled_date=None, selected_time=None
 ):
@@ -265,8 +339,11 @@ def execute_post_action(
         st.error("❌ アクセストークンが無効です")
         return False
 
-    from db.firebase_client import get_firebase_client
-    from api.x_api_client import XAPIClient
+    from datetime import datetime
+
+    from db.firebase_client import DuplicatePostError, get_firebase_client
+    from api.x_api_client import XAPIClient, RateLimitError
+    from utils.config import Config
 
     firebase_client = get_firebase_client()
     access_token = st.session_state.access_token
@@ -274,14 +351,36 @@ def execute_post_action(
     # Step 1: 投稿データをFirestoreに作成
     post_date = None
     time_slot = None
+    scheduled_at = None
 
     if post_type == "予約投稿":
         post_date = scheduled_date.strftime("%Y/%m/%d") if scheduled_date else None
-        # 時間から時間スロットを取得
-        time_mapping = {"09:00": 0, "12:00": 1, "15:00": 2, "21:00": 3}
-        time_slot = time_mapping.get(selected_time)
+        # プリセット時刻の場合は時間スロットも記録（任意の時刻は None）
+        time_slot = Config.get_time_slot_by_time(selected_time)
+        if scheduled_date and selected_time:
+            scheduled_at = Config.to_scheduled_at(scheduled_date, selected_time)
+
+    # 1日・1か月の上限を投稿数カウンター（1回の読み取り）で確認
+    owner_id = st.session_state.get("owner_id")
+    quota_error = check_post_quota(firebase_client, owner_id, scheduled_at)
+    if quota_error:
+        st.error(f"❌ {quota_error}")
+        return False
 
-    post_id = firebase_client.create_post(text, post_date, time_slot)
+    # X は直近と同じ内容の投稿を拒否するため、作成時の確認で検出する
+    try:
+        post_id = firebase_client.create_post(
+            text,
+            post_date,
+            time_slot,
+            scheduled_at,
+            owner_id=owner_id,
+        )
+    except DuplicatePostError as e:
+        st.error(
+            f"❌ 同じ内容の投稿が投稿済みまたは予約中です（投稿ID: {e.duplicate_of}）"
+        )
+        return False
     if not post_id:
         st.error("❌ Firestoreへの投稿データ保存に失敗しました")
         return False
@@ -297,7 +396,9 @@ def execute_post_action(
             if result:
                 tweet_id = result.get("data", {}).get("id")
                 # Step 2: 投稿成功時にFirestoreを更新
-                firebase_client.update_post_status(post_id, True, tweet_id)
+                firebase_client.update_post_status(
+                    post_id, True, tweet_id, owner_id=owner_id, content=text
+                )
 
                 st.success("✅ 投稿が完了しました！")
                 if tweet_id:
@@ -312,6 +413,17 @@ def execute_post_action(
                 st.error("❌ 投稿に失敗しました")
                 return False
 
+        except RateLimitError as e:
+            # レート制限の解除時刻がわかる場合は表示
+            firebase_client.update_post_status(post_id, False, error_message=str(e))
+            st.error(f"❌ レート制限に達しました: {str(e)}")
+            if e.reset_time:
+                reset_at = datetime.fromtimestamp(
+                    e.reset_time, Config.SCHEDULE_TIMEZONE
+                )
+                st.info(f"⏳ 解除予定時刻: {reset_at.strftime('%Y/%m/%d %H:%M')}")
+            return False
+
         except Exception as e:
             # Step 2: エラー時にFirestoreを更新
             firebase_client.update_post_status(post_id, False, error_message=str(e))
@@ -0,0 +1,179 @@
+"""
+非同期 Firestore リポジトリ
+
+Firestore の AsyncClient を使い、投稿・トークン・投稿数カウンターの読み取りを
+非同期で提供します。独立したクエリを asyncio.gather で同時に発行できるため、
+複数のクエリを使う画面の読み込み時間は最も遅いクエリ1本分で済みます。
+同期コードからは SyncRepositoryAdapter 経由で呼び出します。
+"""
+
+import asyncio
+import functools
+import threading
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from firebase_admin import firestore, firestore_async
+from google.cloud.firestore_v1 import FieldFilter
+
+from utils.config import Config
+from db.post_counters import COUNTERS_COLLECTION, counter_doc_id, quota_day, summarize_quota
+from db.post_model import Post
+
+
+class AsyncFirestoreRepository:
+    """AsyncClient による Firestore の読み取り操作"""
+
+    def __init__(self, db=None, decrypt: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            db: 非同期 Firestore クライアント（None の場合は firestore_async.client()）
+            decrypt: 保存されたトークンの復号関数（None の場合はトークンを返さない）
+        """
+        self._db = db if db is not None else firestore_async.client()
+        self._decrypt = decrypt
+
+    @staticmethod
+    async def _fetch_posts(query) -> List[Post]:
+        """クエリ結果を投稿レコードのリストに変換"""
+        return [Post.from_snapshot(doc) async for doc in query.stream()]
+
+    async def _paginate(self, query, limit: Optional[int], start_after: Optional[str]):
+        """クエリにカーソル（前のページの最後の投稿ID）と件数上限を適用"""
+        if start_after:
+            cursor = await self._db.collection("posts").document(start_after).get()
+            if cursor.exists:
+                query = query.start_after(cursor)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    async def get_user_tokens(self, user_id: str = "main_user") -> Dict[str, Any]:
+        """ユーザーのアクセストークンとリフレッシュトークンを取得して復号化"""
+        doc = await self._db.collection("users").document(user_id).get()
+        result = {"access_token": None, "refresh_token": None, "expires_at": None}
+        if not doc.exists:
+            return result
+
+        data = doc.to_dict()
+        result["expires_at"] = data.get("expiresAt")
+        if self._decrypt is not None:
+            if "accessToken" in data:
+                result["access_token"] = self._decrypt(data["accessToken"])
+            if "refreshToken" in data:
+                result["refresh_token"] = self._decrypt(data["refreshToken"])
+        return result
+
+    async def get_posts_by_date(
+        self,
+        date_str: str,
+        is_posted: Optional[bool] = None,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+    ) -> List[Post]:
+        """特定日の投稿を取得"""
+        query = self._db.collection("posts").where(
+            filter=FieldFilter("postDate", "==", date_str)
+        )
+        if is_posted is not None:
+            query = query.where(filter=FieldFilter("isPosted", "==", is_posted))
+        if limit is not None or start_after:
+            query = await self._paginate(query.order_by("__name__"), limit, start_after)
+        return await self._fetch_posts(query)
+
+    async def get_scheduled_posts(self, date_str: str, time_slot: int) -> List[Post]:
+        """特定日時の未投稿の予約投稿を取得"""
+        query = (
+            self._db.collection("posts")
+            .where(filter=FieldFilter("postDate", "==", date_str))
+            .where(filter=FieldFilter("timeSlot", "==", time_slot))
+            .where(filter=FieldFilter("isPosted", "==", False))
+        )
+        return await self._fetch_posts(query)
+
+    async def get_recent_posts(
+        self,
+        limit: int = 10,
+        posted_only: bool = True,
+        start_after: Optional[str] = None,
+    ) -> List[Post]:
+        """最近の投稿を新しい順に取得"""
+        query = self._db.collection("posts")
+        if posted_only:
+            query = query.where(filter=FieldFilter("isPosted", "==", True))
+            query = query.order_by("postedAt", direction=firestore.Query.DESCENDING)
+        else:
+            query = query.order_by("createdAt", direction=firestore.Query.DESCENDING)
+        return await self._fetch_posts(await self._paginate(query, limit, start_after))
+
+    async def get_upcoming_posts(self, since_date: str, limit: int = 50) -> List[Post]:
+        """指定日以降の未投稿の予約投稿を予約日順に取得"""
+        query = (
+            self._db.collection("posts")
+            .where(filter=FieldFilter("isPosted", "==", False))
+            .where(filter=FieldFilter("postDate", ">=", since_date))
+            .order_by("postDate")
+            .limit(limit)
+        )
+        return await self._fetch_posts(query)
+
+    async def get_post_counter(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """投稿数カウンタードキュメントを取得（未作成の場合は None）"""
+        doc = await self._db.collection(COUNTERS_COLLECTION).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def get_post_quota(
+        self, owner_id: Optional[str] = None, day: Optional[date] = None
+    ) -> Dict[str, int]:
+        """アカウントの1日・1か月の投稿数と残りを取得"""
+        owner_id = owner_id or Config.DEFAULT_OWNER_ID
+        if day is None:
+            day = quota_day()
+        counter = await self.get_post_counter(counter_doc_id(owner_id, day))
+        return summarize_quota(counter, day)
+
+
+class SyncRepositoryAdapter:
+    """
+    非同期リポジトリを同期コードから呼び出すアダプター
+
+    AsyncClient の接続はイベントループに結び付くため、専用スレッドで
+    動かし続けるイベントループ上でリポジトリを作成・実行する
+    """
+
+    def __init__(self, factory: Callable[[], AsyncFirestoreRepository]):
+        """
+        Args:
+            factory: イベントループのスレッドでリポジトリを作成する関数
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="firestore-async", daemon=True
+        )
+        self._thread.start()
+        self.repository = self.run(self._create(factory))
+
+    @staticmethod
+    async def _create(factory):
+        return factory()
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """コルーチンを専用のイベントループで実行して結果を返す"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def __getattr__(self, name: str):
+        """リポジトリの非同期メソッドを同期メソッドとして返す"""
+        attr = getattr(self.repository, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return self.run(attr(*args, **kwargs))
+
+        return call
+
+    def close(self) -> None:
+        """イベントループを停止"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
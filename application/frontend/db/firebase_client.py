@@ -4,17 +4,54 @@ Firebase/Firestore クライアント
 Firebase Admin SDKを使用したFirestore接続とデータ管理
 """
 
+import asyncio
 import base64
 import json
 import os
-from datetime import datetime
-from typing import Dict, Any, Optional, List
+import threading
+from datetime import date, datetime, timezone
+from typing import Dict, Any, Optional, List, Union
 
 import firebase_admin
 from firebase_admin import credentials, firestore
-from cryptography.fernet import Fernet
 from google.cloud.firestore_v1 import FieldFilter
 
+from utils.config import Config
+from db.query_cache import QueryCache
+from db.token_cache import TokenCache, build_cipher, token_version
+from db.async_repository import AsyncFirestoreRepository, SyncRepositoryAdapter
+from db.post_archive import (
+    ARCHIVE_COLLECTION,
+    archive_doc_id,
+    archive_month,
+    may_be_archived,
+    month_of_date,
+    posts_from_archive,
+)
+from db.post_hashes import (
+    POST_HASHES_COLLECTION,
+    build_hash_updates,
+    content_hash,
+    recent_hashes,
+)
+from db.post_model import Post
+from db.post_counters import (
+    COUNTERS_COLLECTION,
+    build_counter_updates,
+    counter_doc_id,
+    parse_quota_day,
+    quota_day,
+    summarize_quota,
+)
+
+
+class DuplicatePostError(Exception):
+    """直近に投稿済み・予約中の投稿と同じ内容のため作成しなかったエラー"""
+
+    def __init__(self, duplicate_of: str):
+        super().__init__(f"同じ内容の投稿があります（{duplicate_of}）")
+        self.duplicate_of = duplicate_of
+
 
 class FirebaseClient:
     """Firebase/Firestore クライアント"""
@@ -22,6 +59,10 @@ class FirebaseClient:
     _instance = None
     _db = None
     _cipher = None
+    _cache = None
+    _token_cache = None
+    _async_repository = None
+    _async_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -42,9 +83,13 @@ class FirebaseClient:
         self._db = firestore.client()
 
         # 暗号化キーの設定
-        encryption_key = os.getenv("ENCRYPTION_KEY")
-        if encryption_key:
-            self._cipher = Fernet(encryption_key.encode())
+        self._cipher = build_cipher(os.getenv("ENCRYPTION_KEY"))
+        self._token_cache = TokenCache(ttl=Config.TOKEN_CACHE_TTL_SECONDS)
+
+        # 読み取り結果のキャッシュ（プロセス内で共有）
+        self._cache = QueryCache(
+            maxsize=Config.QUERY_CACHE_MAXSIZE, ttl=Config.QUERY_CACHE_TTL_SECONDS
+        )
 
     def _get_credentials(self):
         """Firebase認証情報を取得"""
@@ -67,6 +112,126 @@ class FirebaseClient:
         """Firestoreデータベースインスタンスを取得"""
         return self._db
 
+    # === 読み取りキャッシュ ===
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """読み取りキャッシュのヒット数・ミス数などを取得"""
+        return self._cache.stats()
+
+    def clear_cache(self) -> None:
+        """読み取りキャッシュを破棄（Functions など外部での更新を即時に反映する場合）"""
+        self._cache.clear()
+
+    def get_async_repository(self) -> SyncRepositoryAdapter:
+        """
+        非同期リポジトリ（同期アダプター経由）を取得
+
+        初回呼び出し時に専用スレッドのイベントループと AsyncClient を作成する
+        """
+        if self._async_repository is None:
+            with self._async_lock:
+                if self._async_repository is None:
+                    decrypt = self.decrypt_token if self._cipher else None
+                    self._async_repository = SyncRepositoryAdapter(
+                        lambda: AsyncFirestoreRepository(decrypt=decrypt)
+                    )
+        return self._async_repository
+
+    def prefetch_dashboard(
+        self,
+        owner_id: Optional[str] = None,
+        date_str: Optional[str] = None,
+        recent_limit: int = 10,
+    ) -> None:
+        """
+        ダッシュボードで使う読み取りを同時に発行し、結果を読み取りキャッシュに保存
+
+        投稿数カウンター・今日の投稿・最近の投稿は互いに独立しているため、
+        非同期リポジトリで並行に取得する。以降の get_post_quota() などは
+        キャッシュにヒットする。今日の投稿を投稿インデックス（POST_INDEX_ENABLED）
+        から参照できる場合は、今日の投稿は取得しない。すべてキャッシュ済みの場合や
+        取得に失敗した場合は何もしない（各メソッドが個別に読み取る）
+
+        Args:
+            owner_id: アカウント（None の場合は既定のユーザー）
+            date_str: 今日の日付（YYYY/MM/DD、None の場合は現在日）
+            recent_limit: 最近の投稿の1ページの件数
+        """
+        owner_id = owner_id or Config.DEFAULT_OWNER_ID
+        date_str = date_str or datetime.now(Config.SCHEDULE_TIMEZONE).strftime(
+            "%Y/%m/%d"
+        )
+        doc_id = counter_doc_id(owner_id, quota_day())
+        counter_key = (COUNTERS_COLLECTION, doc_id)
+        recent_key = ("posts", "recent", recent_limit, True, None)
+        # 今日のタブは投稿インデックスから表示するため、その場合は読み取らない
+        today_key = (
+            None
+            if self._post_index_covers(date_str)
+            else ("posts", "by_date", date_str, None, None, None)
+        )
+        keys = [key for key in (counter_key, recent_key, today_key) if key]
+        if all(self._cache.contains(key) for key in keys):
+            return
+
+        try:
+            adapter = self.get_async_repository()
+            repository = adapter.repository
+
+            async def load_all():
+                reads = [
+                    repository.get_post_counter(doc_id),
+                    repository.get_recent_posts(recent_limit, True),
+                ]
+                if today_key:
+                    reads.append(repository.get_posts_by_date(date_str))
+                return await asyncio.gather(*reads)
+
+            counter, recent_posts, *today_posts = adapter.run(load_all())
+        except Exception as e:
+            print(f"ダッシュボード一括取得エラー: {e}")
+            return
+
+        self._cache.put(counter_key, counter)
+        if today_key:
+            self._cache.put(today_key, today_posts[0])
+        # 最近の投稿が1ページに満たない場合はアーカイブで埋めるため、個別の読み取りに任せる
+        if len(recent_posts) == recent_limit:
+            self._cache.put(recent_key, recent_posts)
+
+    def _post_index_covers(self, date_str: str) -> bool:
+        """指定日の投稿を投稿インデックスから参照できるかどうか"""
+        if not Config.POST_INDEX_ENABLED:
+            return False
+        try:
+            from db.post_index import get_post_index
+
+            return get_post_index().covers(date_str)
+        except Exception as e:
+            print(f"投稿インデックス確認エラー: {e}")
+            return False
+
+    def _paginate(self, query, limit: Optional[int], start_after: Optional[str]):
+        """
+        クエリにカーソルと件数上限を適用
+
+        start_after には前のページの最後の投稿IDを指定する。カーソルには
+        そのドキュメントのスナップショットを使うため、並び順のフィールドが
+        同じ値の投稿もページ間で重複・欠落しない
+        """
+        if start_after:
+            cursor = self._db.collection("posts").document(start_after).get()
+            if cursor.exists:
+                query = query.start_after(cursor)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @staticmethod
+    def _stream_posts(query) -> List[Post]:
+        """クエリ結果を投稿レコードのリストに変換"""
+        return [Post.from_snapshot(doc) for doc in query.stream()]
+
     def encrypt_token(self, token: str) -> str:
         """トークンを暗号化"""
         if not self._cipher:
@@ -81,38 +246,107 @@ class FirebaseClient:
 
     # === Users コレクション操作 ===
 
+    def resolve_owner_id(self, x_user_id: Optional[str]) -> str:
+        """
+        X アカウントのトークンと投稿を保存するユーザーIDを決定
+
+        既定のユーザー（main_user）が未使用か同じアカウントのものであれば
+        既定のユーザーを使い、それ以外のアカウントは X のユーザーIDを使う
+        """
+        if not x_user_id:
+            return Config.DEFAULT_OWNER_ID
+        try:
+            doc = self._db.collection("users").document(Config.DEFAULT_OWNER_ID).get()
+            if not doc.exists:
+                return Config.DEFAULT_OWNER_ID
+            if doc.to_dict().get("xUserId") in (None, x_user_id):
+                return Config.DEFAULT_OWNER_ID
+            return x_user_id
+        except Exception as e:
+            print(f"ユーザーID解決エラー: {e}")
+            return Config.DEFAULT_OWNER_ID
+
     def save_user_token(
         self,
         access_token: str,
         refresh_token: Optional[str] = None,
         user_id: str = "main_user",
+        expires_at: Optional[Union[str, datetime]] = None,
+        x_user_id: Optional[str] = None,
     ) -> bool:
-        """ユーザーのアクセストークンとリフレッシュトークンを暗号化して保存"""
+        """
+        ユーザーのアクセストークンとリフレッシュトークンを暗号化して保存
+
+        expires_at（ISO形式の文字列または datetime）はアクセストークンの有効期限として
+        UTC で保存し、Functions 側でリフレッシュ要否の判定に使用する
+        """
         try:
             encrypted_access_token = self.encrypt_token(access_token)
             user_data = {
                 "accessToken": encrypted_access_token,
+                "expiresAt": self._normalize_expires_at(expires_at),
                 "updatedAt": firestore.SERVER_TIMESTAMP,
             }
 
+            # トークンの持ち主の X アカウント
+            if x_user_id:
+                user_data["xUserId"] = x_user_id
+
             # リフレッシュトークンがあれば暗号化して保存
             if refresh_token:
                 encrypted_refresh_token = self.encrypt_token(refresh_token)
                 user_data["refreshToken"] = encrypted_refresh_token
 
             self._db.collection("users").document(user_id).set(user_data, merge=True)
+            self._token_cache.invalidate(user_id)
             return True
         except Exception as e:
             print(f"トークン保存エラー: {e}")
             return False
 
-    def get_user_tokens(self, user_id: str = "main_user") -> Dict[str, Optional[str]]:
-        """ユーザーのアクセストークンとリフレッシュトークンを取得して復号化"""
+    @staticmethod
+    def _normalize_expires_at(
+        expires_at: Optional[Union[str, datetime]],
+    ) -> Optional[datetime]:
+        """有効期限を UTC の datetime に変換（タイムゾーンなしはローカル時刻とみなす）"""
+        if expires_at is None:
+            return None
+        try:
+            if isinstance(expires_at, str):
+                expires_at = datetime.fromisoformat(expires_at)
+            return expires_at.astimezone(timezone.utc)
+        except (ValueError, TypeError):
+            return None
+
+    def get_user_tokens(self, user_id: str = "main_user") -> Dict[str, Any]:
+        """
+        ユーザーのアクセストークンとリフレッシュトークンを取得して復号化
+
+        TTL 内はキャッシュした復号結果を返し、ドキュメントを読み取らない。
+        TTL 切れの後も暗号文が変わっていなければ復号を省略する
+
+        Returns:
+            access_token, refresh_token と expires_at（有効期限、不明な場合は None）の辞書
+        """
+        cached = self._token_cache.get(user_id)
+        if cached is not None:
+            return cached
+
         try:
             doc = self._db.collection("users").document(user_id).get()
             if doc.exists:
                 data = doc.to_dict()
-                result = {"access_token": None, "refresh_token": None}
+                version = token_version(data)
+                result = self._token_cache.get_version(user_id, version)
+                if result is not None:
+                    result["expires_at"] = data.get("expiresAt")
+                    return result
+
+                result = {
+                    "access_token": None,
+                    "refresh_token": None,
+                    "expires_at": data.get("expiresAt"),
+                }
 
                 if "accessToken" in data:
                     result["access_token"] = self.decrypt_token(data["accessToken"])
@@ -120,11 +354,12 @@ class FirebaseClient:
                 if "refreshToken" in data:
                     result["refresh_token"] = self.decrypt_token(data["refreshToken"])
 
+                self._token_cache.put(user_id, version, result)
                 return result
-            return {"access_token": None, "refresh_token": None}
+            return {"access_token": None, "refresh_token": None, "expires_at": None}
         except Exception as e:
             print(f"トークン取得エラー: {e}")
-            return {"access_token": None, "refresh_token": None}
+            return {"access_token": None, "refresh_token": None, "expires_at": None}
 
     def get_user_token(self, user_id: str = "main_user") -> Optional[str]:
         """ユーザーのアクセストークンを取得して復号化（後方互換性のため維持）"""
@@ -138,23 +373,63 @@ class FirebaseClient:
         content: str,
         post_date: Optional[str] = None,
         time_slot: Optional[int] = None,
+        scheduled_at: Optional[datetime] = None,
+        owner_id: Optional[str] = None,
     ) -> Optional[str]:
-        """投稿を作成"""
+        """
+        投稿を作成
+
+        予約投稿は scheduledAt（UTC）を持ち、Functions が予約時刻の到来後に送信する。
+        scheduled_at を省略した場合は post_date と time_slot のプリセット時刻から算出する。
+        owner_id は投稿するアカウントのトークンを保存しているユーザーID。
+
+        Returns:
+            作成した投稿のID（保存に失敗した場合は None）
+
+        Raises:
+            DuplicatePostError: 直近に投稿済み・予約中の投稿と同じ内容のため作成しなかった
+        """
+        owner_id = owner_id or Config.DEFAULT_OWNER_ID
+        duplicate_of = self.find_duplicate_post(content, owner_id)
+        if duplicate_of:
+            raise DuplicatePostError(duplicate_of)
+
         try:
+            if scheduled_at is None and post_date and time_slot is not None:
+                scheduled_at = Config.to_scheduled_at(
+                    post_date, Config.get_time_slot_time(time_slot)
+                )
+
             post_data = {
-                "postDate": post_date or datetime.now().strftime("%Y/%m/%d"),
+                "postDate": post_date
+                or datetime.now(Config.SCHEDULE_TIMEZONE).strftime("%Y/%m/%d"),
                 "timeSlot": time_slot,
+                "scheduledAt": scheduled_at,
+                "ownerId": owner_id,
+                "status": "pending",
                 "isPosted": False,
                 "content": content,
+                "contentHash": content_hash(content),
                 "createdAt": firestore.SERVER_TIMESTAMP,
                 "postedAt": None,
                 "xPostId": None,
                 "errorMessage": None,
             }
 
-            # ドキュメントを追加
-            doc_ref = self._db.collection("posts").add(post_data)
-            return doc_ref[1].id
+            # 予約投稿は予約日の予約中件数として数える（送信・削除時に減らす）
+            batch = self._db.batch()
+            if scheduled_at is not None:
+                scheduled_day = quota_day(scheduled_at)
+                post_data["scheduledQuotaDay"] = scheduled_day.isoformat()
+                self._add_counter_writes(batch, [(owner_id, scheduled_day, 0, 1)])
+
+            # ドキュメントを追加（カウンターと同じバッチで書き込む）
+            doc_ref = self._db.collection("posts").document()
+            batch.set(doc_ref, post_data)
+            batch.commit()
+            self._cache.invalidate("posts")
+            self._cache.invalidate(COUNTERS_COLLECTION)
+            return doc_ref.id
         except Exception as e:
             print(f"投稿作成エラー: {e}")
             return None
@@ -165,11 +440,19 @@ class FirebaseClient:
         is_posted: bool,
         x_post_id: Optional[str] = None,
         error_message: Optional[str] = None,
+        owner_id: Optional[str] = None,
+        content: Optional[str] = None,
     ) -> bool:
-        """投稿ステータスを更新"""
+        """
+        投稿ステータスを更新
+
+        投稿済みにした場合は owner_id のアカウントの今日の投稿済み件数を
+        同じバッチで1件増やし、content を指定すると投稿内容の索引に追加する
+        """
         try:
             update_data = {
                 "isPosted": is_posted,
+                "status": "posted" if is_posted else "failed",
                 "updatedAt": firestore.SERVER_TIMESTAMP,
             }
 
@@ -180,17 +463,136 @@ class FirebaseClient:
             if error_message:
                 update_data["errorMessage"] = error_message
 
-            self._db.collection("posts").document(post_id).update(update_data)
+            batch = self._db.batch()
+            batch.update(self._db.collection("posts").document(post_id), update_data)
+            if is_posted:
+                owner_id = owner_id or Config.DEFAULT_OWNER_ID
+                self._add_counter_writes(batch, [(owner_id, quota_day(), 1, 0)])
+                if content is not None:
+                    self._add_hash_writes(
+                        batch, [(owner_id, content_hash(content), post_id)]
+                    )
+            batch.commit()
+            self._cache.invalidate("posts")
+            self._cache.invalidate(COUNTERS_COLLECTION)
             return True
         except Exception as e:
             print(f"投稿更新エラー: {e}")
             return False
 
-    def get_posts_by_date(
-        self, date_str: str, is_posted: Optional[bool] = None
-    ) -> List[Dict[str, Any]]:
-        """特定日の投稿を取得"""
+    # === 投稿数カウンター ===
+
+    def _add_counter_writes(self, writer, deltas) -> None:
+        """投稿数カウンターの増減をバッチ／トランザクションに追加"""
+        for doc_id, counter_data in build_counter_updates(deltas).items():
+            writer.set(
+                self._db.collection(COUNTERS_COLLECTION).document(doc_id),
+                counter_data,
+                merge=True,
+            )
+
+    # === 投稿内容の索引（重複検出） ===
+
+    def _add_hash_writes(self, writer, entries) -> None:
+        """投稿済みの投稿内容のハッシュを索引に追加する書き込みをバッチに追加"""
+        for doc_id, hash_data in build_hash_updates(entries).items():
+            writer.set(
+                self._db.collection(POST_HASHES_COLLECTION).document(doc_id),
+                hash_data,
+                merge=True,
+            )
+
+    def find_duplicate_post(
+        self, content: str, owner_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        同じ内容の投稿を探す（X に重複として拒否される投稿を予約時に検出する）
+
+        直近に投稿済みの内容は索引ドキュメント1件の読み取りで、予約中・送信結果不明の
+        内容は contentHash の等価クエリで判定する。索引は他のプロセスからも更新されるため、
+        読み取りキャッシュは使わない
+
+        Returns:
+            同じ内容の投稿ID（ない場合・判定できない場合は None）
+        """
+        owner_id = owner_id or Config.DEFAULT_OWNER_ID
+        digest = content_hash(content)
+        try:
+            doc = self._db.collection(POST_HASHES_COLLECTION).document(owner_id).get()
+            posted = recent_hashes(doc.to_dict() if doc.exists else None)
+            if digest in posted:
+                return posted[digest]
+
+            pending = (
+                self._db.collection("posts")
+                .where(filter=FieldFilter("ownerId", "==", owner_id))
+                .where(filter=FieldFilter("contentHash", "==", digest))
+                .where(
+                    filter=FieldFilter(
+                        "status",
+                        "in",
+                        # unknown は送信済みの可能性がある（送信結果不明の）投稿
+                        ["pending", "processing", "deferred", "unknown"],
+                    )
+                )
+                .limit(1)
+                .stream()
+            )
+            for post_doc in pending:
+                return post_doc.id
+            return None
+        except Exception as e:
+            print(f"重複投稿の確認エラー: {e}")
+            return None
+
+    def get_post_quota(
+        self, owner_id: Optional[str] = None, day: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        アカウントの1日・1か月の投稿数と残りを取得（読み取りキャッシュ経由）
+
+        投稿コレクションは走査せず、カウンタードキュメント1件を読み取る
+
+        Args:
+            owner_id: アカウント（None の場合は既定のユーザー）
+            day: 対象日（None の場合は今日、JST）
+
+        Returns:
+            daily_posted, daily_scheduled, monthly_posted, monthly_scheduled,
+            daily_remaining, monthly_remaining などの辞書
+        """
+        owner_id = owner_id or Config.DEFAULT_OWNER_ID
+        if day is None:
+            day = quota_day()
+        doc_id = counter_doc_id(owner_id, day)
+
+        def load() -> Optional[Dict[str, Any]]:
+            doc = self._db.collection(COUNTERS_COLLECTION).document(doc_id).get()
+            return doc.to_dict() if doc.exists else None
+
         try:
+            counter = self._cache.get_or_load((COUNTERS_COLLECTION, doc_id), load)
+        except Exception as e:
+            print(f"投稿数カウンター取得エラー: {e}")
+            counter = None
+        return summarize_quota(counter, day)
+
+    def get_posts_by_date(
+        self,
+        date_str: str,
+        is_posted: Optional[bool] = None,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+    ) -> List[Post]:
+        """
+        特定日の投稿を取得（読み取りキャッシュ経由）
+
+        limit を指定するとドキュメントID順に limit 件ずつ取得し、
+        start_after（前のページの最後の投稿ID）から続きを取得できる。
+        ページ指定がない場合は、アーカイブに移された投稿も含める
+        """
+
+        def load() -> List[Post]:
             query = self._db.collection("posts").where(
                 filter=FieldFilter("postDate", "==", date_str)
             )
@@ -198,47 +600,165 @@ class FirebaseClient:
             if is_posted is not None:
                 query = query.where(filter=FieldFilter("isPosted", "==", is_posted))
 
-            docs = query.stream()
-            posts = []
-            for doc in docs:
-                post_data = doc.to_dict()
-                post_data["id"] = doc.id
-                posts.append(post_data)
+            if limit is not None or start_after:
+                query = self._paginate(query.order_by("__name__"), limit, start_after)
+                return self._stream_posts(query)
 
+            posts = self._stream_posts(query)
+            if is_posted is not False:
+                posts += self._get_archived_posts_by_date(date_str)
             return posts
+
+        try:
+            return self._cache.get_or_load(
+                ("posts", "by_date", date_str, is_posted, limit, start_after), load
+            )
         except Exception as e:
             print(f"投稿取得エラー: {e}")
             return []
 
+    def _get_archived_posts_by_date(self, date_str: str) -> List[Post]:
+        """アーカイブに移された特定日の投稿を取得（移されていない日付は読み取らない）"""
+        if not may_be_archived(date_str):
+            return []
+
+        query = self._db.collection(ARCHIVE_COLLECTION).where(
+            filter=FieldFilter("month", "==", month_of_date(date_str))
+        )
+        return [
+            post
+            for doc in query.stream()
+            for post in posts_from_archive(doc.to_dict())
+            if post.post_date == date_str
+        ]
+
+    def _get_archived_recent_posts(
+        self, limit: int, posted_only: bool, start_after: Optional[str] = None
+    ) -> List[Post]:
+        """
+        アーカイブに移された投稿を新しい順に取得
+
+        アーカイブドキュメントを新しい月から順に読み取り、limit 件そろった月で止める。
+        月の中は posts のクエリと同じ項目（posted_only の場合は postedAt、
+        それ以外は createdAt）の降順に並べる
+
+        Args:
+            limit: 取得件数
+            posted_only: get_recent_posts と同じ並び順の指定
+            start_after: 前のページの最後の投稿ID（アーカイブ内の投稿）
+        """
+        sort_field = "posted_at" if posted_only else "created_at"
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+
+        def sort_key(post: Post):
+            return getattr(post, sort_field) or oldest, post.id
+
+        results: List[Post] = []
+        found_cursor = start_after is None
+
+        def take(month_posts: List[Post]) -> None:
+            nonlocal found_cursor
+            for post in sorted(month_posts, key=sort_key, reverse=True):
+                if not found_cursor:
+                    found_cursor = post.id == start_after
+                    continue
+                results.append(post)
+
+        query = self._db.collection(ARCHIVE_COLLECTION).order_by(
+            "month", direction=firestore.Query.DESCENDING
+        )
+        current_month = None
+        month_posts: List[Post] = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            if data.get("month") != current_month:
+                take(month_posts)
+                if len(results) >= limit:
+                    return results[:limit]
+                current_month = data.get("month")
+                month_posts = []
+            month_posts.extend(posts_from_archive(data))
+
+        take(month_posts)
+        return results[:limit]
+
+    @staticmethod
+    def summarize_posts(posts: List[Post]) -> Dict[str, Any]:
+        """
+        取得済みの投稿を状態別・時間スロット別に集計
+
+        Returns:
+            total（合計）, posted（投稿済み）, pending（未投稿）,
+            by_status（status ごとの件数）, by_slot（timeSlot ごとの件数、
+            任意時刻・即時投稿は None）の辞書
+        """
+        by_status: Dict[str, int] = {}
+        by_slot: Dict[Optional[int], int] = {}
+        posted = 0
+        for post in posts:
+            if post.is_posted:
+                posted += 1
+            status = post.effective_status
+            by_status[status] = by_status.get(status, 0) + 1
+            by_slot[post.time_slot] = by_slot.get(post.time_slot, 0) + 1
+
+        return {
+            "total": len(posts),
+            "posted": posted,
+            "pending": len(posts) - posted,
+            "by_status": by_status,
+            "by_slot": by_slot,
+        }
+
     def get_scheduled_posts(
-        self, date_str: str, time_slot: int
-    ) -> List[Dict[str, Any]]:
-        """特定日時の予約投稿を取得"""
-        try:
-            docs = (
+        self,
+        date_str: str,
+        time_slot: int,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+    ) -> List[Post]:
+        """
+        特定日時の予約投稿を取得（読み取りキャッシュ経由）
+
+        limit / start_after は get_posts_by_date と同様のページ指定
+        """
+
+        def load() -> List[Post]:
+            query = (
                 self._db.collection("posts")
                 .where(filter=FieldFilter("postDate", "==", date_str))
                 .where(filter=FieldFilter("timeSlot", "==", time_slot))
                 .where(filter=FieldFilter("isPosted", "==", False))
-                .stream()
             )
 
-            posts = []
-            for doc in docs:
-                post_data = doc.to_dict()
-                post_data["id"] = doc.id
-                posts.append(post_data)
+            if limit is not None or start_after:
+                query = self._paginate(query.order_by("__name__"), limit, start_after)
 
-            return posts
+            return self._stream_posts(query)
+
+        try:
+            return self._cache.get_or_load(
+                ("posts", "scheduled", date_str, time_slot, limit, start_after), load
+            )
         except Exception as e:
             print(f"予約投稿取得エラー: {e}")
             return []
 
     def get_recent_posts(
-        self, limit: int = 10, posted_only: bool = True
-    ) -> List[Dict[str, Any]]:
-        """最近の投稿を取得"""
-        try:
+        self,
+        limit: int = 10,
+        posted_only: bool = True,
+        start_after: Optional[str] = None,
+    ) -> List[Post]:
+        """
+        最近の投稿を新しい順に取得（読み取りキャッシュ経由）
+
+        start_after に前のページの最後の投稿IDを指定すると、
+        それより古い投稿を limit 件取得する。posts の投稿を読み終えたページは、
+        アーカイブに移された投稿で続きを埋める
+        """
+
+        def load() -> List[Post]:
             query = self._db.collection("posts")
 
             if posted_only:
@@ -249,25 +769,83 @@ class FirebaseClient:
                     "createdAt", direction=firestore.Query.DESCENDING
                 )
 
-            query = query.limit(limit)
-            docs = query.stream()
-
-            posts = []
-            for doc in docs:
-                post_data = doc.to_dict()
-                post_data["id"] = doc.id
-                posts.append(post_data)
-
+            if start_after:
+                cursor = self._db.collection("posts").document(start_after).get()
+                if not cursor.exists:
+                    # カーソルがアーカイブ内の投稿の場合は、アーカイブから続きを取得
+                    return self._get_archived_recent_posts(
+                        limit, posted_only, start_after
+                    )
+                query = query.start_after(cursor)
+
+            posts = self._stream_posts(query.limit(limit))
+            if len(posts) < limit:
+                posts += self._get_archived_recent_posts(limit - len(posts), posted_only)
             return posts
+
+        try:
+            return self._cache.get_or_load(
+                ("posts", "recent", limit, posted_only, start_after), load
+            )
         except Exception as e:
             print(f"最近の投稿取得エラー: {e}")
             return []
 
-    def delete_post(self, post_id: str) -> bool:
-        """投稿を削除"""
-        try:
-            self._db.collection("posts").document(post_id).delete()
+    def delete_post(self, post_id: str, post: Optional[Post] = None) -> bool:
+        """
+        投稿を削除
+
+        未投稿の予約投稿は、予約日の予約中件数を同じトランザクションで1件減らす。
+        アーカイブに移された投稿は、表示中の投稿（post）からアーカイブドキュメントを
+        特定して取り除き、格納数（count）を同じトランザクションで1件減らす
+
+        Returns:
+            削除できたかどうか（posts にもアーカイブにも見つからない場合は False）
+        """
+        doc_ref = self._db.collection("posts").document(post_id)
+        archive_ref = None
+        if post is not None:
+            archive_ref = self._db.collection(ARCHIVE_COLLECTION).document(
+                archive_doc_id(post.owner_id or Config.DEFAULT_OWNER_ID, archive_month(post))
+            )
+
+        @firestore.transactional
+        def delete_in_transaction(transaction) -> bool:
+            snapshot = doc_ref.get(transaction=transaction)
+            if snapshot.exists:
+                current = Post.from_snapshot(snapshot)
+                scheduled_day = parse_quota_day(current.scheduled_quota_day)
+                if scheduled_day is not None and not current.is_posted:
+                    owner_id = current.owner_id or Config.DEFAULT_OWNER_ID
+                    self._add_counter_writes(
+                        transaction, [(owner_id, scheduled_day, 0, -1)]
+                    )
+                transaction.delete(doc_ref)
+                return True
+
+            if archive_ref is None:
+                return False
+            archive = archive_ref.get(transaction=transaction)
+            if not archive.exists or post_id not in (archive.to_dict().get("posts") or {}):
+                return False
+            transaction.update(
+                archive_ref,
+                {
+                    f"posts.{post_id}": firestore.DELETE_FIELD,
+                    "count": firestore.Increment(-1),
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                },
+            )
             return True
+
+        try:
+            deleted = delete_in_transaction(self._db.transaction())
+            # アーカイブの読み取りも posts のキャッシュに含まれる
+            self._cache.invalidate("posts")
+            self._cache.invalidate(COUNTERS_COLLECTION)
+            if not deleted:
+                print(f"削除する投稿が見つかりません: {post_id}")
+            return deleted
         except Exception as e:
             print(f"投稿削除エラー: {e}")
             return False
@@ -0,0 +1,83 @@
+"""
+投稿のアーカイブ
+
+保存期間（ARCHIVE_RETENTION_DAYS）を過ぎた投稿済みの投稿を、posts コレクションから
+アカウント・月ごとのアーカイブドキュメント（postArchives/{ownerId}_{YYYY-MM}）に
+まとめて移します。posts コレクションとそのインデックスは直近の投稿だけを保持するため、
+予約・履歴のクエリの件数は運用期間に比例して増えません。
+Functions の shared/post_archive.py と同じ定義です。
+
+ドキュメントの形式:
+    ownerId, month: 対象アカウントと月（postDate の YYYY-MM）
+    count: 格納している投稿数
+    posts: {投稿ID: posts ドキュメントと同じ名前のフィールド}
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from utils.config import Config
+from db.post_model import Post
+
+ARCHIVE_COLLECTION = "postArchives"
+
+# 送信済みの投稿には不要なため、アーカイブに残さないフィールド
+ARCHIVE_EXCLUDED_FIELDS = ("id", "leaseOwner", "leaseExpiresAt", "nextAttemptAt")
+
+# posts の件数集計（直近24時間の投稿数）が参照する期間より短くしない
+MIN_RETENTION_DAYS = 2
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> datetime:
+    """この時刻より前に投稿された投稿をアーカイブの対象とする"""
+    if now is None:
+        now = datetime.now(Config.SCHEDULE_TIMEZONE)
+    days = max(Config.ARCHIVE_RETENTION_DAYS, MIN_RETENTION_DAYS)
+    return now - timedelta(days=days)
+
+
+def archive_month(post: Post) -> str:
+    """投稿をまとめる月（YYYY-MM）。postDate がない場合は投稿日時（JST）の月"""
+    if post.post_date:
+        return post.post_date[:7].replace("/", "-")
+    timestamp = post.posted_at or post.created_at
+    if timestamp is not None:
+        return timestamp.astimezone(Config.SCHEDULE_TIMEZONE).strftime("%Y-%m")
+    return "0000-00"
+
+
+def month_of_date(date_str: str) -> str:
+    """投稿日（YYYY/MM/DD）の月（YYYY-MM）"""
+    return date_str[:7].replace("/", "-")
+
+
+def archive_doc_id(owner_id: str, month: str) -> str:
+    """アーカイブドキュメントのIDを取得"""
+    return f"{owner_id}_{month}"
+
+
+def may_be_archived(date_str: str, today: Optional[date] = None) -> bool:
+    """指定日（YYYY/MM/DD）の投稿がアーカイブに移されている可能性があるかどうか"""
+    if today is None:
+        today = datetime.now(Config.SCHEDULE_TIMEZONE).date()
+    days = max(Config.ARCHIVE_RETENTION_DAYS, MIN_RETENTION_DAYS)
+    # 投稿日時は投稿日以降のため、保存期間の境界日より後の投稿日は移されない
+    boundary = (today - timedelta(days=days - 1)).strftime("%Y/%m/%d")
+    return date_str <= boundary
+
+
+def to_archive_entry(post: Post) -> Dict[str, Any]:
+    """アーカイブに格納する投稿のフィールド（値のないフィールドは省略）"""
+    return {
+        key: value
+        for key, value in post.to_dict().items()
+        if value is not None and key not in ARCHIVE_EXCLUDED_FIELDS
+    }
+
+
+def posts_from_archive(data: Dict[str, Any]) -> List[Post]:
+    """アーカイブドキュメントのデータから投稿レコードを復元"""
+    return [
+        Post.from_dict(post_id, entry)
+        for post_id, entry in (data.get("posts") or {}).items()
+    ]
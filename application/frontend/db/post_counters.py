@@ -0,0 +1,147 @@
+"""
+投稿数カウンター
+
+投稿済み件数と予約中の件数を、アカウント・月ごとのカウンタードキュメント
+（postCounters/{ownerId}_{YYYY-MM}）に日別・月別で保持します。
+投稿ステータスと同じバッチで増減させるため、投稿コレクションを走査せずに
+1回のドキュメント読み取りで1日・1か月の上限を判定できます。
+
+ドキュメントの形式:
+    ownerId, month: 対象アカウントと月（YYYY-MM）
+    posted, scheduled: 月の投稿済み件数・予約中の件数
+    daily: {YYYY-MM-DD: {posted, scheduled}} 日ごとの件数
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from firebase_admin import firestore
+
+from utils.config import Config
+
+COUNTERS_COLLECTION = "postCounters"
+
+# (アカウント, 対象日, 投稿済みの増減, 予約中の増減)
+CounterDelta = Tuple[str, date, int, int]
+
+
+def quota_day(now: Optional[datetime] = None) -> date:
+    """上限を数える日付（JST）を取得"""
+    if now is None:
+        now = datetime.now(Config.SCHEDULE_TIMEZONE)
+    return now.astimezone(Config.SCHEDULE_TIMEZONE).date()
+
+
+def parse_quota_day(value: Optional[str]) -> Optional[date]:
+    """投稿の scheduledQuotaDay（YYYY-MM-DD）を日付に変換"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def quota_reset_at(quota: Dict[str, int], now: Optional[datetime] = None) -> datetime:
+    """
+    summarize_quota() の残りが尽きた場合に上限が戻る時刻を取得
+
+    カウンターは日付（JST）・月ごとに数えるため、残りの少ない方の上限が
+    月の上限であれば翌月1日 0:00（JST）、1日の上限であれば翌日 0:00（JST）
+
+    Returns:
+        上限が戻る時刻（UTC）
+    """
+    today = quota_day(now)
+    if quota["monthly_remaining"] <= quota["daily_remaining"]:
+        reset_day = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+    else:
+        reset_day = today + timedelta(days=1)
+    return datetime.combine(
+        reset_day, time(0), tzinfo=Config.SCHEDULE_TIMEZONE
+    ).astimezone(timezone.utc)
+
+
+def counter_doc_id(owner_id: str, day: date) -> str:
+    """カウンタードキュメントのIDを取得"""
+    return f"{owner_id}_{day.strftime('%Y-%m')}"
+
+
+def build_counter_updates(deltas: Iterable[CounterDelta]) -> Dict[str, Dict[str, Any]]:
+    """
+    増減をカウンタードキュメントごとにまとめ、set(merge=True) 用のデータを作成
+
+    Returns:
+        ドキュメントIDと書き込みデータの辞書
+    """
+    totals: Dict[Tuple[str, date], list] = {}
+    for owner_id, day, posted, scheduled in deltas:
+        total = totals.setdefault((owner_id, day), [0, 0])
+        total[0] += posted
+        total[1] += scheduled
+
+    updates: Dict[str, Dict[str, Any]] = {}
+    for (owner_id, day), (posted, scheduled) in totals.items():
+        if not posted and not scheduled:
+            continue
+        data = updates.setdefault(
+            counter_doc_id(owner_id, day),
+            {
+                "ownerId": owner_id,
+                "month": day.strftime("%Y-%m"),
+                "posted": 0,
+                "scheduled": 0,
+                "daily": {},
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        data["posted"] += posted
+        data["scheduled"] += scheduled
+        data["daily"][day.isoformat()] = {
+            "posted": firestore.Increment(posted),
+            "scheduled": firestore.Increment(scheduled),
+        }
+
+    for data in updates.values():
+        data["posted"] = firestore.Increment(data["posted"])
+        data["scheduled"] = firestore.Increment(data["scheduled"])
+    return updates
+
+
+def summarize_quota(
+    counter: Optional[Dict[str, Any]],
+    day: date,
+    daily_limit: Optional[int] = None,
+    monthly_limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    カウンタードキュメントから1日・1か月の使用数と残りを算出
+
+    Args:
+        counter: カウンタードキュメントのデータ（未作成の場合は None）
+        day: 対象日
+        daily_limit: 1日の上限（None の場合は Config.DAILY_POST_LIMIT）
+        monthly_limit: 1か月の上限（None の場合は Config.MONTHLY_POST_LIMIT）
+
+    Returns:
+        daily_posted, daily_scheduled, monthly_posted, monthly_scheduled と、
+        投稿済み件数に対する残り（daily_remaining, monthly_remaining）の辞書
+    """
+    if daily_limit is None:
+        daily_limit = Config.DAILY_POST_LIMIT
+    if monthly_limit is None:
+        monthly_limit = Config.MONTHLY_POST_LIMIT
+
+    counter = counter or {}
+    daily = (counter.get("daily") or {}).get(day.isoformat()) or {}
+    quota = {
+        "daily_posted": max(0, int(daily.get("posted", 0))),
+        "daily_scheduled": max(0, int(daily.get("scheduled", 0))),
+        "monthly_posted": max(0, int(counter.get("posted", 0))),
+        "monthly_scheduled": max(0, int(counter.get("scheduled", 0))),
+        "daily_limit": daily_limit,
+        "monthly_limit": monthly_limit,
+    }
+    quota["daily_remaining"] = max(0, daily_limit - quota["daily_posted"])
+    quota["monthly_remaining"] = max(0, monthly_limit - quota["monthly_posted"])
+    return quota
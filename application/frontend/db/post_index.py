@@ -0,0 +1,182 @@
+"""
+今日以降の投稿のインメモリインデックス
+
+Firestore の on_snapshot リスナーで今日以降の投稿を Streamlit プロセス内に
+同期し、日付・時間スロットごとに参照できるようにします。
+Functions による投稿ステータスの更新もリスナー経由で反映されるため、
+各セッションは再実行のたびに Firestore を読み取る必要がありません。
+"""
+
+import copy
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from google.cloud.firestore_v1 import FieldFilter
+
+from db.post_model import Post
+from utils.config import Config
+
+
+class PostIndex:
+    """on_snapshot で同期する今日以降の投稿のインデックス（スレッドセーフ）"""
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Firestoreデータベースインスタンス
+        """
+        self._db = db
+        self._posts: Dict[str, Post] = {}
+        self._by_slot: Dict[Tuple[str, Optional[int]], Set[str]] = {}
+        self._since: Optional[str] = None
+        self._watch = None
+        self._ready = threading.Event()
+        self._updated_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> str:
+        # postDate と同じ JST の日付
+        return datetime.now(Config.SCHEDULE_TIMEZONE).strftime("%Y/%m/%d")
+
+    def start(self) -> None:
+        """
+        今日以降の投稿の監視を開始
+
+        日付が変わっている場合は、新しい日付から監視し直す
+        """
+        today = self._today()
+        with self._lock:
+            if self._watch is not None and self._since == today:
+                return
+
+            if self._watch is not None:
+                self._watch.unsubscribe()
+            self._posts.clear()
+            self._by_slot.clear()
+            self._ready.clear()
+            self._since = today
+
+            query = self._db.collection("posts").where(
+                filter=FieldFilter("postDate", ">=", today)
+            )
+            self._watch = query.on_snapshot(self._on_snapshot)
+
+    def stop(self) -> None:
+        """監視を停止してインデックスを破棄"""
+        with self._lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+            self._watch = None
+            self._since = None
+            self._posts.clear()
+            self._by_slot.clear()
+            self._ready.clear()
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        """リスナーのコールバック（Firestore のバックグラウンドスレッドで実行）"""
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                self._remove(doc.id)
+                if change.type.name != "REMOVED":
+                    self._add(Post.from_snapshot(doc))
+            self._updated_at = read_time
+        self._ready.set()
+
+    def _add(self, post: Post) -> None:
+        self._posts[post.id] = post
+        key = (post.post_date, post.time_slot)
+        self._by_slot.setdefault(key, set()).add(post.id)
+
+    def _remove(self, post_id: str) -> None:
+        post = self._posts.pop(post_id, None)
+        if post is None:
+            return
+        key = (post.post_date, post.time_slot)
+        ids = self._by_slot.get(key)
+        if ids is not None:
+            ids.discard(post_id)
+            if not ids:
+                del self._by_slot[key]
+
+    def is_ready(self) -> bool:
+        """最初のスナップショットを受信済みかどうか"""
+        return self._ready.is_set()
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        """最後にスナップショットを受信した時刻"""
+        with self._lock:
+            return self._updated_at
+
+    def covers(self, date_str: str) -> bool:
+        """指定日の投稿をインデックスから参照できるかどうか"""
+        self.start()
+        with self._lock:
+            return self.is_ready() and self._since is not None and date_str >= self._since
+
+    def get_posts_by_date(
+        self, date_str: str, is_posted: Optional[bool] = None
+    ) -> Optional[List[Post]]:
+        """
+        特定日の投稿を取得
+
+        Returns:
+            投稿データのリスト（スロット順）。インデックスが対象外・未同期の場合は None
+        """
+        if not self.covers(date_str):
+            return None
+
+        with self._lock:
+            keys = sorted(
+                (key for key in self._by_slot if key[0] == date_str),
+                key=lambda key: (key[1] is None, key[1] or 0),
+            )
+            posts = [
+                copy.copy(self._posts[post_id])
+                for key in keys
+                for post_id in sorted(self._by_slot[key])
+            ]
+
+        if is_posted is not None:
+            posts = [p for p in posts if p.is_posted == is_posted]
+        return posts
+
+    def get_posts_by_slot(
+        self, date_str: str, time_slot: Optional[int]
+    ) -> Optional[List[Post]]:
+        """
+        特定日・時間スロットの投稿を取得（time_slot が None の場合は任意時刻の投稿）
+
+        Returns:
+            投稿データのリスト。インデックスが対象外・未同期の場合は None
+        """
+        if not self.covers(date_str):
+            return None
+
+        with self._lock:
+            return [
+                copy.copy(self._posts[post_id])
+                for post_id in self._by_slot.get((date_str, time_slot), ())
+            ]
+
+
+_post_index: Optional[PostIndex] = None
+_post_index_lock = threading.Lock()
+
+
+def get_post_index() -> PostIndex:
+    """プロセスで共有する投稿インデックスを取得（初回呼び出し時に監視を開始）"""
+    global _post_index
+
+    if _post_index is None:
+        with _post_index_lock:
+            if _post_index is None:
+                from db.firebase_client import get_firebase_client
+
+                index = PostIndex(get_firebase_client().db)
+                index.start()
+                _post_index = index
+    return _post_index
@@ -0,0 +1,121 @@
+"""
+投稿モデル
+
+Firestore の posts ドキュメントを表す型付きのレコードです。
+Functions の shared/post_model.py と同じ定義で、スナップショットからの変換と
+タイムスタンプの正規化（UTC のタイムゾーン付き datetime）を一度だけ行います。
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def to_utc_datetime(value: Any) -> Optional[datetime]:
+    """
+    Firestore のタイムスタンプを UTC のタイムゾーン付き datetime に変換
+
+    DatetimeWithNanoseconds・datetime（タイムゾーンなしは UTC とみなす）・
+    seconds を持つ Timestamp に対応し、それ以外は None を返す
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+    seconds = getattr(value, "seconds", None)
+    if seconds is not None:
+        nanos = getattr(value, "nanos", 0) or 0
+        return datetime.fromtimestamp(seconds + nanos / 1e9, timezone.utc)
+    return None
+
+
+@dataclass(slots=True)
+class Post:
+    """投稿レコード（posts コレクションの1ドキュメント）"""
+
+    id: str
+    content: str = ""
+    post_date: Optional[str] = None
+    time_slot: Optional[int] = None
+    scheduled_at: Optional[datetime] = None
+    owner_id: Optional[str] = None
+    status: Optional[str] = None
+    is_posted: bool = False
+    x_post_id: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    posted_at: Optional[datetime] = None
+    next_attempt_at: Optional[datetime] = None
+    attempt_count: int = 0
+    last_error_class: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    scheduled_quota_day: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, post_id: str, data: Dict[str, Any]) -> "Post":
+        """Firestore のフィールド辞書から作成（タイムスタンプは UTC に正規化）"""
+        get = data.get
+        return cls(
+            id=post_id,
+            content=get("content") or "",
+            post_date=get("postDate"),
+            time_slot=get("timeSlot"),
+            scheduled_at=to_utc_datetime(get("scheduledAt")),
+            owner_id=get("ownerId"),
+            status=get("status"),
+            is_posted=bool(get("isPosted")),
+            x_post_id=get("xPostId"),
+            error_message=get("errorMessage"),
+            created_at=to_utc_datetime(get("createdAt")),
+            updated_at=to_utc_datetime(get("updatedAt")),
+            posted_at=to_utc_datetime(get("postedAt")),
+            next_attempt_at=to_utc_datetime(get("nextAttemptAt")),
+            attempt_count=get("attemptCount") or 0,
+            last_error_class=get("lastErrorClass"),
+            lease_owner=get("leaseOwner"),
+            lease_expires_at=to_utc_datetime(get("leaseExpiresAt")),
+            scheduled_quota_day=get("scheduledQuotaDay"),
+            content_hash=get("contentHash"),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "Post":
+        """DocumentSnapshot から作成"""
+        return cls.from_dict(snapshot.id, snapshot.to_dict() or {})
+
+    @property
+    def effective_status(self) -> str:
+        """status を持たない旧形式の投稿も含めた状態"""
+        if self.status:
+            return self.status
+        return "posted" if self.is_posted else "pending"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Firestore のフィールド名の辞書に変換（id を含む、エクスポート用）"""
+        return {
+            "id": self.id,
+            "content": self.content,
+            "postDate": self.post_date,
+            "timeSlot": self.time_slot,
+            "scheduledAt": self.scheduled_at,
+            "ownerId": self.owner_id,
+            "status": self.status,
+            "isPosted": self.is_posted,
+            "xPostId": self.x_post_id,
+            "errorMessage": self.error_message,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+            "postedAt": self.posted_at,
+            "nextAttemptAt": self.next_attempt_at,
+            "attemptCount": self.attempt_count,
+            "lastErrorClass": self.last_error_class,
+            "leaseOwner": self.lease_owner,
+            "leaseExpiresAt": self.lease_expires_at,
+            "scheduledQuotaDay": self.scheduled_quota_day,
+            "contentHash": self.content_hash,
+        }
@@ -0,0 +1,85 @@
+"""
+Firestore 読み取り結果のキャッシュ
+
+Streamlit の再実行ごとに同じクエリを Firestore に発行しないよう、
+プロセス全体で共有する TTL 付き・件数上限付きのキャッシュを提供します。
+書き込み時は invalidate() で該当コレクションのエントリを破棄します。
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from cachetools import TTLCache
+
+
+class QueryCache:
+    """TTL と件数上限（LRU で追い出し）を持つスレッドセーフな読み取りキャッシュ"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Args:
+            maxsize: 保持するエントリ数の上限
+            ttl: エントリの有効秒数
+        """
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_load(self, key: Tuple[Hashable, ...], loader: Callable[[], Any]) -> Any:
+        """
+        キャッシュから取得し、なければ loader の結果を保存して返す
+
+        呼び出し側での変更がキャッシュに波及しないよう、常にコピーを返す。
+        loader が例外を送出した場合は何も保存しない
+
+        Args:
+            key: キャッシュキー（先頭要素はコレクション名）
+            loader: キャッシュがない場合に Firestore から読み取る関数
+        """
+        with self._lock:
+            if key in self._cache:
+                self._hits += 1
+                return copy.deepcopy(self._cache[key])
+            self._misses += 1
+
+        value = loader()
+
+        with self._lock:
+            self._cache[key] = value
+        return copy.deepcopy(value)
+
+    def contains(self, key: Tuple[Hashable, ...]) -> bool:
+        """有効なエントリがあるかどうか"""
+        with self._lock:
+            return key in self._cache
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        """まとめて読み取った結果をキャッシュに保存（以降の get_or_load でヒットする）"""
+        with self._lock:
+            self._cache[key] = copy.deepcopy(value)
+
+    def invalidate(self, collection: str) -> None:
+        """指定コレクションのエントリをすべて破棄"""
+        with self._lock:
+            for key in [k for k in self._cache.keys() if k[0] == collection]:
+                self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        """すべてのエントリを破棄"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット数・ミス数・ヒット率・現在のエントリ数を取得"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+            }
@@ -0,0 +1,101 @@
+"""
+復号済みトークンのキャッシュ
+
+users ドキュメントの読み取りと Fernet による復号を呼び出しのたびに行わないよう、
+復号済みのトークンをプロセス内に短時間保持します。
+エントリは暗号文から求めた版（token_version）を持ち、TTL 切れの後も
+ドキュメントの暗号文が変わっていなければ復号をやり直さずに再利用します。
+Functions の shared/token_cache.py と同じ定義です。
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from cryptography.fernet import Fernet, MultiFernet
+
+
+def build_cipher(encryption_keys: Optional[str]) -> Optional[MultiFernet]:
+    """
+    ENCRYPTION_KEY から暗号化オブジェクトを作成
+
+    カンマ区切りで複数のキーを指定でき、先頭のキーで暗号化し、
+    すべてのキーで復号する。キーのローテーション時は新しいキーを先頭に追加し、
+    すべてのトークンが新しいキーで保存し直された後で古いキーを外す
+
+    Returns:
+        MultiFernet（キーが未設定の場合は None）
+    """
+    keys = [key.strip() for key in (encryption_keys or "").split(",") if key.strip()]
+    if not keys:
+        return None
+    return MultiFernet([Fernet(key.encode()) for key in keys])
+
+
+def token_version(data: Mapping[str, Any]) -> str:
+    """users ドキュメントの暗号化トークンの版（暗号文のハッシュ）を取得"""
+    digest = hashlib.sha256()
+    for field in ("accessToken", "refreshToken"):
+        digest.update((data.get(field) or "").encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TokenCache:
+    """ユーザーごとの復号済みトークンを保持するスレッドセーフなキャッシュ"""
+
+    def __init__(self, ttl: float):
+        """
+        Args:
+            ttl: ドキュメントを読み直さずに返す秒数（0 以下で無効）
+        """
+        self._ttl = ttl
+        self._entries: Dict[str, Tuple[float, str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """TTL 内のトークンを取得（ない場合は None）"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return copy.copy(entry[2])
+
+    def get_version(self, user_id: str, version: str) -> Optional[Dict[str, Any]]:
+        """
+        暗号文の版が一致するトークンを TTL にかかわらず取得し、TTL を延長
+
+        Returns:
+            復号済みのトークン（版が異なる・エントリがない場合は None）
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] != version:
+                return None
+            self._entries[user_id] = (time.monotonic() + self._ttl, version, entry[2])
+            return copy.copy(entry[2])
+
+    def put(self, user_id: str, version: str, tokens: Dict[str, Any]) -> None:
+        """復号済みのトークンを保存"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[user_id] = (
+                time.monotonic() + self._ttl,
+                version,
+                copy.copy(tokens),
+            )
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """指定ユーザー（None の場合は全ユーザー）のエントリを破棄"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
@@ -49,6 +49,10 @@ def initialize_session_state():
     if "user_info" not in st.session_state:
         st.session_state.user_info = None
 
+    # トークンと投稿を保存するユーザーID（ログイン時に決定）
+    if "owner_id" not in st.session_state:
+        st.session_state.owner_id = None
+
     if "token_data" not in st.session_state:
         st.session_state.token_data = None
 
@@ -114,6 +118,8 @@ def refresh_token_if_needed():
                         refresh_token=new_token_data.get(
                             "refresh_token", st.session_state.refresh_token
                         ),
+                        user_id=st.session_state.owner_id or Config.DEFAULT_OWNER_ID,
+                        expires_at=new_token_data.get("expires_at"),
                     )
                 except Exception as e:
                     print(f"Firebase token update error: {e}")
@@ -141,6 +147,7 @@ def logout():
     st.session_state.access_token = None
     st.session_state.refresh_token = None
     st.session_state.user_info = None
+    st.session_state.owner_id = None
     st.session_state.token_data = None
     st.session_state.oauth_state = None
     st.session_state.code_verifier = None
@@ -208,9 +215,16 @@ def handle_oauth_callback():
                 from db.firebase_client import get_firebase_client
 
                 firebase_client = get_firebase_client()
+
+                # アカウントごとにトークンを保存（投稿の ownerId にも使用）
+                x_user_id = user_info.get("data", {}).get("id")
+                st.session_state.owner_id = firebase_client.resolve_owner_id(x_user_id)
                 firebase_client.save_user_token(
                     access_token=token_data["access_token"],
                     refresh_token=token_data.get("refresh_token"),
+                    user_id=st.session_state.owner_id,
+                    expires_at=token_data.get("expires_at"),
+                    x_user_id=x_user_id,
                 )
             except Exception as e:
                 # Firebase接続エラーでもログインは継続
@@ -314,6 +328,31 @@ def show_login_page():
             )
 
 
+def show_post_quota():
+    """今日・今月の投稿数の残りを表示"""
+    try:
+        from db.firebase_client import get_firebase_client
+
+        quota = get_firebase_client().get_post_quota(st.session_state.get("owner_id"))
+    except Exception as e:
+        print(f"Post quota error: {e}")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(
+            "📅 今日の残り投稿数",
+            f"{quota['daily_remaining']} / {quota['daily_limit']}",
+            help=f"予約中: {quota['daily_scheduled']}件",
+        )
+    with col2:
+        st.metric(
+            "🗓️ 今月の残り投稿数",
+            f"{quota['monthly_remaining']} / {quota['monthly_limit']}",
+            help=f"予約中: {quota['monthly_scheduled']}件",
+        )
+
+
 def show_dashboard():
     """認証後のダッシュボードを表示"""
 
@@ -359,6 +398,14 @@ def show_dashboard():
                 if st.session_state.refresh_token:
                     st.write("**リフレッシュトークン**: 利用可能")
 
+    # 投稿数・今日の投稿・最近の投稿をまとめて並行に読み取り、キャッシュに保存
+    try:
+        from db.firebase_client import get_firebase_client
+
+        get_firebase_client().prefetch_dashboard(st.session_state.get("owner_id"))
+    except Exception as e:
+        print(f"Dashboard prefetch error: {e}")
+
     # 機能メニュー
     st.header("📋 機能メニュー")
 
@@ -370,7 +417,8 @@ def show_dashboard():
         # メインコンテンツエリア（プレビューと投稿フォーム）
         show_main_content_area()
 
-        # 将来的にはレート制限情報なども表示予定
+        # 投稿数の上限と残り（投稿数カウンターから取得）
+        show_post_quota()
 
     with tab2:
         st.subheader("📊 投稿履歴")
@@ -1,7 +1,8 @@
 """設定管理モジュール"""
 
 import os
-from typing import Optional
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Union
 
 try:
     from dotenv import load_dotenv
@@ -34,6 +35,38 @@ class Config:
     # セッション設定
     SESSION_TIMEOUT_MINUTES = 30
 
+    # 既存のトークンを保存しているユーザーID（最初にログインしたアカウントが使用）
+    DEFAULT_OWNER_ID = "main_user"
+
+    # X API 通信設定（共有HTTPトランスポート）
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 30.0
+    HTTP_POOL_CONNECTIONS: int = 4
+    HTTP_POOL_MAXSIZE: int = 10
+    # 冪等な GET の読み取りタイムアウトを直近の応答時間の分位点 × 倍率にする
+    # （HTTP_READ_TIMEOUT が上限。POST /tweets は常に HTTP_READ_TIMEOUT で待つ）
+    HTTP_ADAPTIVE_TIMEOUT: bool = True
+    HTTP_TIMEOUT_PERCENTILE: float = 0.99
+    HTTP_TIMEOUT_MULTIPLIER: float = 3.0
+    HTTP_MIN_READ_TIMEOUT: float = 2.0
+    # ServerError / NetworkError がこの回数続いたら送信を停止（0 で無効）
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    # 停止してから回復を確認する1件を送るまでの秒数
+    CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Firestore 読み取りキャッシュ（TTL 秒とエントリ数の上限）
+    QUERY_CACHE_TTL_SECONDS: float = 30.0
+    QUERY_CACHE_MAXSIZE: int = 256
+
+    # 今日以降の投稿をリアルタイムリスナーで同期するかどうかと、画面の再描画間隔（秒）
+    POST_INDEX_ENABLED: bool = True
+    POST_INDEX_REFRESH_SECONDS: int = 10
+
+    # 投稿済みの投稿を posts コレクションに残す日数（Functions の設定と合わせる）
+    ARCHIVE_RETENTION_DAYS: int = 90
+    # 同じ内容の投稿を重複として予約させない期間（Functions の設定と合わせる）
+    DUPLICATE_WINDOW_HOURS: int = 168
+
     # OAuth スコープ
     OAUTH_SCOPES = ["tweet.write", "users.read", "tweet.read", "offline.access"]
 
@@ -42,10 +75,16 @@ class Config:
     FIRESTORE_REGION: str = "asia-northeast1"
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
     FIREBASE_SERVICE_ACCOUNT_BASE64: Optional[str] = None
+    # カンマ区切りで複数指定可（先頭のキーで暗号化、すべてのキーで復号）
     ENCRYPTION_KEY: Optional[str] = None
+    # 復号済みトークンをドキュメントを読み直さずに使う秒数（0 で無効）
+    TOKEN_CACHE_TTL_SECONDS: float = 60.0
     FIRESTORE_EMULATOR_HOST: Optional[str] = None
 
-    # 投稿時間スロット
+    # 予約時刻を入力・表示するタイムゾーン（JST）
+    SCHEDULE_TIMEZONE = timezone(timedelta(hours=9))
+
+    # 投稿時間スロット（予約時刻のプリセット）
     TIME_SLOTS = [
         {"slot": 0, "time": "09:00", "label": "朝9時"},
         {"slot": 1, "time": "12:00", "label": "昼12時"},
@@ -72,6 +111,37 @@ class Config:
         cls.ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
         cls.FIRESTORE_EMULATOR_HOST = os.getenv("FIRESTORE_EMULATOR_HOST")
 
+        # HTTP通信設定
+        cls.HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        cls.HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+        cls.HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+        cls.HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+        cls.HTTP_ADAPTIVE_TIMEOUT = (
+            os.getenv("HTTP_ADAPTIVE_TIMEOUT", "true").lower() == "true"
+        )
+        cls.HTTP_TIMEOUT_PERCENTILE = float(
+            os.getenv("HTTP_TIMEOUT_PERCENTILE", "0.99")
+        )
+        cls.HTTP_TIMEOUT_MULTIPLIER = float(os.getenv("HTTP_TIMEOUT_MULTIPLIER", "3"))
+        cls.HTTP_MIN_READ_TIMEOUT = float(os.getenv("HTTP_MIN_READ_TIMEOUT", "2"))
+        cls.CIRCUIT_FAILURE_THRESHOLD = int(
+            os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")
+        )
+        cls.CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+        # Firestore 読み取りキャッシュ設定
+        cls.QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "30"))
+        cls.QUERY_CACHE_MAXSIZE = int(os.getenv("QUERY_CACHE_MAXSIZE", "256"))
+        cls.POST_INDEX_ENABLED = (
+            os.getenv("POST_INDEX_ENABLED", "true").lower() == "true"
+        )
+        cls.POST_INDEX_REFRESH_SECONDS = int(
+            os.getenv("POST_INDEX_REFRESH_SECONDS", "10")
+        )
+        cls.TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+        cls.ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "90"))
+        cls.DUPLICATE_WINDOW_HOURS = int(os.getenv("DUPLICATE_WINDOW_HOURS", "168"))
+
     @classmethod
     def load_from_secrets(cls):
         """Streamlit Secretsから設定を読み込み"""
@@ -138,6 +208,34 @@ class Config:
                 return ts["time"]
         return "00:00"
 
+    @classmethod
+    def get_time_slot_by_time(cls, time_str: Optional[str]) -> Optional[int]:
+        """時刻（HH:MM）に対応する時間スロットを取得（プリセット以外は None）"""
+        for ts in cls.TIME_SLOTS:
+            if ts["time"] == time_str:
+                return ts["slot"]
+        return None
+
+    @classmethod
+    def to_scheduled_at(cls, post_date: Union[str, date], time_str: str) -> datetime:
+        """
+        投稿日と時刻（JST）から予約日時（UTC）を作成
+
+        Args:
+            post_date: 投稿日（date または YYYY/MM/DD 形式の文字列）
+            time_str: 投稿時刻（HH:MM、JST）
+
+        Returns:
+            UTC の予約日時
+        """
+        if isinstance(post_date, str):
+            post_date = datetime.strptime(post_date, "%Y/%m/%d").date()
+        scheduled_time = time.fromisoformat(time_str)
+        scheduled_at = datetime.combine(
+            post_date, scheduled_time, tzinfo=cls.SCHEDULE_TIMEZONE
+        )
+        return scheduled_at.astimezone(timezone.utc)
+
 
 # 初期化
 Config.initialize()
@@ -10,6 +10,8 @@ from datetime import datetime
 from typing import List, Dict, Tuple
 import streamlit as st
 
+from utils.tweet_text import MAX_TWEET_LENGTH, weighted_length
+
 
 class FileManager:
     """Markdownファイル管理クラス"""
@@ -110,7 +112,9 @@ class FileManager:
                 "word_count": word_count,
                 "file_size": stat.st_size,
                 "modified": datetime.fromtimestamp(stat.st_mtime),
-                "twitter_chars_remaining": max(0, 280 - char_count),
+                "twitter_chars_remaining": max(
+                    0, MAX_TWEET_LENGTH - weighted_length(content)
+                ),
             }
         except Exception as e:
             return {"error": f"統計情報の取得に失敗: {str(e)}"}
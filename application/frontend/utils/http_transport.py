@@ -0,0 +1,81 @@
+"""
+共有HTTPトランスポート
+
+X API 向けの通信で使用する requests.Session をプロセス全体で共有し、
+Keep-Alive 接続をプールして再利用します。
+Streamlit サーバーではセッションや再実行をまたいで TCP/TLS 接続が再利用されます。
+"""
+
+import logging
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def _create_session() -> requests.Session:
+    """接続プール設定済みのセッションを作成"""
+    session = requests.Session()
+
+    # ホストごとの接続数上限を pool_maxsize で制限し、上限到達時は空きを待つ
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        pool_block=True,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    logger.info(
+        f"共有HTTPセッション作成: pool_connections={Config.HTTP_POOL_CONNECTIONS}, "
+        f"pool_maxsize={Config.HTTP_POOL_MAXSIZE}"
+    )
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    プロセス共有の requests.Session を取得
+
+    Returns:
+        接続プール付きの requests.Session
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def get_timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """
+    接続タイムアウトと読み取りタイムアウトの組を取得
+
+    Args:
+        read_timeout: 読み取りタイムアウト（秒、None の場合は設定値）
+
+    Returns:
+        requests に渡す (connect, read) タイムアウト
+    """
+    if read_timeout is None:
+        read_timeout = Config.HTTP_READ_TIMEOUT
+    return (Config.HTTP_CONNECT_TIMEOUT, read_timeout)
+
+
+def close_http_session() -> None:
+    """共有セッションをクローズ（次回取得時に再作成される）"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -9,6 +9,8 @@ import markdown
 from typing import Dict, Tuple
 import streamlit as st
 
+from utils.tweet_text import MAX_TWEET_LENGTH, weighted_length
+
 
 class MarkdownProcessor:
     """Markdown処理クラス"""
@@ -143,22 +145,23 @@ class MarkdownProcessor:
             (バリデーション結果, エラーメッセージ, 詳細情報)
         """
         twitter_text = self.strip_markdown_syntax(markdown_text)
-        char_count = len(twitter_text)
+        # X の数え方（全角は2、URL は23）で数える
+        char_count = weighted_length(twitter_text)
 
         validation_info = {
             "char_count": char_count,
-            "char_limit": 280,
-            "chars_remaining": 280 - char_count,
+            "char_limit": MAX_TWEET_LENGTH,
+            "chars_remaining": MAX_TWEET_LENGTH - char_count,
             "twitter_text": twitter_text,
-            "is_valid": char_count <= 280,
+            "is_valid": char_count <= MAX_TWEET_LENGTH,
         }
 
         if char_count == 0:
             return False, "投稿内容が空です。", validation_info
-        elif char_count > 280:
+        elif char_count > MAX_TWEET_LENGTH:
             return (
                 False,
-                f"文字数が上限を超えています（{char_count}/280文字）",
+                f"文字数が上限を超えています（{char_count}/{MAX_TWEET_LENGTH}）",
                 validation_info,
             )
         else:
@@ -1,17 +1,37 @@
 import azure.functions as func
 import logging
 import os
+import socket
+import time
+import uuid
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from typing import Callable, List, Optional, Tuple
 from shared.config import Config
-from shared.firestore_client import get_firestore_client
+from shared.firestore_client import FirestoreClient, get_firestore_client
 from shared.x_api_client import (
     XAPIClient,
     XAPIError,
+    CircuitOpenError,
     RateLimitError,
     AuthenticationError,
+    DuplicateContentError,
+    UnauthorizedError,
 )
 from shared.oauth_client import OAuthClient, TokenError
+from shared.token_manager import TokenManager
+from shared.post_dispatcher import PostDispatcher
+from shared.post_counters import (
+    CounterDelta,
+    parse_quota_day,
+    quota_day,
+    quota_reset_at,
+)
+from shared.post_archive import retention_cutoff
+from shared.post_hashes import RecentHashIndex, content_hash
+from shared.post_model import Post
+from shared.retry_policy import compute_next_attempt_at, is_retryable
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
@@ -19,18 +39,730 @@ logger = logging.getLogger(__name__)
 
 app = func.FunctionApp()
 
+# 投稿のリース所有者として使うワーカー（インスタンス・プロセス）の識別子
+WORKER_ID = os.getenv("WORKER_ID") or (
+    f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+)
+
+
+def _create_oauth_client() -> Optional[OAuthClient]:
+    """環境変数のクレデンシャルから OAuthClient を作成（未設定の場合は None）"""
+    client_id = os.getenv("X_CLIENT_ID")
+    client_secret = os.getenv("X_CLIENT_SECRET")
+
+    if client_id and client_secret:
+        logger.info("OAuth client initialized for token refresh")
+        return OAuthClient(client_id, client_secret)
+    return None
+
+
+def _post_with_token(
+    access_token: str, content: str, dispatcher: PostDispatcher
+) -> dict:
+    """アクセストークンでツイートを送信し、レート制限ヘッダーをディスパッチャーに反映"""
+    with XAPIClient(access_token) as x_client:
+        try:
+            return x_client.post_tweet(content)
+        finally:
+            dispatcher.record_rate_limits(x_client.get_rate_limit("tweets"))
+
+
+def _send_tweet(
+    token_manager: TokenManager, dispatcher: PostDispatcher, content: str
+) -> dict:
+    """
+    ツイートを送信し、401 の場合はトークンをリフレッシュして1回だけ再試行する
+
+    Args:
+        token_manager: アクセストークン管理
+        dispatcher: レート制限を管理するディスパッチャー
+        content: ツイート内容
+
+    Returns:
+        X API の投稿結果
+    """
+    access_token = token_manager.access_token
+    try:
+        return _post_with_token(access_token, content, dispatcher)
+    except UnauthorizedError:
+        if not token_manager.can_refresh:
+            raise
+        logger.warning("Access token rejected (401), refreshing and retrying")
+
+    try:
+        access_token = token_manager.refresh(stale_token=access_token)
+    except TokenError as e:
+        # 別のプロセスで更新されたトークンを次回の実行で読み直す
+        token_manager.fs_client.invalidate_token_cache(token_manager.user_id)
+        raise AuthenticationError(f"トークンリフレッシュエラー: {str(e)}")
+
+    return _post_with_token(access_token, content, dispatcher)
+
+
+def _defer_post(
+    status_writer,
+    post: Post,
+    resume_at: datetime,
+    attempt_count: Optional[int] = None,
+    last_error_class: Optional[str] = None,
+    circuit_open: bool = False,
+) -> dict:
+    """
+    レート制限の上限に達した（X API の障害で送信を停止中の）投稿を
+    失敗扱いにせず再開時刻まで延期する
+
+    Args:
+        status_writer: 投稿ステータスの書き込み先
+        post: 投稿データ
+        resume_at: 再開可能な時刻（UTC）
+        attempt_count: 送信を試みた場合の試行回数
+        last_error_class: 送信を試みた場合のエラー種別
+        circuit_open: サーキットブレーカーが open のため延期する場合は True
+
+    Returns:
+        投稿結果の辞書
+    """
+    jst = timezone(timedelta(hours=9))
+    message = (
+        f"Deferred post {post.id} until {resume_at.isoformat()}: "
+        + ("circuit breaker open" if circuit_open else "rate limit budget exhausted")
+    )
+    logger.warning(message)
+    status_writer.update_post_status(
+        post_id=post.id,
+        is_posted=False,
+        error_message=(
+            ("X API の障害のため延期: " if circuit_open else "レート制限のため延期: ")
+            + f"{resume_at.astimezone(jst).strftime('%Y/%m/%d %H:%M')} 以降に再開"
+        ),
+        next_attempt_at=resume_at,
+        attempt_count=attempt_count,
+        last_error_class=last_error_class,
+    )
+    return {
+        "post_id": post.id,
+        "success": False,
+        "deferred": True,
+        "x_post_id": None,
+        "next_attempt_at": resume_at.isoformat(),
+        "message": message,
+    }
+
+
+def _posted_counter_deltas(post: Post) -> List[CounterDelta]:
+    """投稿成功時の投稿数カウンターの増減（今日の投稿済み +1、予約日の予約中 -1）"""
+    owner_id = post.owner_id or Config.DEFAULT_OWNER_ID
+    return [(owner_id, quota_day(), 1, 0)] + _failed_counter_deltas(post)
+
+
+def _failed_counter_deltas(post: Post) -> List[CounterDelta]:
+    """
+    送信を終えた（投稿済み・再試行なしの失敗）投稿の予約日の予約中 -1
+
+    予約時に予約中として数えた投稿のみ減らす。失敗した投稿が予約日の
+    投稿枠を使い続けないよう、失敗の記録と同じバッチで減らす
+    """
+    scheduled_day = parse_quota_day(post.scheduled_quota_day)
+    if scheduled_day is None:
+        return []
+    return [(post.owner_id or Config.DEFAULT_OWNER_ID, scheduled_day, 0, -1)]
+
+
+def _fail_duplicate_post(
+    status_writer, post: Post, duplicate_of: Optional[str], attempt_count: int
+) -> dict:
+    """直近に同じ内容を投稿済みの投稿を、送信せずに（再試行なしの）エラーとして記録する"""
+    error_msg = f"Duplicate content for post {post.id}" + (
+        f" (same as post {duplicate_of})" if duplicate_of else ""
+    )
+    logger.error(error_msg)
+    status_writer.update_post_status(
+        post_id=post.id,
+        is_posted=False,
+        error_message="重複エラー: 直近に同じ内容の投稿があります"
+        + (f"（投稿ID: {duplicate_of}）" if duplicate_of else ""),
+        attempt_count=attempt_count,
+        last_error_class=DuplicateContentError.__name__,
+        counter_deltas=_failed_counter_deltas(post),
+    )
+    return {
+        "post_id": post.id,
+        "success": False,
+        "deferred": False,
+        "x_post_id": None,
+        "next_attempt_at": None,
+        "message": error_msg,
+    }
+
+
+def _post_single(
+    fs_client,
+    status_writer,
+    post: Post,
+    token_manager: TokenManager,
+    dispatcher: PostDispatcher,
+    hash_index: Optional[RecentHashIndex] = None,
+) -> dict:
+    """
+    1件の予約投稿をリースしてX APIに送信し、結果をFirestoreに記録する
+
+    Args:
+        fs_client: Firestoreクライアント（リース取得用）
+        status_writer: 投稿ステータスの書き込み先
+        post: 投稿レコード
+        token_manager: アクセストークン管理
+        dispatcher: レート制限を管理するディスパッチャー
+        hash_index: アカウントの投稿内容の索引（重複した内容は送信しない）
+
+    Returns:
+        投稿結果の辞書 (post_id, success, deferred, skipped, x_post_id, message)
+    """
+    # 他のワーカーが処理中・処理済みの投稿は送信しない
+    if not fs_client.claim_post(post.id, WORKER_ID):
+        message = f"Skipped post {post.id}: claimed by another worker or already processed"
+        logger.info(message)
+        return {
+            "post_id": post.id,
+            "success": False,
+            "deferred": False,
+            "skipped": True,
+            "x_post_id": None,
+            "message": message,
+        }
+
+    # 今回の送信を含めた試行回数
+    attempt_count = post.attempt_count + 1
+
+    # 直近に同じ内容を投稿済み・送信中であれば、リクエストとレート制限枠を使わずに失敗とする
+    owner_id = post.owner_id or Config.DEFAULT_OWNER_ID
+    post_hash = post.content_hash or content_hash(post.content)
+    if hash_index is not None:
+        duplicate_of = hash_index.reserve(post_hash, post.id)
+        if duplicate_of is not None:
+            return _fail_duplicate_post(status_writer, post, duplicate_of, attempt_count)
+
+    # レート制限・1日の上限の残りがなければ送信せずに延期
+    resume_at = dispatcher.acquire()
+    if resume_at is not None:
+        if hash_index is not None:
+            hash_index.release(post_hash, post.id)
+        return _defer_post(status_writer, post, resume_at)
+
+    try:
+        # X API投稿（401 の場合はリフレッシュして再試行）
+        result = _send_tweet(token_manager, dispatcher, post.content)
+
+        # ステータス更新（投稿数カウンターも同じバッチで更新）
+        status_writer.update_post_status(
+            post_id=post.id,
+            is_posted=True,
+            x_post_id=result["data"]["id"],
+            attempt_count=attempt_count,
+            counter_deltas=_posted_counter_deltas(post),
+            hash_entries=[(owner_id, post_hash, post.id)],
+        )
+
+        success_msg = f"Successfully posted: {post.id} -> X Post ID: {result['data']['id']}"
+        logger.info(success_msg)
+        return {
+            "post_id": post.id,
+            "success": True,
+            "deferred": False,
+            "x_post_id": result["data"]["id"],
+            "message": success_msg,
+        }
+
+    except DuplicateContentError:
+        # 索引にない重複（アプリ外での投稿など）は認証エラーとして扱わない
+        return _fail_duplicate_post(status_writer, post, None, attempt_count)
+
+    except AuthenticationError as e:
+        error = e
+        error_msg = f"Authentication error for post {post.id}: {str(e)}"
+        status_message = f"認証エラー: {str(e)}"
+
+    except CircuitOpenError as e:
+        if hash_index is not None:
+            hash_index.release(post_hash, post.id)
+        # 送信していないため試行回数は増やさず、回復を確認できる時刻まで延期
+        return _defer_post(
+            status_writer,
+            post,
+            datetime.now(timezone.utc) + timedelta(seconds=e.retry_after),
+            circuit_open=True,
+        )
+
+    except RateLimitError as e:
+        if hash_index is not None:
+            hash_index.release(post_hash, post.id)
+        # 以降の投稿も送信を止め、この投稿は解除時刻まで延期
+        logger.error(f"Rate limit exceeded for post {post.id}: {str(e)}")
+        return _defer_post(
+            status_writer,
+            post,
+            dispatcher.on_rate_limited(e.reset_time),
+            attempt_count=attempt_count,
+            last_error_class=type(e).__name__,
+        )
+
+    except XAPIError as e:
+        error = e
+        error_msg = f"X API error for post {post.id}: {str(e)}"
+        status_message = f"X APIエラー: {str(e)}"
+
+    except Exception as e:
+        error = e
+        error_msg = f"Unexpected error for post {post.id}: {str(e)}"
+        status_message = f"予期しないエラー: {str(e)}"
+
+    # 送信できなかった投稿の内容は、同じ内容の他の投稿の送信を妨げない
+    if hash_index is not None:
+        hash_index.release(post_hash, post.id)
+
+    # 一時的なエラーはバックオフ後に再試行キューで拾えるよう次回試行時刻を記録
+    next_attempt_at = (
+        compute_next_attempt_at(attempt_count) if is_retryable(error) else None
+    )
+    if next_attempt_at is not None:
+        error_msg += f" (attempt {attempt_count}, retry at {next_attempt_at.isoformat()})"
+
+    logger.error(error_msg)
+    status_writer.update_post_status(
+        post_id=post.id,
+        is_posted=False,
+        error_message=status_message,
+        next_attempt_at=next_attempt_at,
+        attempt_count=attempt_count,
+        last_error_class=type(error).__name__,
+        # 再試行しない失敗は予約日の予約中から外す（延期中は予約中のまま）
+        counter_deltas=_failed_counter_deltas(post) if next_attempt_at is None else None,
+    )
+    return {
+        "post_id": post.id,
+        "success": False,
+        "deferred": False,
+        "x_post_id": None,
+        "next_attempt_at": next_attempt_at.isoformat() if next_attempt_at else None,
+        "message": error_msg,
+    }
+
 
-def process_scheduled_posts(target_slot: int = None, target_date: str = None) -> dict:
+def _process_posts(
+    fs_client,
+    status_writer,
+    posts: List[Post],
+    token_manager: TokenManager,
+    dispatcher: PostDispatcher,
+    max_workers: int = 1,
+    hash_index: Optional[RecentHashIndex] = None,
+) -> List[dict]:
     """
-    予約投稿の処理を実行する共通ロジック
+    投稿リストを最大 max_workers 並列で送信する
+
+    投稿は1件ずつリースしてから送信するため、複数のワーカーが同じリストを
+    処理しても各投稿はいずれか1つのワーカーだけが送信する
+
+    Args:
+        fs_client: Firestoreクライアント（リース取得用）
+        status_writer: 投稿ステータスの書き込み先
+        posts: 投稿データのリスト
+        token_manager: アクセストークン管理
+        dispatcher: レート制限を管理するディスパッチャー
+        max_workers: 同時に送信する投稿数の上限（1 の場合は逐次処理）
+        hash_index: アカウントの投稿内容の索引（重複した内容は送信しない）
+
+    Returns:
+        posts と同じ順序の投稿結果リスト
+    """
+
+    def post_one(post: Post) -> dict:
+        return _post_single(
+            fs_client, status_writer, post, token_manager, dispatcher, hash_index
+        )
+
+    if max_workers <= 1 or len(posts) <= 1:
+        return [post_one(post) for post in posts]
+
+    workers = min(max_workers, len(posts))
+    logger.info(f"Posting {len(posts)} posts with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # executor.map は入力順に結果を返す
+        return list(executor.map(post_one, posts))
+
+
+def _fail_owner_posts(
+    fs_client,
+    status_writer,
+    posts: List[Post],
+    error_msg: str,
+    status_message: str,
+) -> List[dict]:
+    """
+    トークンの問題で送信できないアカウントの投稿をエラーとして記録する
+
+    他のワーカーが処理中・処理済みの投稿は上書きしない
+    """
+    results = []
+    for post in posts:
+        if not fs_client.claim_post(post.id, WORKER_ID):
+            continue
+        status_writer.update_post_status(
+            post_id=post.id,
+            is_posted=False,
+            error_message=status_message,
+            counter_deltas=_failed_counter_deltas(post),
+        )
+        results.append(
+            {
+                "post_id": post.id,
+                "success": False,
+                "deferred": False,
+                "x_post_id": None,
+                "message": f"{error_msg} (post {post.id})",
+            }
+        )
+    return results
+
+
+def _process_owner_posts(
+    fs_client,
+    status_writer,
+    oauth_client: Optional[OAuthClient],
+    owner_id: str,
+    posts: List[Post],
+    max_workers: int,
+) -> Tuple[List[dict], List[str]]:
+    """
+    1つのアカウントの投稿を、そのアカウントのトークンとレート制限枠で送信する
+
+    Args:
+        fs_client: Firestoreクライアント（読み取り・トークン更新用）
+        status_writer: 投稿ステータスの書き込み先
+        oauth_client: トークンリフレッシュ用クライアント
+        owner_id: 投稿者（トークンを保存しているユーザーID）
+        posts: このアカウントの投稿データのリスト
+        max_workers: 並列投稿数の上限
+
+    Returns:
+        (投稿結果のリスト, 処理メッセージのリスト)
+    """
+    messages = []
+
+    # ユーザートークン取得（アクセストークンとリフレッシュトークン）
+    tokens = fs_client.get_user_tokens(owner_id)
+    access_token = tokens.get("access_token")
+    refresh_token = tokens.get("refresh_token")
+
+    if not access_token:
+        error_msg = f"No access token found for user {owner_id}"
+        logger.error(error_msg)
+        messages.append(error_msg)
+        return (
+            _fail_owner_posts(
+                fs_client,
+                status_writer,
+                posts,
+                error_msg,
+                "アクセストークンが見つかりません",
+            ),
+            messages,
+        )
+
+    # トークンの検証とリフレッシュ（アカウントごとに一度だけ実行）
+    token_manager = TokenManager(fs_client, tokens, oauth_client, user_id=owner_id)
+
+    if token_manager.oauth_client is not None:
+        # 保存済みの有効期限で判定し、不明な場合のみリモートで検証
+        if token_manager.needs_refresh():
+            logger.info(
+                f"Access token for {owner_id} is invalid or expired, attempting refresh"
+            )
+
+            if refresh_token:
+                try:
+                    # リフレッシュトークンで新しいアクセストークンを取得・保存
+                    token_manager.refresh()
+
+                    success_msg = f"Successfully refreshed access token for {owner_id}"
+                    logger.info(success_msg)
+                    messages.append(success_msg)
+
+                except TokenError as e:
+                    error_msg = f"Failed to refresh token for {owner_id}: {str(e)}"
+                    logger.error(error_msg)
+                    messages.append(error_msg)
+                    # 別のプロセスで更新されたトークンを次回の実行で読み直す
+                    fs_client.invalidate_token_cache(owner_id)
+                    return (
+                        _fail_owner_posts(
+                            fs_client,
+                            status_writer,
+                            posts,
+                            error_msg,
+                            f"トークンリフレッシュエラー: {str(e)}",
+                        ),
+                        messages,
+                    )
+            else:
+                error_msg = f"No refresh token available for {owner_id}"
+                logger.error(error_msg)
+                messages.append(error_msg)
+                return (
+                    _fail_owner_posts(
+                        fs_client,
+                        status_writer,
+                        posts,
+                        error_msg,
+                        "リフレッシュトークンがありません",
+                    ),
+                    messages,
+                )
+        else:
+            logger.info(f"Access token for {owner_id} is valid")
+    else:
+        logger.warning("X API credentials not configured - token refresh disabled")
+
+    # アカウントの投稿数カウンター（1回の読み取り）から1日・1か月の上限の残りを算出
+    quota = fs_client.get_post_quota(owner_id)
+    if quota is not None:
+        remaining = min(quota["daily_remaining"], quota["monthly_remaining"])
+        daily_used = Config.DAILY_POST_LIMIT - remaining
+        if quota["monthly_remaining"] <= 0:
+            messages.append(f"Monthly post limit reached for {owner_id}")
+        # 残りが尽きた投稿は、カウンターが戻る翌日・翌月の 0:00（JST）まで延期
+        dispatcher = PostDispatcher(
+            daily_used=daily_used, quota_reset_at=quota_reset_at(quota)
+        )
+    else:
+        # カウンターを読めない場合は直近24時間の投稿数で判定
+        daily_used = fs_client.count_posted_last_24_hours(owner_id) or 0
+        dispatcher = PostDispatcher(daily_used=daily_used)
+
+    # 直近に投稿済みの内容の索引（1回の読み取り）で、送信前に重複を判定
+    hash_index = RecentHashIndex(fs_client.get_recent_post_hashes(owner_id))
+
+    # 投稿処理を実行（アカウント内の投稿を並列に送信）
+    results = _process_posts(
+        fs_client,
+        status_writer,
+        posts,
+        token_manager,
+        dispatcher,
+        max_workers,
+        hash_index,
+    )
+    messages.extend(r["message"] for r in results)
+    return results, messages
+
+
+def _process_fetched_posts(
+    fs_client,
+    status_writer,
+    fetch_posts: Callable[[FirestoreClient], List[Post]],
+    empty_message: str,
+    max_workers: int,
+    messages: List[str],
+) -> dict:
+    """
+    対象の投稿を取得し、アカウントごとにトークンを検証して送信する
+
+    投稿は ownerId ごとにまとめ、アカウントごとのトークンとレート制限枠で
+    同時に処理する。あるアカウントの認証エラーは他のアカウントに影響しない
+
+    Args:
+        fs_client: Firestoreクライアント（読み取り・トークン更新用）
+        status_writer: 投稿ステータスの書き込み先
+        fetch_posts: 処理対象の投稿を取得する関数
+        empty_message: 対象の投稿がない場合のメッセージ
+        max_workers: アカウントごとの並列投稿数の上限
+        messages: 処理メッセージの出力先
+
+    Returns:
+        処理結果の辞書 (success_count, error_count, messages, results)
+    """
+    # 該当する投稿を取得
+    posts = fetch_posts(fs_client)
+
+    if not posts:
+        logger.info(empty_message)
+        messages.append(empty_message)
+        return {"success_count": 0, "error_count": 0, "messages": messages}
+
+    logger.info(f"Found {len(posts)} scheduled posts to process")
+    messages.append(f"Found {len(posts)} scheduled posts to process")
+
+    # 投稿者ごとにまとめる（ownerId がない旧形式の投稿は既定のユーザー）
+    posts_by_owner = {}
+    for post in posts:
+        owner_id = post.owner_id or Config.DEFAULT_OWNER_ID
+        posts_by_owner.setdefault(owner_id, []).append(post)
+
+    oauth_client = _create_oauth_client()
+
+    def process_owner(owner_id: str) -> Tuple[List[dict], List[str]]:
+        try:
+            return _process_owner_posts(
+                fs_client,
+                status_writer,
+                oauth_client,
+                owner_id,
+                posts_by_owner[owner_id],
+                max_workers,
+            )
+        finally:
+            # 延期・失敗の記録をアカウントごとに書き込む（実行の途中でホストが停止しても、
+            # 送信していない投稿がリース切れで送信結果不明にならないようにする）
+            status_writer.flush()
+
+    if len(posts_by_owner) == 1:
+        owner_outputs = [process_owner(owner_id) for owner_id in posts_by_owner]
+    else:
+        workers = min(Config.OWNER_MAX_WORKERS, len(posts_by_owner))
+        logger.info(f"Processing {len(posts_by_owner)} accounts with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            owner_outputs = list(executor.map(process_owner, posts_by_owner))
+
+    # 結果を取得順に並べ直す
+    results_by_id = {}
+    for owner_results, owner_messages in owner_outputs:
+        messages.extend(owner_messages)
+        for r in owner_results:
+            results_by_id[r["post_id"]] = r
+    results = [results_by_id[p.id] for p in posts if p.id in results_by_id]
+
+    success_count = sum(1 for r in results if r["success"])
+    deferred = [r for r in results if r["deferred"]]
+    skipped_count = sum(1 for r in results if r.get("skipped"))
+    error_count = len(results) - success_count - len(deferred) - skipped_count
+
+    summary_msg = (
+        f"Auto posting completed. Success: {success_count}, Errors: {error_count}, "
+        f"Deferred: {len(deferred)}, Skipped: {skipped_count}"
+    )
+    logger.info(summary_msg)
+    messages.append(summary_msg)
+
+    return {
+        "success_count": success_count,
+        "error_count": error_count,
+        "deferred_count": len(deferred),
+        "skipped_count": skipped_count,
+        "resume_at": min(r["next_attempt_at"] for r in deferred) if deferred else None,
+        "messages": messages,
+        "results": results,
+    }
+
+
+def _report_write_failures(result: dict, write_failures: dict) -> None:
+    """ステータス書き込みに失敗した投稿を処理結果に反映"""
+    if not write_failures:
+        return
+
+    for post_result in result.get("results", []):
+        if post_result["post_id"] in write_failures:
+            post_result["write_error"] = write_failures[post_result["post_id"]]
+
+    for post_id, error in write_failures.items():
+        error_msg = f"Failed to record status for post {post_id}: {error}"
+        logger.error(error_msg)
+        result["messages"].append(error_msg)
+
+
+def _run_posting(
+    run_name: str,
+    fetch_posts: Callable[[FirestoreClient], List[Post]],
+    empty_message: str,
+    max_workers: int,
+) -> dict:
+    """
+    投稿処理の1回分の実行（Firestore接続とステータスの一括書き込みを管理）
+
+    Args:
+        run_name: ログに使う処理名
+        fetch_posts: 処理対象の投稿を取得する関数
+        empty_message: 対象の投稿がない場合のメッセージ
+        max_workers: 並列投稿数の上限
+
+    Returns:
+        処理結果の辞書 (success_count, error_count, messages, results)
+    """
+    messages = []
+
+    try:
+        # Firestore接続
+        fs_client = get_firestore_client()
+
+        # ステータス更新はバッファしてまとめて書き込む（異常終了時もコミット）
+        status_writer = fs_client.status_writer()
+        try:
+            result = _process_fetched_posts(
+                fs_client,
+                status_writer,
+                fetch_posts,
+                empty_message,
+                max_workers,
+                messages,
+            )
+        finally:
+            write_failures = status_writer.flush()
+
+        _report_write_failures(result, write_failures)
+        return result
+
+    except Exception as e:
+        return _fatal_result(run_name, e, messages)
+
+
+def _fatal_result(run_name: str, error: Exception, messages: List[str]) -> dict:
+    """処理を続けられないエラーを記録し、致命的なエラーの処理結果を返す"""
+    error_msg = f"Fatal error in {run_name}: {str(error)}"
+    logger.error(error_msg)
+    messages.append(error_msg)
+    return {
+        "success_count": 0,
+        "error_count": 1,
+        "messages": messages,
+        "fatal": True,
+    }
+
+
+def _merge_results(results: List[dict]) -> dict:
+    """複数回の投稿処理の結果を1つにまとめる"""
+    resume_times = [r["resume_at"] for r in results if r.get("resume_at")]
+    return {
+        "success_count": sum(r["success_count"] for r in results),
+        "error_count": sum(r["error_count"] for r in results),
+        "deferred_count": sum(r.get("deferred_count", 0) for r in results),
+        "skipped_count": sum(r.get("skipped_count", 0) for r in results),
+        "resume_at": min(resume_times) if resume_times else None,
+        "messages": [m for r in results for m in r["messages"]],
+        "results": [p for r in results for p in r.get("results", [])],
+        "fatal": any(r.get("fatal") for r in results),
+    }
+
+
+def process_scheduled_posts(
+    target_slot: int = None,
+    target_date: str = None,
+    max_workers: int = None,
+    legacy_only: bool = False,
+) -> dict:
+    """
+    時間スロット単位で予約投稿の処理を実行する共通ロジック
 
     Args:
         target_slot: 対象の時間スロット（None の場合は現在時刻で判定）
         target_date: 対象日付（None の場合は今日）
+        max_workers: 並列投稿数の上限（None の場合は Config.POST_MAX_WORKERS）
+        legacy_only: True の場合、scheduledAt を持たない旧形式の投稿のみを処理
 
     Returns:
-        処理結果の辞書 (success_count, error_count, messages)
+        処理結果の辞書 (success_count, error_count, messages, results)
+        results は取得順に並んだ投稿ごとの結果リスト
     """
+    if max_workers is None:
+        max_workers = Config.POST_MAX_WORKERS
+
     # JST (Asia/Tokyo) タイムゾーンで現在時刻を取得
     jst = timezone(timedelta(hours=9))
     now = datetime.now(jst)
@@ -55,287 +787,297 @@ def process_scheduled_posts(target_slot: int = None, target_date: str = None) ->
 
     logger.info(f"Processing posts for slot {current_slot} on {target_date}")
 
-    messages = []
+    return _run_posting(
+        "process_scheduled_posts",
+        lambda fs_client: fs_client.get_scheduled_posts(
+            date_str=target_date, time_slot=current_slot, legacy_only=legacy_only
+        ),
+        f"No scheduled posts found for slot {current_slot} on {target_date}",
+        max_workers,
+    )
+
+
+def process_due_posts(
+    now: datetime = None, max_workers: int = None, deadline: float = None
+) -> dict:
+    """
+    予約時刻（scheduledAt）を過ぎた予約投稿を処理する
+
+    1回の取得件数（Config.DUE_POSTS_BATCH_LIMIT）を超える滞留がある場合は、
+    レート制限で延期されるか期限に達するまで続けて取得・送信する
+
+    Args:
+        now: 基準時刻（None の場合は現在時刻）
+        max_workers: 並列投稿数の上限（None の場合は Config.POST_MAX_WORKERS）
+        deadline: 処理を打ち切る時刻（time.monotonic() 基準、None の場合は
+            Config.RUN_TIME_BUDGET_SECONDS 後）
+
+    Returns:
+        処理結果の辞書 (success_count, error_count, messages, results)
+    """
+    if max_workers is None:
+        max_workers = Config.POST_MAX_WORKERS
+    if now is None:
+        now = datetime.now(timezone.utc)
+    if deadline is None:
+        deadline = time.monotonic() + Config.RUN_TIME_BUDGET_SECONDS
+
+    logger.info(f"Processing posts scheduled at or before {now.isoformat()}")
+
+    results = []
+    while True:
+        result = _run_posting(
+            "process_due_posts",
+            lambda fs_client: fs_client.get_due_posts(now=now),
+            f"No scheduled posts due at {now.isoformat()}",
+            max_workers,
+        )
+        results.append(result)
+
+        # 処理済みの投稿は pending でなくなるため、次の取得では残りが返る
+        processed = len(result.get("results", []))
+        if (
+            result.get("fatal")
+            or result.get("deferred_count")
+            or processed < Config.DUE_POSTS_BATCH_LIMIT
+        ):
+            break
+        if time.monotonic() >= deadline:
+            logger.warning("Run time budget exhausted, remaining due posts are left")
+            break
+        logger.info("Due post backlog remains, fetching next batch")
+
+    return results[0] if len(results) == 1 else _merge_results(results)
+
+
+def process_missed_slots(slots: List[tuple], max_workers: int = None) -> dict:
+    """
+    複数の時間スロットに予約された旧形式（scheduledAt なし）の投稿をまとめて処理する
+
+    Args:
+        slots: (投稿日 YYYY/MM/DD, スロット番号) のリスト
+        max_workers: 並列投稿数の上限（None の場合は Config.POST_MAX_WORKERS）
+
+    Returns:
+        処理結果の辞書 (success_count, error_count, messages, results)
+    """
+    if max_workers is None:
+        max_workers = Config.POST_MAX_WORKERS
+
+    logger.info(f"Processing legacy posts for {len(slots)} slots: {slots}")
+
+    return _run_posting(
+        "process_missed_slots",
+        lambda fs_client: fs_client.get_legacy_posts_for_slots(slots),
+        f"No legacy posts found for {len(slots)} slots",
+        max_workers,
+    )
+
+
+def run_catch_up(now: datetime = None, max_workers: int = None) -> dict:
+    """
+    前回の正常終了以降に到来した予約投稿をまとめて処理する
+
+    scheduledAt を過ぎた投稿と、チェックポイント以降に到来した時間スロットの
+    旧形式の投稿を処理し、致命的なエラーがなければチェックポイントを進める。
+    タイマーの停止や実行漏れがあっても次回の実行で取りこぼしを回収できる
+
+    Args:
+        now: 基準時刻（None の場合は現在時刻）
+        max_workers: 並列投稿数の上限（None の場合は Config.POST_MAX_WORKERS）
+
+    Returns:
+        処理結果の辞書 (success_count, error_count, messages, results)
+        Firestore に接続できない場合などは fatal=True（例外は送出しない）
+    """
+    if now is None:
+        now = datetime.now(Config.SCHEDULE_TIMEZONE).replace(second=0, microsecond=0)
+    deadline = time.monotonic() + Config.RUN_TIME_BUDGET_SECONDS
 
     try:
-        # Firestore接続
         fs_client = get_firestore_client()
+        # チェックポイントがなければ直前のタイマー間隔分だけを対象にする
+        checkpoint = fs_client.get_scheduler_checkpoint()
+    except Exception as e:
+        return _fatal_result("run_catch_up", e, [])
 
-        # 該当する投稿を取得
-        posts = fs_client.get_scheduled_posts(
-            date_str=target_date, time_slot=current_slot
-        )
+    since = checkpoint or now - timedelta(minutes=5)
+    since = max(since, now - timedelta(days=Config.CATCH_UP_MAX_DAYS))
+
+    # scheduledAt を過ぎた予約投稿（範囲クエリに下限がないため過去分も含む）
+    results = [process_due_posts(now=now, max_workers=max_workers, deadline=deadline)]
 
-        if not posts:
-            message = (
-                f"No scheduled posts found for slot {current_slot} on {target_date}"
+    # 前回以降に到来したスロットの旧形式の投稿を一括取得して処理
+    missed_slots = Config.get_slots_between(since, now)
+    if missed_slots:
+        if len(missed_slots) > 1:
+            logger.warning(
+                f"Catching up {len(missed_slots)} slots since {since.isoformat()}"
             )
-            logger.info(message)
-            messages.append(message)
-            return {"success_count": 0, "error_count": 0, "messages": messages}
-
-        logger.info(f"Found {len(posts)} scheduled posts to process")
-        messages.append(f"Found {len(posts)} scheduled posts to process")
-
-        # ユーザートークン取得（アクセストークンとリフレッシュトークン）
-        tokens = fs_client.get_user_tokens()  # デフォルトユーザー "main_user" を使用
-        access_token = tokens.get("access_token")
-        refresh_token = tokens.get("refresh_token")
-
-        if not access_token:
-            error_msg = "No access token found for user"
-            logger.error(error_msg)
-            messages.append(error_msg)
-            
-            # すべての投稿をエラーとして記録
-            for post in posts:
-                fs_client.update_post_status(
-                    post_id=post["id"],
-                    is_posted=False,
-                    error_message="アクセストークンが見つかりません",
-                )
-            
-            return {
-                "success_count": 0,
-                "error_count": len(posts),
-                "messages": messages,
-            }
+        results.append(process_missed_slots(missed_slots, max_workers=max_workers))
 
-        # トークンの検証とリフレッシュ（一度だけ実行）
-        client_id = os.getenv("X_CLIENT_ID")
-        client_secret = os.getenv("X_CLIENT_SECRET")
-        
-        if client_id and client_secret:
-            oauth_client = OAuthClient(client_id, client_secret)
-            logger.info("OAuth client initialized for token refresh")
-            
-            # トークンの有効性を確認
-            logger.info("Validating access token")
-            if not oauth_client.verify_token(access_token):
-                logger.info("Access token is invalid or expired, attempting refresh")
-                
-                if refresh_token:
-                    try:
-                        # リフレッシュトークンで新しいアクセストークンを取得
-                        new_token_data = oauth_client.refresh_access_token(refresh_token)
-                        access_token = new_token_data.get("access_token")
-                        new_refresh_token = new_token_data.get("refresh_token", refresh_token)
-                        
-                        # Firestoreに新しいトークンを保存
-                        logger.info("Saving refreshed tokens to Firestore")
-                        fs_client.update_user_tokens(
-                            access_token=access_token,
-                            refresh_token=new_refresh_token
-                        )
-                        
-                        success_msg = "Successfully refreshed access token"
-                        logger.info(success_msg)
-                        messages.append(success_msg)
-                        
-                    except TokenError as e:
-                        error_msg = f"Failed to refresh token: {str(e)}"
-                        logger.error(error_msg)
-                        messages.append(error_msg)
-                        
-                        # すべての投稿をエラーとして記録
-                        for post in posts:
-                            fs_client.update_post_status(
-                                post_id=post["id"],
-                                is_posted=False,
-                                error_message=f"トークンリフレッシュエラー: {str(e)}",
-                            )
-                        
-                        return {
-                            "success_count": 0,
-                            "error_count": len(posts),
-                            "messages": messages,
-                        }
-                else:
-                    error_msg = "No refresh token available"
-                    logger.error(error_msg)
-                    messages.append(error_msg)
-                    
-                    # すべての投稿をエラーとして記録
-                    for post in posts:
-                        fs_client.update_post_status(
-                            post_id=post["id"],
-                            is_posted=False,
-                            error_message="リフレッシュトークンがありません",
-                        )
-                    
-                    return {
-                        "success_count": 0,
-                        "error_count": len(posts),
-                        "messages": messages,
-                    }
-            else:
-                logger.info("Access token is valid")
-        else:
-            logger.warning("X API credentials not configured - token refresh disabled")
+    result = _merge_results(results)
+    if not result["fatal"]:
+        try:
+            fs_client.save_scheduler_checkpoint(now)
+        except Exception as e:
+            # 投稿の処理結果は残し、次回は前回のチェックポイントから回収する
+            fatal = _fatal_result("run_catch_up", e, result["messages"])
+            result["error_count"] += fatal["error_count"]
+            result["fatal"] = True
+    return result
 
-        # 投稿処理を実行
-        success_count = 0
-        error_count = 0
 
-        for post in posts:
-            try:
-                # X API投稿（検証済みのアクセストークンを使用）
-                with XAPIClient(access_token) as x_client:
-                    result = x_client.post_tweet(post["content"])
-
-                    # ステータス更新
-                    fs_client.update_post_status(
-                        post_id=post["id"],
-                        is_posted=True,
-                        x_post_id=result["data"]["id"],
-                    )
+def process_retry_posts(max_workers: int = None) -> dict:
+    """
+    再試行時刻を過ぎた投稿（一時的なエラーで失敗・延期された投稿）を処理する
 
-                    success_count += 1
-                    success_msg = f"Successfully posted: {post['id']} -> X Post ID: {result['data']['id']}"
-                    logger.info(success_msg)
-                    messages.append(success_msg)
+    異常終了したワーカーのリースが期限切れになった投稿は、送信済みの可能性が
+    あるため再送せず、送信結果不明（unknown）として記録する
 
-            except AuthenticationError as e:
-                error_msg = f"Authentication error for post {post['id']}: {str(e)}"
-                logger.error(error_msg)
-                messages.append(error_msg)
-                fs_client.update_post_status(
-                    post_id=post["id"],
-                    is_posted=False,
-                    error_message=f"認証エラー: {str(e)}",
-                )
-                error_count += 1
+    Args:
+        max_workers: 並列投稿数の上限（None の場合は Config.POST_MAX_WORKERS）
 
-            except RateLimitError as e:
-                error_msg = f"Rate limit exceeded for post {post['id']}: {str(e)}"
-                logger.error(error_msg)
-                messages.append(error_msg)
-                fs_client.update_post_status(
-                    post_id=post["id"],
-                    is_posted=False,
-                    error_message=f"レート制限エラー: {str(e)}",
-                )
-                error_count += 1
+    Returns:
+        処理結果の辞書 (success_count, error_count, messages, results)
+    """
+    if max_workers is None:
+        max_workers = Config.POST_MAX_WORKERS
 
-            except XAPIError as e:
-                error_msg = f"X API error for post {post['id']}: {str(e)}"
-                logger.error(error_msg)
-                messages.append(error_msg)
-                fs_client.update_post_status(
-                    post_id=post["id"],
-                    is_posted=False,
-                    error_message=f"X APIエラー: {str(e)}",
-                )
-                error_count += 1
+    logger.info("Processing posts due for retry")
 
-            except Exception as e:
-                error_msg = f"Unexpected error for post {post['id']}: {str(e)}"
-                logger.error(error_msg)
-                messages.append(error_msg)
-                fs_client.update_post_status(
-                    post_id=post["id"],
-                    is_posted=False,
-                    error_message=f"予期しないエラー: {str(e)}",
-                )
-                error_count += 1
+    def fetch_retry_posts(fs_client: FirestoreClient) -> List[Post]:
+        unknown_count = fs_client.mark_expired_leases_unknown()
+        if unknown_count:
+            logger.warning(
+                f"Marked {unknown_count} posts with expired leases as unknown "
+                "(not resent; check on X)"
+            )
+        return fs_client.get_due_retry_posts()
 
-        summary_msg = (
-            f"Auto posting completed. Success: {success_count}, Errors: {error_count}"
-        )
-        logger.info(summary_msg)
-        messages.append(summary_msg)
+    return _run_posting(
+        "process_retry_posts",
+        fetch_retry_posts,
+        "No posts due for retry",
+        max_workers,
+    )
 
-        return {
-            "success_count": success_count,
-            "error_count": error_count,
-            "messages": messages,
-        }
 
+def run_archive_compaction(now: datetime = None) -> dict:
+    """
+    保存期間を過ぎた投稿済みの投稿を、アカウント・月ごとのアーカイブに移す
+
+    対象がなくなるか、RUN_TIME_BUDGET_SECONDS に達するまで続けて移し、
+    重複判定の期間を過ぎた投稿内容のハッシュを索引から削除する
+
+    Args:
+        now: 基準時刻（None の場合は現在時刻）
+
+    Returns:
+        処理結果の辞書 (success_count=移した件数, error_count, messages)
+    """
+    cutoff = retention_cutoff(now)
+    deadline = time.monotonic() + Config.RUN_TIME_BUDGET_SECONDS
+    logger.info(f"Archiving posts posted before {cutoff.isoformat()}")
+
+    archived = 0
+    errors: List[str] = []
+    try:
+        fs_client = get_firestore_client()
+        while True:
+            moved, batch_errors = fs_client.archive_posted_posts(
+                cutoff, limit=Config.ARCHIVE_BATCH_LIMIT
+            )
+            archived += moved
+            errors.extend(batch_errors)
+            # エラーがあった場合は同じ投稿を繰り返し取得しないよう次回の実行に回す
+            if (
+                batch_errors
+                or moved < Config.ARCHIVE_BATCH_LIMIT
+                or time.monotonic() >= deadline
+            ):
+                break
+        # 重複判定の期間を過ぎた投稿内容のハッシュを索引から削除
+        pruned, prune_errors = fs_client.prune_post_hashes(now)
+        errors.extend(prune_errors)
     except Exception as e:
-        error_msg = f"Fatal error in process_scheduled_posts: {str(e)}"
+        error_msg = f"Fatal error in run_archive_compaction: {str(e)}"
         logger.error(error_msg)
-        messages.append(error_msg)
-        return {"success_count": 0, "error_count": 1, "messages": messages}
+        errors.append(error_msg)
+        pruned = 0
+
+    return {
+        "success_count": archived,
+        "error_count": len(errors),
+        "messages": [f"Archived {archived} posts", f"Pruned {pruned} content hashes"]
+        + errors,
+    }
 
 
 @app.timer_trigger(
-    schedule="0 0 0,3,6,12 * * *",
+    schedule="0 */5 * * * *",
     arg_name="myTimer",
     run_on_startup=False,
     use_monitor=False,
 )
 def auto_poster(myTimer: func.TimerRequest) -> None:
-    """自動投稿処理のメインエントリーポイント（Timer Trigger）ビルドされたか確認用"""
+    """自動投稿処理のメインエントリーポイント（Timer Trigger、5分ごと）"""
 
     logger.info("Auto poster timer function triggered")
 
     if myTimer.past_due:
-        logger.warning("The timer is past due!")
+        logger.warning("The timer is past due! Missed slots will be caught up")
 
-    # JST (Asia/Tokyo) タイムゾーンで現在時刻を取得
+    # JST (Asia/Tokyo) タイムゾーンで実行時刻を取得（分単位に切り捨て）
     jst = timezone(timedelta(hours=9))
+    execution_time_jst = datetime.now(jst).replace(second=0, microsecond=0)
 
-    # TimerRequestから実行時刻を取得（schedule_statusが利用可能な場合）
-    # schedule_statusが利用できない場合は現在時刻を使用
-    if hasattr(myTimer, "schedule_status") and myTimer.schedule_status:
-        # Azure Functionsの仕様により、schedule_statusのtimestampはUTCで提供される
-        execution_time = myTimer.schedule_status.last
-        if execution_time:
-            # UTCからJSTに変換
-            execution_time_jst = execution_time.replace(tzinfo=timezone.utc).astimezone(
-                jst
-            )
-        else:
-            execution_time_jst = datetime.now(jst)
+    # 前回の正常終了以降の予約投稿と取りこぼしたスロットをまとめて処理
+    result = run_catch_up(now=execution_time_jst)
+    error_count = result["error_count"]
+
+    if error_count > 0:
+        logger.error(f"Timer execution completed with {error_count} errors")
     else:
-        execution_time_jst = datetime.now(jst)
-
-    # UTC時間でのslot判定（CRON式に対応）
-    utc_hour = (
-        myTimer.schedule_status.last.hour
-        if hasattr(myTimer, "schedule_status")
-        and myTimer.schedule_status
-        and myTimer.schedule_status.last
-        else datetime.now(timezone.utc).hour
-    )
+        logger.info("Timer execution completed successfully")
 
-    # UTC時間からJST時間スロットへのマッピング
-    # UTC 00:00 = JST 09:00 -> slot 0
-    # UTC 03:00 = JST 12:00 -> slot 1
-    # UTC 06:00 = JST 15:00 -> slot 2
-    # UTC 12:00 = JST 21:00 -> slot 3
-    utc_to_slot_mapping = {
-        0: 0,  # UTC 00:00 -> JST 09:00
-        3: 1,  # UTC 03:00 -> JST 12:00
-        6: 2,  # UTC 06:00 -> JST 15:00
-        12: 3,  # UTC 12:00 -> JST 21:00
-    }
 
-    target_slot = utc_to_slot_mapping.get(utc_hour)
+@app.timer_trigger(
+    schedule="0 */10 * * * *",
+    arg_name="myTimer",
+    run_on_startup=False,
+    use_monitor=False,
+)
+def retry_poster(myTimer: func.TimerRequest) -> None:
+    """再試行キューの処理（Timer Trigger）: 一時的なエラーで失敗・延期された投稿を再送"""
+
+    logger.info("Retry poster timer function triggered")
 
-    if target_slot is None:
-        logger.warning(
-            f"Unexpected UTC hour {utc_hour} - Timer should only run at 0, 3, 6, or 12"
-        )
-        return
+    result = process_retry_posts()
 
-    target_date = execution_time_jst.strftime("%Y/%m/%d")
+    if result["error_count"] > 0:
+        logger.error(f"Retry execution completed with {result['error_count']} errors")
+    else:
+        logger.info("Retry execution completed successfully")
 
-    # JST時間での実行時刻をログに記録
-    jst_hour_mapping = {0: 9, 1: 12, 2: 15, 3: 21}
-    jst_hour = jst_hour_mapping.get(target_slot, "Unknown")
 
-    logger.info(
-        f"Timer triggered at UTC {utc_hour}:00 (JST {jst_hour}:00, Slot: {target_slot}) - JST Date: {target_date}"
-    )
+@app.timer_trigger(
+    schedule="0 0 19 * * *",
+    arg_name="myTimer",
+    run_on_startup=False,
+    use_monitor=False,
+)
+def archive_compactor(myTimer: func.TimerRequest) -> None:
+    """アーカイブ処理（Timer Trigger、毎日 JST 4:00）: 保存期間を過ぎた投稿を移す"""
+
+    logger.info("Archive compactor timer function triggered")
 
-    # 共通ロジックを実行（明示的にslotとdateを指定）
-    result = process_scheduled_posts(target_slot=target_slot, target_date=target_date)
+    result = run_archive_compaction()
 
     if result["error_count"] > 0:
-        logger.error(f"Timer execution completed with {result['error_count']} errors")
+        logger.error(f"Archive compaction completed with {result['error_count']} errors")
     else:
-        logger.info("Timer execution completed successfully")
+        logger.info(f"Archive compaction completed: {result['success_count']} posts")
 
 
 # # テスト用HTTP Trigger（本番では無効化）
@@ -367,17 +1109,33 @@ def test_auto_poster(req: func.HttpRequest) -> func.HttpResponse:
                     "Invalid slot parameter. Must be an integer.", status_code=400
                 )
 
-        # 共通ロジックを実行
-        result = process_scheduled_posts(
-            target_slot=target_slot, target_date=target_date
-        )
+        # 共通ロジックを実行（mode=due は予約時刻到来分、mode=retry は再試行キュー、
+        # mode=catchup は前回の正常終了以降の取りこぼしを処理、
+        # mode=archive は保存期間を過ぎた投稿をアーカイブに移す）
+        mode = req.params.get("mode")
+        if mode == "retry":
+            result = process_retry_posts()
+        elif mode == "archive":
+            result = run_archive_compaction()
+        elif mode == "catchup":
+            result = run_catch_up()
+        elif mode == "due":
+            result = process_due_posts()
+        else:
+            result = process_scheduled_posts(
+                target_slot=target_slot, target_date=target_date
+            )
 
         # レスポンスを作成
         response_data = {
             "status": "completed",
             "success_count": result["success_count"],
             "error_count": result["error_count"],
+            "deferred_count": result.get("deferred_count", 0),
+            "skipped_count": result.get("skipped_count", 0),
+            "resume_at": result.get("resume_at"),
             "messages": result["messages"],
+            "results": result.get("results", []),
         }
 
         import json
@@ -0,0 +1,208 @@
+"""
+サーキットブレーカーと適応タイムアウト (Azure Functions版)
+
+X API の障害時に、投稿ごとにタイムアウトや 5xx を待ち続けて実行時間を使い切らないよう、
+ServerError / NetworkError が続いた場合は一定時間送信を止め（open）、時間が過ぎたら
+1件だけ試して（half-open）回復を確認します。
+冪等な GET の読み取りタイムアウトは固定値ではなく直近の応答時間の分位点から決め、
+HTTP_READ_TIMEOUT を上限とします（POST /tweets はタイムアウト後に投稿済みになって
+いることがあるため、常に HTTP_READ_TIMEOUT で待ちます）。状態はプロセス内のクライアントで共有します。
+フロントエンドの utils/circuit_breaker.py と同じ定義です。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"  # 通常どおり送信
+STATE_OPEN = "open"  # 送信せずに失敗させる
+STATE_HALF_OPEN = "half_open"  # 回復を確認する1件だけ送信
+
+# 分位点からタイムアウトを決めるのに必要な応答時間の件数
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitBreaker:
+    """連続した失敗で送信を止めるサーキットブレーカー（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            name: ログに使う名前
+            failure_threshold: open にする連続失敗数（None の場合は Config.CIRCUIT_FAILURE_THRESHOLD）
+            reset_seconds: open から half-open にするまでの秒数（None の場合は Config.CIRCUIT_RESET_SECONDS）
+        """
+        self.name = name
+        self.failure_threshold = (
+            Config.CIRCUIT_FAILURE_THRESHOLD
+            if failure_threshold is None
+            else failure_threshold
+        )
+        self.reset_seconds = (
+            Config.CIRCUIT_RESET_SECONDS if reset_seconds is None else reset_seconds
+        )
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_request(self) -> Optional[float]:
+        """
+        送信してよいかを確認
+
+        Returns:
+            送信できる場合は None、できない場合は half-open になるまでの秒数
+        """
+        if self.failure_threshold <= 0:
+            return None
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return None
+            now = time.monotonic()
+            if self._state == STATE_OPEN:
+                remaining = self._opened_at + self.reset_seconds - now
+                if remaining > 0:
+                    return remaining
+                self._state = STATE_HALF_OPEN
+                self._probing = False
+                logger.info(f"サーキットブレーカー half-open: {self.name}")
+            # half-open では回復を確認する1件だけを送信し、結果が出るまで他は止める
+            if self._probing:
+                return self.reset_seconds
+            self._probing = True
+            return None
+
+    def record_success(self) -> None:
+        """応答が返った（サーバーが正常に応答した）ことを記録"""
+        with self._lock:
+            if self._state != STATE_CLOSED:
+                logger.info(f"サーキットブレーカー closed: {self.name}")
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """
+        ServerError / NetworkError を記録
+
+        Returns:
+            この失敗で open になった場合は True
+        """
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == STATE_HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                opened = self._state != STATE_OPEN
+                if opened:
+                    logger.warning(
+                        f"サーキットブレーカー open: {self.name} "
+                        f"（連続失敗 {self._failures} 回、{self.reset_seconds:.0f}秒間送信を停止）"
+                    )
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                return opened
+            return False
+
+    def release_probe(self) -> None:
+        """half-open の確認の送信が判定に使えない結果で終わった場合に、次の確認を許可"""
+        with self._lock:
+            self._probing = False
+
+
+class LatencyTracker:
+    """直近の応答時間から冪等な GET の読み取りタイムアウトを決める（スレッドセーフ）"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: 保持する応答時間の件数
+        """
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """応答が返るまでの秒数を記録"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def reset(self) -> None:
+        """
+        記録した応答時間を破棄
+
+        応答時間が大きく変わった（サーキットブレーカーが open になった）場合に、
+        応答時間が集まるまで HTTP_READ_TIMEOUT に戻す
+        """
+        with self._lock:
+            self._samples.clear()
+
+    def read_timeout(self) -> float:
+        """
+        読み取りタイムアウト（秒）
+
+        HTTP_TIMEOUT_PERCENTILE の応答時間に HTTP_TIMEOUT_MULTIPLIER を掛け、
+        HTTP_MIN_READ_TIMEOUT 〜 HTTP_READ_TIMEOUT に収める。
+        無効な場合・応答時間が少ない場合は HTTP_READ_TIMEOUT
+        """
+        if not Config.HTTP_ADAPTIVE_TIMEOUT:
+            return Config.HTTP_READ_TIMEOUT
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return Config.HTTP_READ_TIMEOUT
+            samples = sorted(self._samples)
+        index = min(
+            len(samples) - 1, int(len(samples) * Config.HTTP_TIMEOUT_PERCENTILE)
+        )
+        timeout = samples[index] * Config.HTTP_TIMEOUT_MULTIPLIER
+        return min(Config.HTTP_READ_TIMEOUT, max(Config.HTTP_MIN_READ_TIMEOUT, timeout))
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_trackers: Dict[str, LatencyTracker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """送信先ごとにプロセスで共有するサーキットブレーカーを取得"""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """送信先ごとにプロセスで共有する応答時間の記録を取得"""
+    with _registry_lock:
+        tracker = _trackers.get(name)
+        if tracker is None:
+            tracker = _trackers[name] = LatencyTracker()
+        return tracker
+
+
+def reset_all() -> None:
+    """すべての状態を破棄（設定の変更後や試験の前に使用）"""
+    with _registry_lock:
+        _breakers.clear()
+        _trackers.clear()
@@ -1,8 +1,8 @@
 """Azure Functions設定管理モジュール"""
 
 import os
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import datetime, time, timedelta, timezone
 
 
 class Config:
@@ -12,11 +12,73 @@ class Config:
     DAILY_POST_LIMIT = 17
     MONTHLY_POST_LIMIT = 500
 
+    # 429 応答に解除時刻がない場合の待機時間（秒）
+    RATE_LIMIT_DEFAULT_BACKOFF_SECONDS = 15 * 60
+
+    # 一時的なエラーで失敗した投稿の再試行設定
+    RETRY_MAX_ATTEMPTS: int = 5
+    RETRY_BASE_DELAY_SECONDS: int = 60
+    RETRY_MAX_DELAY_SECONDS: int = 60 * 60
+    RETRY_BATCH_LIMIT: int = 100
+
+    # scheduledAt を過ぎた予約投稿を1回の実行で取得する最大件数
+    DUE_POSTS_BATCH_LIMIT: int = 200
+
+    # 投稿者（ownerId）を持たない旧形式の投稿のトークンを保存しているユーザーID
+    DEFAULT_OWNER_ID: str = "main_user"
+    # 複数アカウントの投稿を同時に処理する最大アカウント数
+    OWNER_MAX_WORKERS: int = 4
+
+    # 送信中の投稿を占有するリースの有効秒数（1回の実行時間より長く）
+    POST_LEASE_SECONDS: int = 600
+
+    # 取りこぼしたスロットを遡って処理する最大日数
+    CATCH_UP_MAX_DAYS: int = 7
+    # 1回の実行で投稿処理に使う時間の上限（秒、functionTimeout より短く）
+    RUN_TIME_BUDGET_SECONDS: int = 240
+
+    # 投稿済みの投稿を posts コレクションに残す日数（過ぎた投稿はアーカイブに移す）
+    ARCHIVE_RETENTION_DAYS: int = 90
+    # 1回のクエリでアーカイブに移す最大件数
+    ARCHIVE_BATCH_LIMIT: int = 500
+    # 同じ内容の投稿を重複として送信しない期間（投稿済みになってからの時間）
+    DUPLICATE_WINDOW_HOURS: int = 168
+
+    # 時間スロットのタイムゾーン（JST）
+    SCHEDULE_TIMEZONE = timezone(timedelta(hours=9))
+
     # Firebase/Firestore 設定（フロントエンドと共通）
     FIREBASE_PROJECT_ID: Optional[str] = None
     FIRESTORE_REGION: str = "asia-northeast1"
     FIREBASE_SERVICE_ACCOUNT_BASE64: Optional[str] = None
+    # カンマ区切りで複数指定可（先頭のキーで暗号化、すべてのキーで復号）
     ENCRYPTION_KEY: Optional[str] = None
+    # 復号済みトークンをドキュメントを読み直さずに使う秒数（0 で無効）
+    TOKEN_CACHE_TTL_SECONDS: float = 60.0
+
+    # 予約投稿の並列実行数（1 の場合は逐次処理）
+    POST_MAX_WORKERS: int = 4
+
+    # 投稿ステータスの一括書き込み件数（1 の場合は1件ずつ書き込み）
+    STATUS_WRITE_BATCH_SIZE: int = 100
+
+    # X API 通信設定（共有HTTPトランスポート）
+    # API のベースURL（負荷・障害試験では benchmarks/fake_x_api.py のURLを指定）
+    X_API_BASE_URL: str = "https://api.x.com/2"
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 30.0
+    HTTP_POOL_CONNECTIONS: int = 4
+    HTTP_POOL_MAXSIZE: int = 10
+    # 冪等な GET の読み取りタイムアウトを直近の応答時間の分位点 × 倍率にする
+    # （HTTP_READ_TIMEOUT が上限。POST /tweets は常に HTTP_READ_TIMEOUT で待つ）
+    HTTP_ADAPTIVE_TIMEOUT: bool = True
+    HTTP_TIMEOUT_PERCENTILE: float = 0.99
+    HTTP_TIMEOUT_MULTIPLIER: float = 3.0
+    HTTP_MIN_READ_TIMEOUT: float = 2.0
+    # ServerError / NetworkError がこの回数続いたら送信を停止（0 で無効）
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    # 停止してから回復を確認する1件を送るまでの秒数
+    CIRCUIT_RESET_SECONDS: float = 30.0
 
     # 投稿時間スロット（フロントエンドと共通）
     TIME_SLOTS = [
@@ -35,6 +97,47 @@ class Config:
         cls.FIREBASE_SERVICE_ACCOUNT_BASE64 = os.getenv("FIREBASE_SERVICE_ACCOUNT_BASE64")
         cls.ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 
+        # 投稿処理設定
+        cls.POST_MAX_WORKERS = max(1, int(os.getenv("POST_MAX_WORKERS", "4")))
+        cls.STATUS_WRITE_BATCH_SIZE = int(os.getenv("STATUS_WRITE_BATCH_SIZE", "100"))
+
+        # 再試行設定
+        cls.RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+        cls.RETRY_BASE_DELAY_SECONDS = int(os.getenv("RETRY_BASE_DELAY_SECONDS", "60"))
+        cls.RETRY_MAX_DELAY_SECONDS = int(os.getenv("RETRY_MAX_DELAY_SECONDS", "3600"))
+        cls.RETRY_BATCH_LIMIT = int(os.getenv("RETRY_BATCH_LIMIT", "100"))
+        cls.DUE_POSTS_BATCH_LIMIT = int(os.getenv("DUE_POSTS_BATCH_LIMIT", "200"))
+        cls.DEFAULT_OWNER_ID = os.getenv("DEFAULT_OWNER_ID", "main_user")
+        cls.OWNER_MAX_WORKERS = int(os.getenv("OWNER_MAX_WORKERS", "4"))
+        cls.POST_LEASE_SECONDS = int(os.getenv("POST_LEASE_SECONDS", "600"))
+        cls.CATCH_UP_MAX_DAYS = int(os.getenv("CATCH_UP_MAX_DAYS", "7"))
+        cls.RUN_TIME_BUDGET_SECONDS = int(os.getenv("RUN_TIME_BUDGET_SECONDS", "240"))
+        cls.TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+        cls.ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "90"))
+        cls.ARCHIVE_BATCH_LIMIT = int(os.getenv("ARCHIVE_BATCH_LIMIT", "500"))
+        cls.DUPLICATE_WINDOW_HOURS = int(os.getenv("DUPLICATE_WINDOW_HOURS", "168"))
+
+        # HTTP通信設定
+        cls.X_API_BASE_URL = os.getenv(
+            "X_API_BASE_URL", "https://api.x.com/2"
+        ).rstrip("/")
+        cls.HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        cls.HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+        cls.HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+        cls.HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+        cls.HTTP_ADAPTIVE_TIMEOUT = (
+            os.getenv("HTTP_ADAPTIVE_TIMEOUT", "true").lower() == "true"
+        )
+        cls.HTTP_TIMEOUT_PERCENTILE = float(
+            os.getenv("HTTP_TIMEOUT_PERCENTILE", "0.99")
+        )
+        cls.HTTP_TIMEOUT_MULTIPLIER = float(os.getenv("HTTP_TIMEOUT_MULTIPLIER", "3"))
+        cls.HTTP_MIN_READ_TIMEOUT = float(os.getenv("HTTP_MIN_READ_TIMEOUT", "2"))
+        cls.CIRCUIT_FAILURE_THRESHOLD = int(
+            os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")
+        )
+        cls.CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
     @classmethod
     def initialize(cls):
         """設定を初期化"""
@@ -49,6 +152,37 @@ class Config:
                 return slot_info["slot"]
         return None  # 投稿時刻ではない
 
+    @classmethod
+    def get_slots_between(
+        cls, start: datetime, end: datetime
+    ) -> List[Tuple[str, int]]:
+        """
+        期間内（start より後、end 以前）に到来した時間スロットを列挙
+
+        Args:
+            start: 期間の開始（タイムゾーン付き、この時刻ちょうどのスロットは含まない）
+            end: 期間の終了（タイムゾーン付き）
+
+        Returns:
+            (投稿日 YYYY/MM/DD, スロット番号) のリスト（古い順）
+        """
+        start_jst = start.astimezone(cls.SCHEDULE_TIMEZONE)
+        end_jst = end.astimezone(cls.SCHEDULE_TIMEZONE)
+
+        slots = []
+        day = start_jst.date()
+        while day <= end_jst.date():
+            for slot_info in cls.TIME_SLOTS:
+                slot_time = datetime.combine(
+                    day,
+                    time.fromisoformat(slot_info["time"]),
+                    tzinfo=cls.SCHEDULE_TIMEZONE,
+                )
+                if start_jst < slot_time <= end_jst:
+                    slots.append((day.strftime("%Y/%m/%d"), slot_info["slot"]))
+            day += timedelta(days=1)
+        return slots
+
     @classmethod
     def get_time_slot_label(cls, slot: int) -> str:
         """時間スロットのラベルを取得"""
@@ -8,15 +8,274 @@ import base64
 import json
 import os
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple
 
 import firebase_admin
 from firebase_admin import credentials, firestore
-from cryptography.fernet import Fernet
 from google.cloud.firestore_v1 import FieldFilter
 
+from .config import Config
+from .post_archive import (
+    ARCHIVE_COLLECTION,
+    archive_doc_id,
+    archive_month,
+    to_archive_entry,
+)
+from .post_hashes import (
+    POST_HASHES_COLLECTION,
+    HashEntry,
+    build_hash_updates,
+    recent_hashes,
+    stale_hashes,
+)
+from .post_model import Post
+from .token_cache import TokenCache, build_cipher, token_version
+from .post_counters import (
+    COUNTERS_COLLECTION,
+    CounterDelta,
+    build_counter_updates,
+    counter_doc_id,
+    quota_day,
+    summarize_quota,
+)
+
 logger = logging.getLogger(__name__)
 
+# Firestore の1バッチあたりの書き込み上限
+MAX_BATCH_WRITES = 500
+
+# 投稿1件のステータス更新に伴う最大書き込み数
+# （投稿・投稿日と予約日のカウンター・投稿内容の索引）
+MAX_WRITES_PER_UPDATE = 4
+
+# Firestore の in フィルタに指定できる値の上限
+MAX_IN_FILTER_VALUES = 30
+
+# 投稿の状態（status フィールド）
+POST_STATUS_PENDING = "pending"  # 予約中（scheduledAt 到来後に送信）
+POST_STATUS_PROCESSING = "processing"  # 送信中（leaseOwner が leaseExpiresAt まで占有）
+POST_STATUS_DEFERRED = "deferred"  # 延期・再試行待ち（nextAttemptAt 到来後に再送）
+POST_STATUS_POSTED = "posted"  # 投稿済み
+POST_STATUS_FAILED = "failed"  # 失敗（再試行なし）
+POST_STATUS_UNKNOWN = "unknown"  # 送信結果不明（送信中にリースが切れた。再送せず確認待ち）
+
+
+def _lease_expired(post: Post, now: datetime) -> bool:
+    """送信中（processing）のままリースの期限が切れているかどうか"""
+    return post.status == POST_STATUS_PROCESSING and (
+        post.lease_expires_at is None or post.lease_expires_at <= now
+    )
+
+
+def _build_unknown_status_update() -> Dict[str, Any]:
+    """リースが切れた投稿を送信結果不明として記録するフィールドを作成"""
+    return {
+        "status": POST_STATUS_UNKNOWN,
+        "nextAttemptAt": None,
+        "leaseOwner": firestore.DELETE_FIELD,
+        "leaseExpiresAt": firestore.DELETE_FIELD,
+        "lastErrorClass": "LeaseExpired",
+        "errorMessage": (
+            "送信中にワーカーが停止したため送信結果が不明です。"
+            "X で投稿されているか確認してください"
+        ),
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def _build_post_status_update(
+    is_posted: bool,
+    x_post_id: Optional[str] = None,
+    error_message: Optional[str] = None,
+    next_attempt_at: Optional[datetime] = None,
+    attempt_count: Optional[int] = None,
+    last_error_class: Optional[str] = None,
+) -> Dict[str, Any]:
+    """投稿ステータス更新用のフィールドを作成"""
+    if is_posted:
+        status = POST_STATUS_POSTED
+    elif next_attempt_at is not None:
+        status = POST_STATUS_DEFERRED
+    else:
+        status = POST_STATUS_FAILED
+
+    update_data = {
+        "isPosted": is_posted,
+        "status": status,
+        "nextAttemptAt": next_attempt_at,
+        # 処理が終わった投稿のリースを解放
+        "leaseOwner": firestore.DELETE_FIELD,
+        "leaseExpiresAt": firestore.DELETE_FIELD,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }
+
+    # 再試行メタデータ
+    if attempt_count is not None:
+        update_data["attemptCount"] = attempt_count
+    if last_error_class:
+        update_data["lastErrorClass"] = last_error_class
+
+    if is_posted and x_post_id:
+        update_data["postedAt"] = firestore.SERVER_TIMESTAMP
+        update_data["xPostId"] = x_post_id
+
+    if error_message:
+        update_data["errorMessage"] = error_message
+
+    if status == POST_STATUS_FAILED:
+        # 予約中の件数は失敗の記録と同じバッチで減らすため、削除時に再度減らさない
+        update_data["scheduledQuotaDay"] = firestore.DELETE_FIELD
+
+    return update_data
+
+
+class PostStatusWriter:
+    """
+    投稿ステータス更新をバッファしてバッチ書き込みするライター
+
+    FirestoreClient.update_post_status と同じシグネチャで更新を受け付け、
+    batch_size 件たまった時点、または flush()/with ブロック終了時に
+    WriteBatch でまとめてコミットする。投稿数カウンターの増減も
+    同じバッチで書き込む。スレッドセーフ。
+
+    投稿済み（is_posted=True）の更新はバッファせずに即時に書き込む。
+    送信後にプロセスが停止しても投稿済みの記録が失われず、再送されないようにするため。
+    延期・失敗の更新は、呼び出し側がアカウントの処理を終えるたびに flush() で書き込む
+    """
+
+    def __init__(self, db, batch_size: int):
+        """
+        Args:
+            db: Firestoreデータベースインスタンス
+            batch_size: 1コミットあたりの書き込み件数（1 の場合は即時書き込み）
+        """
+        self._db = db
+        self.batch_size = max(
+            1, min(batch_size, MAX_BATCH_WRITES // MAX_WRITES_PER_UPDATE)
+        )
+        self._pending: List[tuple] = []
+        self._failures: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def update_post_status(
+        self,
+        post_id: str,
+        is_posted: bool,
+        x_post_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+        next_attempt_at: Optional[datetime] = None,
+        attempt_count: Optional[int] = None,
+        last_error_class: Optional[str] = None,
+        counter_deltas: Optional[List[CounterDelta]] = None,
+        hash_entries: Optional[List[HashEntry]] = None,
+    ) -> bool:
+        """投稿ステータス更新（と投稿数カウンター・投稿内容の索引）をバッファに追加"""
+        update_data = _build_post_status_update(
+            is_posted,
+            x_post_id,
+            error_message,
+            next_attempt_at,
+            attempt_count,
+            last_error_class,
+        )
+        # contentHash を持たない旧形式の投稿にも索引と同じハッシュを記録
+        for _, digest, entry_post_id in hash_entries or []:
+            if entry_post_id == post_id:
+                update_data["contentHash"] = digest
+
+        entry = (post_id, update_data, counter_deltas or [], hash_entries or [])
+        if is_posted:
+            return self._commit([entry])
+
+        with self._lock:
+            self._pending.append(entry)
+            if len(self._pending) < self.batch_size:
+                return True
+            chunk = self._pending
+            self._pending = []
+
+        return self._commit(chunk)
+
+    def flush(self) -> Dict[str, str]:
+        """
+        バッファ中の更新をすべてコミット
+
+        Returns:
+            書き込みに失敗した投稿IDとエラー内容の辞書（これまでの累計）
+        """
+        with self._lock:
+            chunk = self._pending
+            self._pending = []
+
+        if chunk:
+            self._commit(chunk)
+
+        return self.failures
+
+    @property
+    def failures(self) -> Dict[str, str]:
+        """書き込みに失敗した投稿IDとエラー内容"""
+        with self._lock:
+            return dict(self._failures)
+
+    def _write_batch(self, chunk: List[tuple]) -> None:
+        """投稿ステータスとカウンターの増減・投稿内容の索引を1つのバッチでコミット"""
+        batch = self._db.batch()
+        for post_id, update_data, _, _ in chunk:
+            batch.update(self._db.collection("posts").document(post_id), update_data)
+
+        counter_updates = build_counter_updates(
+            delta for _, _, deltas, _ in chunk for delta in deltas
+        )
+        for doc_id, counter_data in counter_updates.items():
+            batch.set(
+                self._db.collection(COUNTERS_COLLECTION).document(doc_id),
+                counter_data,
+                merge=True,
+            )
+
+        hash_updates = build_hash_updates(
+            entry for _, _, _, entries in chunk for entry in entries
+        )
+        for doc_id, hash_data in hash_updates.items():
+            batch.set(
+                self._db.collection(POST_HASHES_COLLECTION).document(doc_id),
+                hash_data,
+                merge=True,
+            )
+        batch.commit()
+
+    def _commit(self, chunk: List[tuple]) -> bool:
+        """1チャンク分の更新をバッチでコミット"""
+        try:
+            self._write_batch(chunk)
+            logger.info(f"投稿ステータス一括更新: {len(chunk)}件")
+            return True
+        except Exception as e:
+            # バッチは全件失敗となるため、1件ずつ書き込んで失敗した文書を特定する
+            logger.warning(f"投稿ステータス一括更新エラー、個別更新に切り替え: {e}")
+
+        all_succeeded = True
+        for entry in chunk:
+            try:
+                self._write_batch([entry])
+            except Exception as e:
+                logger.error(f"投稿更新エラー: {entry[0]}: {e}")
+                with self._lock:
+                    self._failures[entry[0]] = str(e)
+                all_succeeded = False
+        return all_succeeded
+
+    def __enter__(self):
+        """コンテキストマネージャーの開始"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """コンテキストマネージャーの終了（例外時もバッファをコミット）"""
+        self.flush()
+
 
 class FirestoreClient:
     """Firebase/Firestore クライアント (Azure Functions版)"""
@@ -24,6 +283,7 @@ class FirestoreClient:
     _instance = None
     _db = None
     _cipher = None
+    _token_cache = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -46,13 +306,15 @@ class FirestoreClient:
             self._db = firestore.client()
 
             # 暗号化キーの設定
-            encryption_key = os.getenv("ENCRYPTION_KEY")
-            if encryption_key:
-                self._cipher = Fernet(encryption_key.encode())
+            self._cipher = build_cipher(os.getenv("ENCRYPTION_KEY"))
+            if self._cipher:
                 logger.info("暗号化キー設定完了")
             else:
                 logger.warning("暗号化キーが設定されていません")
 
+            # 復号済みトークンのキャッシュ（プロセス内で共有）
+            self._token_cache = TokenCache(ttl=Config.TOKEN_CACHE_TTL_SECONDS)
+
         except Exception as e:
             logger.error(f"Firebase初期化エラー: {e}")
             raise
@@ -91,15 +353,35 @@ class FirestoreClient:
             raise ValueError("暗号化キーが設定されていません")
         return self._cipher.decrypt(encrypted_token.encode()).decode()
 
-    def get_user_tokens(self, user_id: str = "main_user") -> Dict[str, Optional[str]]:
-        """ユーザーのアクセストークンとリフレッシュトークンを取得して復号化"""
+    def get_user_tokens(self, user_id: str = "main_user") -> Dict[str, Any]:
+        """
+        ユーザーのアクセストークンとリフレッシュトークンを取得して復号化
+
+        TTL 内はキャッシュした復号結果を返し、ドキュメントを読み取らない。
+        TTL 切れの後も暗号文が変わっていなければ復号を省略する
+
+        Returns:
+            access_token, refresh_token と expires_at（アクセストークンの
+            有効期限 datetime、不明な場合は None）を含む辞書
+        """
+        cached = self._token_cache.get(user_id)
+        if cached is not None:
+            return cached
+
         try:
             doc = self._db.collection("users").document(user_id).get()
             if doc.exists:
                 data = doc.to_dict()
+                version = token_version(data)
+                result = self._token_cache.get_version(user_id, version)
+                if result is not None:
+                    result["expires_at"] = data.get("expiresAt")
+                    return result
+
                 result = {
                     "access_token": None,
-                    "refresh_token": None
+                    "refresh_token": None,
+                    "expires_at": data.get("expiresAt"),
                 }
 
                 if "accessToken" in data:
@@ -110,12 +392,17 @@ class FirestoreClient:
                     result["refresh_token"] = self.decrypt_token(data["refreshToken"])
                     logger.info(f"リフレッシュトークン取得: {user_id}")
 
+                self._token_cache.put(user_id, version, result)
                 return result
             logger.warning(f"ユーザートークンが見つかりません: {user_id}")
-            return {"access_token": None, "refresh_token": None}
+            return {"access_token": None, "refresh_token": None, "expires_at": None}
         except Exception as e:
             logger.error(f"トークン取得エラー: {e}")
-            return {"access_token": None, "refresh_token": None}
+            return {"access_token": None, "refresh_token": None, "expires_at": None}
+
+    def invalidate_token_cache(self, user_id: Optional[str] = None) -> None:
+        """復号済みトークンのキャッシュを破棄（次回の取得でドキュメントを読み直す）"""
+        self._token_cache.invalidate(user_id)
 
     def get_user_token(self, user_id: str = "main_user") -> Optional[str]:
         """ユーザーのアクセストークンを取得して復号化（後方互換性のため維持）"""
@@ -127,12 +414,19 @@ class FirestoreClient:
         access_token: str,
         refresh_token: Optional[str] = None,
         user_id: str = "main_user",
+        expires_at: Optional[datetime] = None,
     ) -> bool:
-        """ユーザーのトークンを暗号化して更新"""
+        """
+        ユーザーのトークンを暗号化して更新
+
+        expires_at はアクセストークンの有効期限。不明な場合は None が保存され、
+        古いアクセストークンの有効期限が残らないようにする。
+        """
         try:
             encrypted_access_token = self.encrypt_token(access_token)
             update_data = {
                 "accessToken": encrypted_access_token,
+                "expiresAt": expires_at,
                 "updatedAt": firestore.SERVER_TIMESTAMP,
             }
 
@@ -143,6 +437,7 @@ class FirestoreClient:
             self._db.collection("users").document(user_id).set(
                 update_data, merge=True
             )
+            self._token_cache.invalidate(user_id)
             logger.info(f"ユーザートークン更新: {user_id}")
             return True
         except Exception as e:
@@ -150,9 +445,17 @@ class FirestoreClient:
             return False
 
     def get_scheduled_posts(
-        self, date_str: str, time_slot: int
-    ) -> List[Dict[str, Any]]:
-        """特定日時の予約投稿を取得"""
+        self, date_str: str, time_slot: int, legacy_only: bool = False
+    ) -> List[Post]:
+        """
+        特定日時の予約投稿を取得
+
+        Args:
+            date_str: 投稿日（YYYY/MM/DD）
+            time_slot: 時間スロット
+            legacy_only: True の場合、scheduledAt を持たない旧形式の投稿のみを返す
+                （scheduledAt を持つ投稿は get_due_posts で処理される）
+        """
         try:
             docs = (
                 self._db.collection("posts")
@@ -162,11 +465,9 @@ class FirestoreClient:
                 .stream()
             )
 
-            posts = []
-            for doc in docs:
-                post_data = doc.to_dict()
-                post_data["id"] = doc.id
-                posts.append(post_data)
+            posts = [Post.from_snapshot(doc) for doc in docs]
+            if legacy_only:
+                posts = [post for post in posts if post.scheduled_at is None]
 
             logger.info(
                 f"予約投稿取得: {len(posts)}件 (日付: {date_str}, スロット: {time_slot})"
@@ -176,34 +477,564 @@ class FirestoreClient:
             logger.error(f"予約投稿取得エラー: {e}")
             return []
 
-    def update_post_status(
+    def get_legacy_posts_for_slots(
+        self, slots: List[Tuple[str, int]]
+    ) -> List[Post]:
+        """
+        複数の（投稿日, スロット）に該当する旧形式の未投稿をまとめて取得
+
+        投稿日の in クエリ（30件ずつ）で一括取得し、スロットの一致と
+        scheduledAt を持たないことをメモリ上で判定する
+
+        Args:
+            slots: (投稿日 YYYY/MM/DD, スロット番号) のリスト
+
+        Returns:
+            投稿データのリスト（slots の順）
+        """
+        if not slots:
+            return []
+
+        slot_order = {slot: i for i, slot in enumerate(slots)}
+        dates = sorted({date_str for date_str, _ in slots})
+
+        try:
+            posts = []
+            for i in range(0, len(dates), MAX_IN_FILTER_VALUES):
+                docs = (
+                    self._db.collection("posts")
+                    .where(
+                        filter=FieldFilter(
+                            "postDate", "in", dates[i : i + MAX_IN_FILTER_VALUES]
+                        )
+                    )
+                    .where(filter=FieldFilter("isPosted", "==", False))
+                    .stream()
+                )
+                for doc in docs:
+                    post = Post.from_snapshot(doc)
+                    key = (post.post_date, post.time_slot)
+                    if key not in slot_order or post.scheduled_at is not None:
+                        continue
+                    # 失敗・延期済みの投稿は再試行キューで扱うため除外
+                    if (post.status or POST_STATUS_PENDING) != POST_STATUS_PENDING:
+                        continue
+                    posts.append(post)
+
+            posts.sort(key=lambda p: slot_order[(p.post_date, p.time_slot)])
+            logger.info(f"未処理スロットの投稿取得: {len(posts)}件 ({len(slots)}スロット)")
+            return posts
+        except Exception as e:
+            logger.error(f"未処理スロットの投稿取得エラー: {e}")
+            return []
+
+    def get_due_posts(
+        self, now: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[Post]:
+        """
+        予約時刻（scheduledAt）を過ぎた予約中の投稿を取得
+
+        status と scheduledAt の複合インデックスを使う1回の範囲クエリで、
+        予約時刻の古い順に取得する
+
+        Args:
+            now: 基準時刻（None の場合は現在時刻）
+            limit: 最大取得件数（None の場合は Config.DUE_POSTS_BATCH_LIMIT）
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        if limit is None:
+            limit = Config.DUE_POSTS_BATCH_LIMIT
+
+        try:
+            docs = (
+                self._db.collection("posts")
+                .where(filter=FieldFilter("status", "==", POST_STATUS_PENDING))
+                .where(filter=FieldFilter("scheduledAt", "<=", now))
+                .order_by("scheduledAt")
+                .limit(limit)
+                .stream()
+            )
+
+            posts = [Post.from_snapshot(doc) for doc in docs]
+
+            logger.info(f"予約時刻到来の投稿取得: {len(posts)}件")
+            return posts
+        except Exception as e:
+            logger.error(f"予約時刻到来の投稿取得エラー: {e}")
+            return []
+
+    def get_due_retry_posts(
+        self, now: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[Post]:
+        """
+        再試行時刻を過ぎた未投稿の投稿を取得
+
+        isPosted と nextAttemptAt の複合インデックスを使う1回のクエリで取得する。
+        nextAttemptAt が null（恒久エラー・再試行上限）の投稿は対象外
+
+        Args:
+            now: 基準時刻（None の場合は現在時刻）
+            limit: 最大取得件数（None の場合は Config.RETRY_BATCH_LIMIT）
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        if limit is None:
+            limit = Config.RETRY_BATCH_LIMIT
+
+        try:
+            docs = (
+                self._db.collection("posts")
+                .where(filter=FieldFilter("isPosted", "==", False))
+                .where(filter=FieldFilter("nextAttemptAt", "<=", now))
+                .order_by("nextAttemptAt")
+                .limit(limit)
+                .stream()
+            )
+
+            posts = [Post.from_snapshot(doc) for doc in docs]
+
+            logger.info(f"再試行対象の投稿取得: {len(posts)}件")
+            return posts
+        except Exception as e:
+            logger.error(f"再試行対象の投稿取得エラー: {e}")
+            return []
+
+    def get_expired_lease_posts(
+        self, now: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[Post]:
+        """
+        リースの期限が切れたまま送信中（processing）になっている投稿を取得
+
+        処理中に異常終了したワーカーが占有していた投稿を回収するために使う
+
+        Args:
+            now: 基準時刻（None の場合は現在時刻）
+            limit: 最大取得件数（None の場合は Config.RETRY_BATCH_LIMIT）
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        if limit is None:
+            limit = Config.RETRY_BATCH_LIMIT
+
+        try:
+            docs = (
+                self._db.collection("posts")
+                .where(filter=FieldFilter("status", "==", POST_STATUS_PROCESSING))
+                .where(filter=FieldFilter("leaseExpiresAt", "<=", now))
+                .order_by("leaseExpiresAt")
+                .limit(limit)
+                .stream()
+            )
+
+            posts = [Post.from_snapshot(doc) for doc in docs]
+
+            if posts:
+                logger.warning(f"リース期限切れの投稿取得: {len(posts)}件")
+            return posts
+        except Exception as e:
+            logger.error(f"リース期限切れの投稿取得エラー: {e}")
+            return []
+
+    def mark_expired_leases_unknown(
+        self, now: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> int:
+        """
+        リースの期限が切れた送信中の投稿を送信結果不明（unknown）として記録
+
+        異常終了したワーカーが送信した後、投稿済みの記録前に停止した可能性があるため、
+        再送せずに確認待ちにする
+
+        Args:
+            now: 基準時刻（None の場合は現在時刻）
+            limit: 最大件数（None の場合は Config.RETRY_BATCH_LIMIT）
+
+        Returns:
+            送信結果不明として記録した件数
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+
+        marked = 0
+        for post in self.get_expired_lease_posts(now, limit):
+            doc_ref = self._db.collection("posts").document(post.id)
+
+            @firestore.transactional
+            def mark_in_transaction(transaction) -> bool:
+                snapshot = doc_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    return False
+                # 取得後に他のワーカーが記録を終えた投稿は変更しない
+                if not _lease_expired(Post.from_snapshot(snapshot), now):
+                    return False
+                transaction.update(doc_ref, _build_unknown_status_update())
+                return True
+
+            try:
+                if mark_in_transaction(self._db.transaction()):
+                    marked += 1
+                    logger.warning(f"リース期限切れの投稿を送信結果不明として記録: {post.id}")
+            except Exception as e:
+                logger.error(f"送信結果不明の記録エラー: {post.id}: {e}")
+        return marked
+
+    def claim_post(
         self,
         post_id: str,
-        is_posted: bool,
-        x_post_id: Optional[str] = None,
-        error_message: Optional[str] = None,
+        owner: str,
+        lease_seconds: Optional[int] = None,
+        now: Optional[datetime] = None,
     ) -> bool:
-        """投稿ステータスを更新"""
-        try:
+        """
+        投稿をトランザクションで取得し、送信中（processing）としてリースする
+
+        投稿済み、他のワーカーがリース中、送信結果不明、または再試行時刻前の
+        投稿は取得できない。リースの期限が切れた送信中の投稿は送信済みの
+        可能性があるため取得し直さず、送信結果不明（unknown）として記録する。
+        ownerId を持たない旧形式の投稿には既定のユーザーを記録し、投稿済みになった後の
+        ownerId で絞り込む件数の集計・重複判定に含まれるようにする
+
+        Args:
+            post_id: 投稿ID
+            owner: リースを取得するワーカーの識別子
+            lease_seconds: リースの有効秒数（None の場合は Config.POST_LEASE_SECONDS）
+            now: 基準時刻（None の場合は現在時刻）
+
+        Returns:
+            リースを取得できたかどうか
+        """
+        if lease_seconds is None:
+            lease_seconds = Config.POST_LEASE_SECONDS
+        if now is None:
+            now = datetime.now(timezone.utc)
+
+        doc_ref = self._db.collection("posts").document(post_id)
+        lease_expired: List[str] = []
+
+        @firestore.transactional
+        def claim_in_transaction(transaction) -> bool:
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+
+            post = Post.from_snapshot(snapshot)
+            if post.is_posted:
+                return False
+
+            if post.status == POST_STATUS_PROCESSING:
+                if _lease_expired(post, now):
+                    # 送信済みの可能性があるため再送せず、送信結果不明として記録
+                    transaction.update(doc_ref, _build_unknown_status_update())
+                    lease_expired.append(post_id)
+                return False
+
+            if post.status == POST_STATUS_UNKNOWN:
+                return False
+
+            if (
+                post.status == POST_STATUS_DEFERRED
+                and post.next_attempt_at
+                and post.next_attempt_at > now
+            ):
+                return False
+
             update_data = {
-                "isPosted": is_posted,
+                "status": POST_STATUS_PROCESSING,
+                "leaseOwner": owner,
+                "leaseExpiresAt": now + timedelta(seconds=lease_seconds),
                 "updatedAt": firestore.SERVER_TIMESTAMP,
             }
+            if not post.owner_id:
+                update_data["ownerId"] = Config.DEFAULT_OWNER_ID
+            transaction.update(doc_ref, update_data)
+            return True
 
-            if is_posted and x_post_id:
-                update_data["postedAt"] = firestore.SERVER_TIMESTAMP
-                update_data["xPostId"] = x_post_id
+        try:
+            claimed = claim_in_transaction(self._db.transaction())
+            if lease_expired:
+                logger.warning(f"リース期限切れの投稿を送信結果不明として記録: {post_id}")
+            elif not claimed:
+                logger.info(f"投稿は取得済みまたは処理対象外: {post_id}")
+            return claimed
+        except Exception as e:
+            logger.error(f"投稿リース取得エラー: {e}")
+            return False
 
-            if error_message:
-                update_data["errorMessage"] = error_message
+    def update_post_status(
+        self,
+        post_id: str,
+        is_posted: bool,
+        x_post_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+        next_attempt_at: Optional[datetime] = None,
+        attempt_count: Optional[int] = None,
+        last_error_class: Optional[str] = None,
+        counter_deltas: Optional[List[CounterDelta]] = None,
+        hash_entries: Optional[List[HashEntry]] = None,
+    ) -> bool:
+        """
+        投稿ステータスを更新
 
-            self._db.collection("posts").document(post_id).update(update_data)
+        next_attempt_at を指定すると、その時刻以降に再処理する投稿として記録する。
+        attempt_count / last_error_class は再試行メタデータとして保存する。
+        counter_deltas は投稿数カウンターの増減、hash_entries は投稿済みの
+        投稿内容の索引への追加として同じバッチで書き込む
+        """
+        try:
+            writer = PostStatusWriter(self._db, batch_size=1)
+            writer.update_post_status(
+                post_id,
+                is_posted,
+                x_post_id,
+                error_message,
+                next_attempt_at,
+                attempt_count,
+                last_error_class,
+                counter_deltas,
+                hash_entries,
+            )
+            failures = writer.flush()
+            if failures:
+                raise RuntimeError(failures[post_id])
             logger.info(f"投稿ステータス更新: {post_id}, 投稿済み: {is_posted}")
             return True
         except Exception as e:
             logger.error(f"投稿更新エラー: {e}")
             return False
 
+    def count_posted_since(
+        self, since: datetime, owner_id: Optional[str] = None
+    ) -> Optional[int]:
+        """
+        指定時刻以降に投稿済みになった件数を集計クエリで取得
+
+        ownerId を持たない旧形式の投稿は、送信時（claim_post）に既定のユーザーが
+        記録されるため、既定のユーザーの件数に含まれる
+
+        Args:
+            since: 集計開始時刻
+            owner_id: 集計対象の投稿者（None の場合はすべての投稿者）
+
+        Returns:
+            投稿済み件数（取得できない場合は None）
+        """
+        try:
+            query = self._db.collection("posts").where(
+                filter=FieldFilter("isPosted", "==", True)
+            )
+            if owner_id is not None:
+                query = query.where(filter=FieldFilter("ownerId", "==", owner_id))
+            query = query.where(filter=FieldFilter("postedAt", ">=", since))
+
+            result = query.count(alias="count").get()
+            return int(result[0][0].value)
+        except Exception as e:
+            logger.error(f"投稿件数集計エラー: {e}")
+            return None
+
+    def count_posted_last_24_hours(
+        self, owner_id: Optional[str] = None
+    ) -> Optional[int]:
+        """直近24時間に投稿済みになった件数を取得"""
+        return self.count_posted_since(
+            datetime.now(timezone.utc) - timedelta(days=1), owner_id=owner_id
+        )
+
+    def get_post_quota(
+        self, owner_id: str, day: Optional[date] = None
+    ) -> Optional[Dict[str, int]]:
+        """
+        アカウントの1日・1か月の投稿数と残りを、カウンタードキュメント1件の読み取りで取得
+
+        Args:
+            owner_id: アカウント（トークンを保存しているユーザーID）
+            day: 対象日（None の場合は今日、JST）
+
+        Returns:
+            summarize_quota() の辞書（取得できない場合は None）
+        """
+        if day is None:
+            day = quota_day()
+        try:
+            doc = (
+                self._db.collection(COUNTERS_COLLECTION)
+                .document(counter_doc_id(owner_id, day))
+                .get()
+            )
+            return summarize_quota(doc.to_dict() if doc.exists else None, day)
+        except Exception as e:
+            logger.error(f"投稿数カウンター取得エラー: {e}")
+            return None
+
+    # === 投稿内容の索引（重複検出） ===
+
+    def get_recent_post_hashes(
+        self, owner_id: str, now: Optional[datetime] = None
+    ) -> Dict[str, str]:
+        """
+        アカウントの重複判定の期間内に投稿済みの投稿内容のハッシュを、
+        索引ドキュメント1件の読み取りで取得
+
+        Returns:
+            contentHash と投稿IDの辞書（取得できない場合は空）
+        """
+        try:
+            doc = self._db.collection(POST_HASHES_COLLECTION).document(owner_id).get()
+            return recent_hashes(doc.to_dict() if doc.exists else None, now)
+        except Exception as e:
+            logger.error(f"投稿内容の索引取得エラー: {e}")
+            return {}
+
+    def prune_post_hashes(self, now: Optional[datetime] = None) -> Tuple[int, List[str]]:
+        """
+        重複判定の期間を過ぎたハッシュを索引から削除
+
+        Returns:
+            (削除した件数, エラーメッセージのリスト)
+        """
+        pruned = 0
+        errors: List[str] = []
+        try:
+            docs = list(self._db.collection(POST_HASHES_COLLECTION).stream())
+        except Exception as e:
+            logger.error(f"投稿内容の索引取得エラー: {e}")
+            return 0, [str(e)]
+
+        for doc in docs:
+            stale = stale_hashes(doc.to_dict(), now)
+            if not stale:
+                continue
+            try:
+                doc.reference.update(
+                    {f"hashes.{digest}": firestore.DELETE_FIELD for digest in stale}
+                )
+                pruned += len(stale)
+            except Exception as e:
+                error_msg = f"投稿内容の索引の削除エラー ({doc.id}): {e}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+
+        logger.info(f"投稿内容の索引から期限切れのハッシュを削除: {pruned}件")
+        return pruned, errors
+
+    # === Scheduler チェックポイント ===
+
+    def get_scheduler_checkpoint(self, name: str = "auto_poster") -> Optional[datetime]:
+        """最後に正常終了した実行時刻を取得（未記録の場合は None）"""
+        try:
+            doc = self._db.collection("scheduler").document(name).get()
+            if doc.exists:
+                return doc.to_dict().get("lastSuccessfulRunAt")
+            return None
+        except Exception as e:
+            logger.error(f"チェックポイント取得エラー: {e}")
+            return None
+
+    def save_scheduler_checkpoint(
+        self, run_at: datetime, name: str = "auto_poster"
+    ) -> bool:
+        """正常終了した実行時刻をチェックポイントとして保存"""
+        try:
+            self._db.collection("scheduler").document(name).set(
+                {
+                    "lastSuccessfulRunAt": run_at,
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                },
+                merge=True,
+            )
+            logger.info(f"チェックポイント保存: {name} {run_at.isoformat()}")
+            return True
+        except Exception as e:
+            logger.error(f"チェックポイント保存エラー: {e}")
+            return False
+
+    def archive_posted_posts(
+        self, cutoff: datetime, limit: Optional[int] = None
+    ) -> Tuple[int, List[str]]:
+        """
+        cutoff より前に投稿済みになった投稿を、アカウント・月ごとのアーカイブに移す
+
+        アーカイブへの書き込みと posts からの削除は同じバッチでコミットするため、
+        途中で失敗しても投稿が失われたり二重に格納されたりしない
+
+        Args:
+            cutoff: この時刻より前に投稿された投稿を対象とする
+            limit: 1回で移す最大件数（None の場合は Config.ARCHIVE_BATCH_LIMIT）
+
+        Returns:
+            (移した件数, エラーメッセージのリスト)。対象の取得に失敗した場合は (0, [エラー])
+        """
+        if limit is None:
+            limit = Config.ARCHIVE_BATCH_LIMIT
+
+        try:
+            docs = (
+                self._db.collection("posts")
+                .where(filter=FieldFilter("isPosted", "==", True))
+                .where(filter=FieldFilter("postedAt", "<", cutoff))
+                .order_by("postedAt")
+                .limit(limit)
+                .stream()
+            )
+            posts = [Post.from_snapshot(doc) for doc in docs]
+        except Exception as e:
+            logger.error(f"アーカイブ対象の投稿取得エラー: {e}")
+            return 0, [str(e)]
+
+        groups: Dict[Tuple[str, str], List[Post]] = {}
+        for post in posts:
+            owner_id = post.owner_id or Config.DEFAULT_OWNER_ID
+            groups.setdefault((owner_id, archive_month(post)), []).append(post)
+
+        archived = 0
+        errors: List[str] = []
+        # 1バッチ = アーカイブドキュメントへの書き込み1件 + 投稿の削除
+        chunk_size = MAX_BATCH_WRITES - 1
+        for (owner_id, month), group in groups.items():
+            archive_ref = self._db.collection(ARCHIVE_COLLECTION).document(
+                archive_doc_id(owner_id, month)
+            )
+            for start in range(0, len(group), chunk_size):
+                chunk = group[start : start + chunk_size]
+                try:
+                    batch = self._db.batch()
+                    batch.set(
+                        archive_ref,
+                        {
+                            "ownerId": owner_id,
+                            "month": month,
+                            "count": firestore.Increment(len(chunk)),
+                            "posts": {post.id: to_archive_entry(post) for post in chunk},
+                            "updatedAt": firestore.SERVER_TIMESTAMP,
+                        },
+                        merge=True,
+                    )
+                    for post in chunk:
+                        batch.delete(self._db.collection("posts").document(post.id))
+                    batch.commit()
+                    archived += len(chunk)
+                except Exception as e:
+                    error_msg = f"アーカイブ書き込みエラー ({archive_ref.id}): {e}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+
+        logger.info(f"投稿をアーカイブに移動: {archived}件")
+        return archived, errors
+
+    def status_writer(self, batch_size: Optional[int] = None) -> PostStatusWriter:
+        """
+        投稿ステータスをまとめて書き込むライターを作成
+
+        Args:
+            batch_size: 1コミットあたりの件数（None の場合は Config.STATUS_WRITE_BATCH_SIZE）
+
+        Returns:
+            PostStatusWriter インスタンス
+        """
+        if batch_size is None:
+            batch_size = Config.STATUS_WRITE_BATCH_SIZE
+        return PostStatusWriter(self._db, batch_size)
+
 
 def get_firestore_client() -> FirestoreClient:
     """Firestoreクライアントのシングルトンインスタンスを取得"""
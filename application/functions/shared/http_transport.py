@@ -0,0 +1,149 @@
+"""
+共有HTTPトランスポート (Azure Functions版)
+
+X API 向けの通信で使用する requests.Session をプロセス全体で共有し、
+Keep-Alive 接続をプールして再利用します。
+ウォーム状態のインスタンスでは実行をまたいで TCP/TLS 接続が再利用されます。
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - 非同期クライアントを使わない環境
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - h2 がない場合は HTTP/1.1 で接続
+    HTTP2_AVAILABLE = False
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+# イベントループごとの非同期クライアント（httpx.AsyncClient はループをまたいで使えない）
+_async_clients: "dict[asyncio.AbstractEventLoop, httpx.AsyncClient]" = {}
+
+
+def _create_session() -> requests.Session:
+    """接続プール設定済みのセッションを作成"""
+    session = requests.Session()
+
+    # ホストごとの接続数上限を pool_maxsize で制限し、上限到達時は空きを待つ
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        pool_block=True,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    logger.info(
+        f"共有HTTPセッション作成: pool_connections={Config.HTTP_POOL_CONNECTIONS}, "
+        f"pool_maxsize={Config.HTTP_POOL_MAXSIZE}"
+    )
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    プロセス共有の requests.Session を取得
+
+    Returns:
+        接続プール付きの requests.Session
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def get_timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """
+    接続タイムアウトと読み取りタイムアウトの組を取得
+
+    Args:
+        read_timeout: 読み取りタイムアウト（秒、None の場合は設定値）
+
+    Returns:
+        requests に渡す (connect, read) タイムアウト
+    """
+    if read_timeout is None:
+        read_timeout = Config.HTTP_READ_TIMEOUT
+    return (Config.HTTP_CONNECT_TIMEOUT, read_timeout)
+
+
+def close_http_session() -> None:
+    """共有セッションをクローズ（次回取得時に再作成される）"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _create_async_client() -> "httpx.AsyncClient":
+    """HTTP/2 で接続を多重化する httpx.AsyncClient を作成"""
+    if httpx is None:
+        raise RuntimeError("非同期クライアントには httpx が必要です")
+    if not HTTP2_AVAILABLE:
+        logger.warning("h2 がインストールされていないため HTTP/1.1 で接続します")
+
+    # HTTP/2 では1本の接続に複数のリクエストを多重化するため、接続数の上限は
+    # HTTP/1.1 にフォールバックした場合にだけ効く
+    client = httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(
+            Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=Config.HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=Config.HTTP_POOL_MAXSIZE,
+        ),
+    )
+    logger.info(f"共有非同期HTTPクライアント作成: http2={HTTP2_AVAILABLE}")
+    return client
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """
+    実行中のイベントループで共有する httpx.AsyncClient を取得
+
+    同じイベントループ上の非同期クライアントは1つの HTTP/2 接続を共有する
+
+    Returns:
+        接続プール付きの httpx.AsyncClient
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            # 終了したイベントループのクライアントは破棄する
+            for old_loop in [lp for lp in _async_clients if lp.is_closed()]:
+                del _async_clients[old_loop]
+            client = _async_clients[loop] = _create_async_client()
+    return client
+
+
+async def close_async_http_client() -> None:
+    """実行中のイベントループの共有非同期クライアントをクローズ"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -6,13 +6,21 @@ OAuth 2.0 リフレッシュトークンを使用してアクセストークン
 
 import base64
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
 
 import requests
 
+from .circuit_breaker import get_latency_tracker
+from .config import Config
+from .http_transport import get_http_session, get_timeout
+
 logger = logging.getLogger(__name__)
 
+# 有効期限の判定に持たせる余裕
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=5)
+
 
 class TokenError(Exception):
     """トークン関連エラー"""
@@ -34,7 +42,7 @@ class OAuthClient:
 
         self.client_id = client_id
         self.client_secret = client_secret
-        self.token_url = "https://api.x.com/2/oauth2/token"
+        self.token_url = f"{Config.X_API_BASE_URL}/oauth2/token"
 
     def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
         """
@@ -51,7 +59,7 @@ class OAuthClient:
                 "expires_in": int,
                 "refresh_token": str (optional),
                 "scope": str,
-                "expires_at": str (ISO format)
+                "expires_at": str (ISO format, UTC)
             }
 
         Raises:
@@ -78,8 +86,8 @@ class OAuthClient:
         try:
             logger.info("アクセストークンのリフレッシュを開始")
 
-            response = requests.post(
-                self.token_url, data=data, headers=headers, timeout=30
+            response = get_http_session().post(
+                self.token_url, data=data, headers=headers, timeout=get_timeout()
             )
 
             if response.status_code == 200:
@@ -87,7 +95,7 @@ class OAuthClient:
 
                 # 有効期限を計算
                 expires_in = token_data.get("expires_in", 7200)  # デフォルト2時間
-                expires_at = datetime.now() + timedelta(seconds=expires_in)
+                expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
                 token_data["expires_at"] = expires_at.isoformat()
 
                 logger.info("アクセストークンのリフレッシュに成功")
@@ -121,15 +129,37 @@ class OAuthClient:
 
         try:
             expires_at = datetime.fromisoformat(token_data["expires_at"])
-            # 5分の余裕を持たせる
-            return datetime.now() >= expires_at - timedelta(minutes=5)
+            return self.is_expired_at(expires_at)
         except (ValueError, TypeError):
             return True
 
+    @staticmethod
+    def is_expired_at(expires_at: Optional[datetime]) -> bool:
+        """
+        有効期限日時が過ぎている（または間近）かどうかを確認
+
+        Args:
+            expires_at: 有効期限（タイムゾーンなしの場合はローカル時刻とみなす）
+
+        Returns:
+            期限切れかどうか（有効期限が不明な場合も True）
+        """
+        if expires_at is None:
+            return True
+
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.astimezone(timezone.utc)
+
+        # 5分の余裕を持たせる
+        return datetime.now(timezone.utc) >= expires_at - TOKEN_EXPIRY_MARGIN
+
     def verify_token(self, access_token: str) -> bool:
         """
         アクセストークンの検証（X APIのユーザー情報エンドポイントを使用）
 
+        冪等な GET のため、読み取りタイムアウトは X API への直近の応答時間から決める
+        （10秒が上限）
+
         Args:
             access_token: アクセストークン
 
@@ -141,10 +171,15 @@ class OAuthClient:
             "Content-Type": "application/json",
         }
 
+        latency = get_latency_tracker(Config.X_API_BASE_URL)
+        start = time.monotonic()
         try:
-            response = requests.get(
-                "https://api.x.com/2/users/me", headers=headers, timeout=10
+            response = get_http_session().get(
+                f"{Config.X_API_BASE_URL}/users/me",
+                headers=headers,
+                timeout=get_timeout(min(10.0, latency.read_timeout())),
             )
+            latency.record(time.monotonic() - start)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
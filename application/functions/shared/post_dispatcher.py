@@ -0,0 +1,164 @@
+"""
+投稿ディスパッチャー (Azure Functions版)
+
+X API のレート制限ヘッダーと 1日の投稿上限（Config.DAILY_POST_LIMIT）に
+合わせて投稿を払い出します。上限に達した場合は投稿を失敗させずに、
+再開可能な時刻を返して残りの投稿を延期できるようにします。
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .config import Config
+from .x_api_client import get_rate_limit_reset
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class TokenBucket:
+    """トークンバケット（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        tokens: Optional[float] = None,
+    ):
+        """
+        Args:
+            capacity: バケットの容量
+            refill_per_second: 1秒あたりに補充されるトークン数
+            tokens: 初期トークン数（None の場合は満タン）
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity if tokens is None else min(tokens, capacity)
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """経過時間分のトークンを補充"""
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated_at = now
+
+    def try_acquire(self) -> float:
+        """
+        トークンを1つ取得
+
+        Returns:
+            取得できた場合は 0、できない場合は次のトークンが補充されるまでの秒数
+        """
+        with self._lock:
+            now = time.time()
+            self._refill(now)
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+            if self.refill_per_second <= 0:
+                return float("inf")
+            return (1 - self._tokens) / self.refill_per_second
+
+    @property
+    def tokens(self) -> float:
+        """現在のトークン数"""
+        with self._lock:
+            self._refill(time.time())
+            return self._tokens
+
+
+class PostDispatcher:
+    """レート制限と1日の投稿上限に合わせて投稿を払い出すディスパッチャー（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        daily_limit: Optional[int] = None,
+        daily_used: int = 0,
+        quota_reset_at: Optional[datetime] = None,
+    ):
+        """
+        Args:
+            daily_limit: 24時間あたりの投稿上限（None の場合は Config.DAILY_POST_LIMIT）
+            daily_used: 直近24時間（quota_reset_at を指定した場合は今日・今月）に投稿済みの件数
+            quota_reset_at: 日付・月ごとの投稿数カウンターで数えている場合に、
+                上限が戻る時刻（UTC）。残りが尽きた投稿はこの時刻まで延期する
+        """
+        if daily_limit is None:
+            daily_limit = Config.DAILY_POST_LIMIT
+
+        # 24時間で daily_limit 件ぶん補充されるバケット
+        # （カウンターは日付・月の切り替わりでまとめて戻るため、その場合は補充しない）
+        self._bucket = TokenBucket(
+            capacity=daily_limit,
+            refill_per_second=(
+                0.0 if quota_reset_at is not None else daily_limit / SECONDS_PER_DAY
+            ),
+            tokens=max(0, daily_limit - daily_used),
+        )
+        self._quota_reset_at = quota_reset_at
+        self._blocked_until: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[datetime]:
+        """
+        投稿の送信枠を取得
+
+        Returns:
+            送信可能な場合は None、送信できない場合は再開可能な時刻（UTC）
+        """
+        with self._lock:
+            now = time.time()
+            if self._blocked_until is not None and now < self._blocked_until:
+                return datetime.fromtimestamp(self._blocked_until, timezone.utc)
+
+        wait_seconds = self._bucket.try_acquire()
+        if wait_seconds > 0 and self._quota_reset_at is not None:
+            return self._quota_reset_at
+        if wait_seconds > 0:
+            return datetime.fromtimestamp(
+                time.time() + min(wait_seconds, SECONDS_PER_DAY), timezone.utc
+            )
+        return None
+
+    def record_rate_limits(self, rate_limits: Dict[str, Dict[str, int]]) -> None:
+        """
+        レスポンスのレート制限情報を反映
+
+        Args:
+            rate_limits: XAPIClient.get_rate_limit() の戻り値
+        """
+        reset_time = get_rate_limit_reset(rate_limits)
+        if reset_time:
+            logger.warning(
+                f"Rate limit budget exhausted until "
+                f"{datetime.fromtimestamp(reset_time, timezone.utc).isoformat()}"
+            )
+            self._block_until(reset_time)
+
+    def on_rate_limited(self, reset_time: Optional[int] = None) -> datetime:
+        """
+        429 を受けた場合に以降の送信を停止
+
+        Args:
+            reset_time: レート制限の解除時刻（UNIX時刻、不明な場合は None）
+
+        Returns:
+            再開可能な時刻（UTC）
+        """
+        if not reset_time:
+            reset_time = time.time() + Config.RATE_LIMIT_DEFAULT_BACKOFF_SECONDS
+        self._block_until(reset_time)
+        return datetime.fromtimestamp(reset_time, timezone.utc)
+
+    def _block_until(self, reset_time: float) -> None:
+        """指定時刻まで送信を停止"""
+        with self._lock:
+            if self._blocked_until is None or reset_time > self._blocked_until:
+                self._blocked_until = reset_time
@@ -0,0 +1,149 @@
+"""
+投稿内容の重複検出 (Azure Functions版)
+
+X は同じ内容のツイートを 403 で拒否するため、正規化した投稿内容のハッシュ
+（posts の contentHash）と、アカウントごとの直近に投稿済みのハッシュの索引
+（postHashes/{ownerId}）で、送信前に重複を検出します。
+索引は投稿ステータスと同じバッチで更新するため、1回のドキュメント読み取りと
+辞書の参照で判定できます。
+フロントエンドの db/post_hashes.py と同じ定義です。
+
+ドキュメントの形式:
+    ownerId: 対象アカウント
+    hashes: {contentHash: {postId, postedAt}} 直近に投稿済みの投稿
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from .config import Config
+
+POST_HASHES_COLLECTION = "postHashes"
+
+# (アカウント, contentHash, 投稿ID)
+HashEntry = Tuple[str, str, str]
+
+_TRAILING_SPACES = re.compile(r"[ \t　]+$", re.MULTILINE)
+
+
+def normalize_content(content: str) -> str:
+    """
+    重複判定用に投稿内容を正規化
+
+    NFC 正規化・改行コードの統一・行末と前後の空白の除去を行う
+    （X が同じ内容とみなす範囲に合わせ、文中の空白や大文字小文字は変えない）
+    """
+    text = unicodedata.normalize("NFC", content or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_SPACES.sub("", text).strip()
+
+
+def content_hash(content: str) -> str:
+    """正規化した投稿内容のハッシュ（SHA-256 の16進文字列）"""
+    return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+
+
+def duplicate_window_start(now: Optional[datetime] = None) -> datetime:
+    """この時刻以降に投稿済みになった同じ内容を重複とみなす"""
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return now - timedelta(hours=Config.DUPLICATE_WINDOW_HOURS)
+
+
+def recent_hashes(
+    data: Optional[Dict[str, Any]], now: Optional[datetime] = None
+) -> Dict[str, str]:
+    """
+    索引ドキュメントのデータから、重複判定の期間内のハッシュを取得
+
+    Returns:
+        contentHash と投稿IDの辞書
+    """
+    since = duplicate_window_start(now)
+    hashes = {}
+    for digest, entry in ((data or {}).get("hashes") or {}).items():
+        posted_at = entry.get("postedAt")
+        if posted_at is None or posted_at >= since:
+            hashes[digest] = entry.get("postId")
+    return hashes
+
+
+def stale_hashes(
+    data: Optional[Dict[str, Any]], now: Optional[datetime] = None
+) -> List[str]:
+    """重複判定の期間を過ぎた（索引から削除できる）ハッシュを取得"""
+    since = duplicate_window_start(now)
+    return [
+        digest
+        for digest, entry in ((data or {}).get("hashes") or {}).items()
+        if entry.get("postedAt") is not None and entry["postedAt"] < since
+    ]
+
+
+def build_hash_updates(entries: Iterable[HashEntry]) -> Dict[str, Dict[str, Any]]:
+    """
+    投稿済みになった投稿のハッシュを索引ドキュメントごとにまとめ、
+    set(merge=True) 用のデータを作成
+
+    Returns:
+        ドキュメントIDと書き込みデータの辞書
+    """
+    updates: Dict[str, Dict[str, Any]] = {}
+    for owner_id, digest, post_id in entries:
+        data = updates.setdefault(
+            owner_id,
+            {
+                "ownerId": owner_id,
+                "hashes": {},
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        data["hashes"][digest] = {
+            "postId": post_id,
+            "postedAt": firestore.SERVER_TIMESTAMP,
+        }
+    return updates
+
+
+class RecentHashIndex:
+    """
+    1回の実行で送信する投稿の重複を判定するアカウントごとの索引
+
+    索引ドキュメントから読み取った投稿済みのハッシュに、実行中に送信する
+    投稿のハッシュを予約として加える。同じ内容の投稿を並列に送信しないよう、
+    予約はスレッドセーフに行う
+    """
+
+    def __init__(self, hashes: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            hashes: recent_hashes() の戻り値（投稿済みのハッシュと投稿ID）
+        """
+        self._hashes: Dict[str, str] = dict(hashes or {})
+        self._lock = threading.Lock()
+
+    def reserve(self, digest: str, post_id: str) -> Optional[str]:
+        """
+        ハッシュを送信中の投稿に予約
+
+        Returns:
+            同じ内容の投稿済み・送信中の投稿ID（重複がなく予約できた場合は None）
+        """
+        with self._lock:
+            existing = self._hashes.get(digest)
+            if existing is not None and existing != post_id:
+                return existing
+            self._hashes[digest] = post_id
+            return None
+
+    def release(self, digest: str, post_id: str) -> None:
+        """送信できなかった投稿の予約を解除"""
+        with self._lock:
+            if self._hashes.get(digest) == post_id:
+                del self._hashes[digest]
@@ -0,0 +1,49 @@
+"""
+再試行ポリシー (Azure Functions版)
+
+一時的なエラーで失敗した投稿の再試行可否と、
+指数バックオフ＋ジッターによる次回試行時刻を決定します。
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from .config import Config
+from .x_api_client import NetworkError, RateLimitError, ServerError
+
+# 再試行する一時的なエラー（BadRequestError や認証エラーは再試行しない）
+RETRYABLE_ERRORS = (ServerError, NetworkError, RateLimitError)
+
+
+def is_retryable(error: Exception) -> bool:
+    """再試行対象のエラーかどうかを判定"""
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def compute_next_attempt_at(
+    attempt_count: int, now: Optional[datetime] = None
+) -> Optional[datetime]:
+    """
+    次回の試行時刻を計算
+
+    Args:
+        attempt_count: これまでの試行回数（今回の失敗を含む）
+        now: 基準時刻（None の場合は現在時刻）
+
+    Returns:
+        次回の試行時刻（UTC）。試行回数の上限に達した場合は None
+    """
+    if attempt_count >= Config.RETRY_MAX_ATTEMPTS:
+        return None
+
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    # 指数バックオフ（上限あり）に、同時再試行が集中しないようジッターを加える
+    delay = min(
+        Config.RETRY_MAX_DELAY_SECONDS,
+        Config.RETRY_BASE_DELAY_SECONDS * (2 ** max(0, attempt_count - 1)),
+    )
+    delay = random.uniform(delay / 2, delay)
+    return now + timedelta(seconds=delay)
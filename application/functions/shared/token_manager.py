@@ -0,0 +1,174 @@
+"""
+アクセストークン管理 (Azure Functions版)
+
+Firestoreに保存された有効期限をもとに、リフレッシュが必要かどうかを
+ローカルで判定します。有効期限が不明な場合のみ X API で検証し、
+投稿時に 401 が返った場合はリフレッシュして再試行できるようにします。
+リフレッシュトークンは1回限りのため、別のプロセスが先にリフレッシュして
+失敗した場合は、保存済みのトークンを読み直して1回だけやり直します。
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .oauth_client import OAuthClient, TokenError
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """1回のスケジューラー実行中に使用するアクセストークンを管理（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        fs_client,
+        tokens: Dict[str, Any],
+        oauth_client: Optional[OAuthClient] = None,
+        user_id: str = "main_user",
+    ):
+        """
+        Args:
+            fs_client: Firestoreクライアント（リフレッシュ後のトークン保存用）
+            tokens: get_user_tokens() の戻り値
+            oauth_client: トークンリフレッシュ用クライアント（未設定の場合はリフレッシュ不可）
+            user_id: トークンを保存するユーザーID
+        """
+        self.fs_client = fs_client
+        self.oauth_client = oauth_client
+        self.user_id = user_id
+        self._access_token: Optional[str] = tokens.get("access_token")
+        self._refresh_token: Optional[str] = tokens.get("refresh_token")
+        self._expires_at: Optional[datetime] = tokens.get("expires_at")
+        self._lock = threading.Lock()
+
+    @property
+    def access_token(self) -> Optional[str]:
+        """現在のアクセストークン"""
+        with self._lock:
+            return self._access_token
+
+    @property
+    def refresh_token(self) -> Optional[str]:
+        """現在のリフレッシュトークン"""
+        with self._lock:
+            return self._refresh_token
+
+    @property
+    def can_refresh(self) -> bool:
+        """リフレッシュが可能かどうか"""
+        return self.oauth_client is not None and bool(self.refresh_token)
+
+    def needs_refresh(self) -> bool:
+        """
+        アクセストークンのリフレッシュが必要かどうかを判定
+
+        有効期限が保存されていればローカルで判定し、
+        不明な場合のみ X API の /2/users/me で検証する
+
+        Returns:
+            リフレッシュが必要かどうか
+        """
+        if self.oauth_client is None:
+            return False
+
+        with self._lock:
+            expires_at = self._expires_at
+            access_token = self._access_token
+
+        if expires_at is not None:
+            if OAuthClient.is_expired_at(expires_at):
+                logger.info(f"Access token expired at {expires_at.isoformat()}")
+                return True
+            logger.info(f"Access token is valid until {expires_at.isoformat()}")
+            return False
+
+        logger.info("Token expiry unknown, validating access token remotely")
+        return not self.oauth_client.verify_token(access_token)
+
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """
+        リフレッシュトークンでアクセストークンを更新してFirestoreに保存
+
+        リフレッシュに失敗した場合は、キャッシュを破棄して保存済みのトークンを読み直し、
+        別のプロセスが更新していればそのトークンで1回だけやり直す
+
+        Args:
+            stale_token: 失効したと判明したアクセストークン。既に別スレッドで
+                更新済みの場合はリフレッシュせず現在のトークンを返す
+
+        Returns:
+            新しいアクセストークン
+
+        Raises:
+            TokenError: リフレッシュできない、または失敗した場合
+        """
+        with self._lock:
+            if stale_token is not None and stale_token != self._access_token:
+                return self._access_token
+
+            if self.oauth_client is None:
+                raise TokenError("X API クレデンシャルが設定されていません")
+            if not self._refresh_token:
+                raise TokenError("リフレッシュトークンがありません")
+
+            try:
+                return self._refresh_locked()
+            except TokenError as e:
+                # 別のプロセスで更新されたトークンを読み直す
+                self.fs_client.invalidate_token_cache(self.user_id)
+                if not self._reload_locked():
+                    raise
+                logger.warning(
+                    f"Token refresh failed ({e}), retrying with tokens saved by another process"
+                )
+
+            if self._access_token != stale_token and (
+                self._expires_at is None
+                or not OAuthClient.is_expired_at(self._expires_at)
+            ):
+                # 別のプロセスがリフレッシュ済みのアクセストークンをそのまま使う
+                return self._access_token
+            return self._refresh_locked()
+
+    def _reload_locked(self) -> bool:
+        """
+        保存済みのトークンを読み直す（ロック取得済みで呼び出す）
+
+        Returns:
+            別のプロセスがトークンを更新していた場合は True
+        """
+        tokens = self.fs_client.get_user_tokens(self.user_id)
+        refresh_token = tokens.get("refresh_token")
+        access_token = tokens.get("access_token")
+        if (
+            not refresh_token
+            or not access_token
+            or refresh_token == self._refresh_token
+        ):
+            return False
+
+        self._access_token = access_token
+        self._refresh_token = refresh_token
+        self._expires_at = tokens.get("expires_at")
+        return True
+
+    def _refresh_locked(self) -> str:
+        """リフレッシュトークンでアクセストークンを更新して保存（ロック取得済みで呼び出す）"""
+        new_token_data = self.oauth_client.refresh_access_token(self._refresh_token)
+        self._access_token = new_token_data.get("access_token")
+        self._refresh_token = new_token_data.get(
+            "refresh_token", self._refresh_token
+        )
+        self._expires_at = datetime.fromisoformat(new_token_data["expires_at"])
+
+        # Firestoreに新しいトークンと有効期限を保存
+        logger.info("Saving refreshed tokens to Firestore")
+        self.fs_client.update_user_tokens(
+            access_token=self._access_token,
+            refresh_token=self._refresh_token,
+            user_id=self.user_id,
+            expires_at=self._expires_at,
+        )
+        return self._access_token
@@ -0,0 +1,138 @@
+"""
+ツイートの文字数計算 (Azure Functions版)
+
+X の文字数の数え方（twitter-text の weighted length）に合わせて投稿の長さを計算します。
+
+- 重み1: Latin・記号などの範囲（WEIGHT_1_RANGES）。それ以外（日本語・中国語・韓国語など）は重み2
+- URL: 長さにかかわらず 23（t.co に短縮されるため）
+- 絵文字: 結合・修飾された並び（ZWJ シーケンス、肌の色、国旗など）全体で 2
+- 計算前に NFC 正規化する
+
+上限は重みの合計 280 で、日本語のみの投稿は140文字までになります。
+フロントエンドの utils/tweet_text.py と同じ定義です。
+"""
+
+import re
+import unicodedata
+
+MAX_TWEET_LENGTH = 280
+
+# t.co に短縮された URL の長さ
+URL_LENGTH = 23
+
+# 重み1のコードポイント範囲（twitter-text v3 の設定と同じ。範囲外は重み2）
+WEIGHT_1_RANGES = (
+    (0x0000, 0x10FF),
+    (0x2000, 0x200D),
+    (0x2010, 0x201F),
+    (0x2032, 0x2037),
+)
+
+# BMP のコードポイントごとの重み（範囲表から起動時に1回だけ作成）
+_BMP_WEIGHTS = bytearray(b"\x02" * 0x10000)
+for _start, _end in WEIGHT_1_RANGES:
+    _BMP_WEIGHTS[_start : _end + 1] = b"\x01" * (_end - _start + 1)
+_BMP_WEIGHTS = bytes(_BMP_WEIGHTS)
+
+_ZWJ = 0x200D
+_VARIATION_SELECTOR_16 = 0xFE0F
+# 直前の文字に付く修飾（異体字セレクタ・囲み記号・肌の色・タグ）。単独では数えない
+_MODIFIER_RANGES = (
+    (0xFE00, 0xFE0F),
+    (0x20E3, 0x20E3),
+    (0x1F3FB, 0x1F3FF),
+    (0xE0020, 0xE007F),
+)
+_REGIONAL_INDICATORS = (0x1F1E6, 0x1F1FF)
+
+# スキームのある URL、www. で始まる URL、主要な TLD のドメイン名
+_URL_PATH = r"(?:/[A-Za-z0-9!*';:=+,.$/%#\[\]\-_~&|@()?]*[A-Za-z0-9/=_#\-&%~+@])?"
+URL_PATTERN = re.compile(
+    r"(?<![A-Za-z0-9@.\-/])(?:"
+    r"https?://[A-Za-z0-9\-._~%]+(?::\d+)?"
+    r"|www\.[A-Za-z0-9\-]+(?:\.[A-Za-z0-9\-]+)+"
+    r"|[A-Za-z0-9\-]+(?:\.[A-Za-z0-9\-]+)*"
+    r"\.(?:com|net|org|jp|io|co|me|dev|app|info|biz|ly|gl|tv|us|uk|ai|gg)"
+    r"(?![A-Za-z0-9\-])"
+    r")" + _URL_PATH,
+    re.IGNORECASE,
+)
+
+
+def _is_modifier(code_point: int) -> bool:
+    for start, end in _MODIFIER_RANGES:
+        if start <= code_point <= end:
+            return True
+    return False
+
+
+def _scan(text: str) -> int:
+    """URL を含まないテキストの重みの合計（1回の走査）"""
+    weights = _BMP_WEIGHTS
+    total = 0
+    previous_weight = 0
+    previous_emoji = False
+    joined = False
+    regional_pending = False
+
+    for char in text:
+        code_point = ord(char)
+
+        if code_point == _ZWJ and previous_emoji:
+            # ZWJ シーケンスの続きは直前の絵文字に含める
+            joined = True
+            continue
+        if code_point >= 0x20E3 and _is_modifier(code_point):
+            # 重み1の文字（数字・© など）を絵文字化する場合は絵文字として2に揃える
+            if code_point == _VARIATION_SELECTOR_16 and previous_weight == 1:
+                total += 1
+                previous_weight = 2
+            previous_emoji = True
+            continue
+        if joined:
+            joined = False
+            continue
+        if _REGIONAL_INDICATORS[0] <= code_point <= _REGIONAL_INDICATORS[1]:
+            # 国旗は2つの地域指示子で1つの絵文字
+            if regional_pending:
+                regional_pending = False
+                continue
+            regional_pending = True
+        else:
+            regional_pending = False
+
+        previous_weight = weights[code_point] if code_point < 0x10000 else 2
+        previous_emoji = code_point >= 0x2100 and previous_weight == 2
+        total += previous_weight
+
+    return total
+
+
+def weighted_length(text: str) -> int:
+    """
+    X の数え方で投稿の長さを計算
+
+    Args:
+        text: 投稿テキスト
+
+    Returns:
+        重みの合計（MAX_TWEET_LENGTH 以下であれば投稿可能）
+    """
+    if not text:
+        return 0
+    text = unicodedata.normalize("NFC", text)
+    if text.isascii() and "." not in text:
+        # URL を含まない ASCII のみのテキストはすべて重み1
+        return len(text)
+
+    total = 0
+    position = 0
+    for match in URL_PATTERN.finditer(text):
+        total += _scan(text[position : match.start()]) + URL_LENGTH
+        position = match.end()
+    return total + _scan(text[position:])
+
+
+def is_within_limit(text: str) -> bool:
+    """投稿の長さが上限以内かどうか"""
+    return weighted_length(text) <= MAX_TWEET_LENGTH